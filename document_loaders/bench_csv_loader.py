@@ -0,0 +1,115 @@
+"""
+Benchmark: CSVLoader vs StreamingCSVLoader on a generated CSV
+
+Every config runs in a fresh process, consumes every document and reports rows/s,
+documents, MB/s and peak RSS. Run it with two sizes to see which loaders keep
+their memory flat (peak RSS independent of the number of rows):
+
+    csv_eager        CSVLoader(path).load()
+    csv_lazy         CSVLoader(path).lazy_load()
+    stream           StreamingCSVLoader, all columns, one row per document
+    stream_project   only "Comment" as content, "User ID" / "Purchased" as metadata
+    stream_pack      as stream_project, 100 rows per document
+
+Run from the project root:
+    python -m document_loaders.bench_csv_loader --rows 100000 1000000
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+CONFIGS = ["csv_eager", "csv_lazy", "stream", "stream_project", "stream_pack"]
+
+
+def make_loader(config: str, path: str, batch_size: int):
+    from langchain_community.document_loaders import CSVLoader
+
+    from document_loaders.streaming_csv_loader import StreamingCSVLoader
+
+    projection = {"content_columns": ["Comment"], "metadata_columns": ["User ID", "Purchased"]}
+    return {
+        "csv_eager": lambda: CSVLoader(path),
+        "csv_lazy": lambda: CSVLoader(path),
+        "stream": lambda: StreamingCSVLoader(path, batch_size=batch_size),
+        "stream_project": lambda: StreamingCSVLoader(path, batch_size=batch_size, **projection),
+        "stream_pack": lambda: StreamingCSVLoader(path, batch_size=batch_size, rows_per_document=100, **projection),
+    }[config]()
+
+
+def run(config: str, path: str, rows: int, batch_size: int) -> dict:
+    """Runs inside the child process"""
+    from document_loaders.bench_loaders import peak_rss_mb
+
+    loader = make_loader(config, path, batch_size)
+    start = time.perf_counter()
+    documents = iter(loader.load()) if config == "csv_eager" else loader.lazy_load()
+    docs = chars = 0
+    for doc in documents:
+        docs += 1
+        chars += len(doc.page_content)
+    seconds = time.perf_counter() - start
+    mb = os.path.getsize(path) / 1e6
+    return {
+        "config": config,
+        "rows": rows,
+        "docs": docs,
+        "input_mb": round(mb, 1),
+        "chars": chars,
+        "seconds": round(seconds, 3),
+        "rows_per_s": round(rows / seconds),
+        "mb_per_s": round(mb / seconds, 1),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000, 500_000])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--configs", nargs="+", default=CONFIGS, choices=CONFIGS)
+    parser.add_argument("--output", default=None, help="also write the results as JSON")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        config, path, rows = args.child
+        print(json.dumps(run(config, path, int(rows), args.batch_size)))
+        return
+
+    from document_loaders.sample_corpus import make_csv
+
+    folder = tempfile.mkdtemp()
+    results = []
+    print(f"{'config':<15} {'rows':>9} {'docs':>9} {'MB':>7} {'total':>8} {'rows/s':>9} {'MB/s':>6} {'peak RSS':>9}")
+    try:
+        for rows in args.rows:
+            path = make_csv(os.path.join(folder, f"data_{rows}.csv"), rows)
+            for config in args.configs:
+                command = [
+                    sys.executable, "-m", "document_loaders.bench_csv_loader", "--child", config, path, str(rows),
+                    "--batch-size", str(args.batch_size),
+                ]
+                child = subprocess.run(command, capture_output=True, text=True, check=True)
+                result = json.loads(child.stdout.strip().splitlines()[-1])
+                results.append(result)
+                print(
+                    f"{config:<15} {rows:>9} {result['docs']:>9} {result['input_mb']:7.1f} {result['seconds']:7.2f}s"
+                    f" {result['rows_per_s']:>9} {result['mb_per_s']:6.1f} {result['peak_rss_mb']:7.0f}MB"
+                )
+            os.remove(path)
+    finally:
+        shutil.rmtree(folder)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""
+Benchmark: document loaders, eager vs lazy vs parallel vs stream, on generated corpora
+
+Every run fully consumes the loader output (timing `lazy_load()` alone only
+measures building a generator) in a fresh process and reports:
+
+    ttfd       time to first document (for load() that is the whole load)
+    seconds    until the last document
+    docs/s, MB/s of input, peak RSS of the process plus its worker processes
+
+Workloads: text files (DirectoryLoader + TextLoader), one big CSV (CSVLoader),
+one many-page PDF (PyPDFLoader, StreamingPDFLoader in the stream mode), a folder of PDFs (DirectoryLoader + PyPDFLoader)
+and HTML pages served by a local HTTP server (WebBaseLoader, needs bs4).
+
+Run from the project root:
+    python -m document_loaders.bench_loaders --files 200 --csv-rows 200000 --processes 8
+    python -m document_loaders.bench_loaders --workloads pdf_dir --modes lazy parallel
+"""
+
+import argparse
+import functools
+import http.server
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+MODES = ["eager", "lazy", "parallel", "stream"]
+
+
+def folder_mb(paths: list[str]) -> float:
+    return sum(os.path.getsize(p) for p in paths) / 1e6
+
+
+def make_loader(workload: str, mode: str, corpus: str, processes: int, base_url: str | None):
+    """(loader, input files) for one workload, None when the mode doesn't apply"""
+    from langchain_community.document_loaders import CSVLoader, DirectoryLoader, PyPDFLoader, TextLoader
+
+    from document_loaders.parallel_loader import ParallelDirectoryLoader
+
+    if mode == "stream" and workload != "pdf":
+        return None, []
+    if workload in ("text_dir", "pdf_dir"):
+        folder, glob, loader_cls = {
+            "text_dir": (os.path.join(corpus, "text"), "*.txt", TextLoader),
+            "pdf_dir": (os.path.join(corpus, "pdf"), "*.pdf", PyPDFLoader),
+        }[workload]
+        paths = sorted(os.path.join(folder, name) for name in os.listdir(folder))
+        if mode == "parallel":
+            return ParallelDirectoryLoader(folder, glob=glob, loader_cls=loader_cls, processes=processes), paths
+        return DirectoryLoader(folder, glob=glob, loader_cls=loader_cls), paths
+    if mode == "parallel":
+        return None, []
+    if workload == "csv":
+        path = os.path.join(corpus, "data.csv")
+        return CSVLoader(path), [path]
+    if workload == "pdf":
+        path = os.path.join(corpus, "big.pdf")
+        if mode == "stream":
+            from document_loaders.streaming_pdf_loader import StreamingPDFLoader
+
+            return StreamingPDFLoader(path), [path]
+        return PyPDFLoader(path), [path]
+    if workload == "web":
+        from langchain_community.document_loaders import WebBaseLoader
+
+        paths = sorted(os.path.join(corpus, "html", name) for name in os.listdir(os.path.join(corpus, "html")))
+        urls = [f"{base_url}/{os.path.basename(p)}" for p in paths]
+        return WebBaseLoader(urls), paths
+    raise ValueError(f"unknown workload {workload}")
+
+
+def _proc_mb(pid: int | str, field: str, file: str = "status") -> float:
+    # /proc/<pid>/status or smaps_rollup (Linux), the process may already be gone
+    try:
+        with open(f"/proc/{pid}/{file}") as f:
+            for line in f:
+                if line.startswith(field):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return 0.0
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process only, VmHWM starts fresh in every process"""
+    return _proc_mb("self", "VmHWM:") or float("nan")
+
+
+def _child_pids() -> list[int]:
+    pids = []
+    for task in os.listdir("/proc/self/task"):
+        try:
+            with open(f"/proc/self/task/{task}/children") as f:
+                pids.extend(int(pid) for pid in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+class ChildRSSSampler:
+    """
+    Highest total memory of the child processes (the parallel loader's workers), sampled every
+    `interval` seconds in a thread. The parent's VmHWM doesn't include them and getrusage
+    only reports the single largest child. PSS is used, so pages a forked worker still
+    shares with the parent are not counted twice.
+    """
+
+    def __init__(self, interval: float = 0.02):
+        self.interval = interval
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.is_set():
+            total = sum(_proc_mb(pid, "Pss:", "smaps_rollup") for pid in _child_pids())
+            self.peak_mb = max(self.peak_mb, total)
+            self._stop.wait(self.interval)
+
+    def __enter__(self) -> "ChildRSSSampler":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+def run(workload: str, mode: str, corpus: str, processes: int, base_url: str | None) -> dict | None:
+    """Runs inside the child process"""
+    loader, paths = make_loader(workload, mode, corpus, processes, base_url)
+    if loader is None:
+        return None
+    start = time.perf_counter()
+    first = None
+    docs = chars = 0
+    with ChildRSSSampler() as workers:
+        if mode == "eager":
+            loaded = loader.load()
+            first = time.perf_counter()
+            documents = iter(loaded)
+        else:
+            documents = loader.lazy_load()
+        for doc in documents:
+            if first is None:
+                first = time.perf_counter()
+            docs += 1
+            chars += len(doc.page_content)
+    seconds = time.perf_counter() - start
+    mb = folder_mb(paths)
+    return {
+        "workload": workload,
+        "mode": mode,
+        "docs": docs,
+        "input_mb": round(mb, 2),
+        "chars": chars,
+        "ttfd": round((first or time.perf_counter()) - start, 4),
+        "seconds": round(seconds, 4),
+        "docs_per_s": round(docs / seconds, 1),
+        "mb_per_s": round(mb / seconds, 2),
+        # parent peak + workers peak: an upper bound, the two peaks may not happen at the same time
+        "peak_rss_mb": round(peak_rss_mb() + workers.peak_mb, 1),
+        "workers_rss_mb": round(workers.peak_mb, 1),
+    }
+
+
+def build_corpus(folder: str, args) -> None:
+    from document_loaders.sample_corpus import make_csv, make_html_pages, make_pdf, make_pdfs, make_text_files
+
+    make_text_files(os.path.join(folder, "text"), args.files)
+    make_pdfs(os.path.join(folder, "pdf"), args.files, pages=args.pages_per_file)
+    make_pdf(os.path.join(folder, "big.pdf"), args.big_pdf_pages)
+    make_csv(os.path.join(folder, "data.csv"), args.csv_rows)
+    make_html_pages(os.path.join(folder, "html"), args.html_pages)
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args) -> None:
+        pass
+
+
+def serve(folder: str) -> tuple[http.server.ThreadingHTTPServer, str]:
+    """Local HTTP fixture server for the web workload, on a free port"""
+    handler = functools.partial(_QuietHandler, directory=folder)
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100, help="files in the text and pdf folders")
+    parser.add_argument("--pages-per-file", type=int, default=5)
+    parser.add_argument("--big-pdf-pages", type=int, default=500)
+    parser.add_argument("--csv-rows", type=int, default=100_000)
+    parser.add_argument("--html-pages", type=int, default=50)
+    parser.add_argument("--processes", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--workloads", nargs="+", default=["text_dir", "csv", "pdf", "pdf_dir", "web"])
+    parser.add_argument("--modes", nargs="+", default=MODES, choices=MODES)
+    parser.add_argument("--corpus", default=None, help="reuse a generated corpus folder")
+    parser.add_argument("--output", default=None, help="also write the results as JSON")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        workload, mode = args.child
+        print(json.dumps(run(workload, mode, args.corpus, args.processes, args.base_url)))
+        return
+
+    corpus = args.corpus or tempfile.mkdtemp()
+    if not os.path.exists(os.path.join(corpus, "data.csv")):
+        start = time.perf_counter()
+        build_corpus(corpus, args)
+        print(f"generated corpus in {corpus} ({time.perf_counter() - start:.1f}s)")
+    server, base_url = serve(os.path.join(corpus, "html"))
+
+    results = []
+    print(
+        f"{'workload':<9} {'mode':<9} {'docs':>7} {'MB':>7} {'ttfd':>9} {'total':>8} {'docs/s':>9} {'MB/s':>7}"
+        f" {'peak RSS':>9} {'(workers)':>10}"
+    )
+    try:
+        for workload in args.workloads:
+            for mode in args.modes:
+                command = [
+                    sys.executable, "-m", "document_loaders.bench_loaders", "--child", workload, mode,
+                    "--corpus", corpus, "--processes", str(args.processes), "--base-url", base_url,
+                ]
+                child = subprocess.run(command, capture_output=True, text=True)
+                if child.returncode:
+                    error = child.stderr.strip().splitlines()[-1] if child.stderr.strip() else child.returncode
+                    print(f"{workload:<9} {mode:<9} skipped: {error}")
+                    continue
+                result = json.loads(child.stdout.strip().splitlines()[-1])
+                if result is None:
+                    continue
+                results.append(result)
+                print(
+                    f"{workload:<9} {mode:<9} {result['docs']:>7} {result['input_mb']:7.1f} {result['ttfd']:8.3f}s"
+                    f" {result['seconds']:7.2f}s {result['docs_per_s']:9.0f} {result['mb_per_s']:7.2f}"
+                    f" {result['peak_rss_mb']:7.0f}MB {result['workers_rss_mb']:8.0f}MB"
+                )
+    finally:
+        server.shutdown()
+        if args.corpus is None:
+            shutil.rmtree(corpus)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
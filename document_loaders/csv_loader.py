@@ -1,8 +1,24 @@
+# run from the project root: python -m document_loaders.csv_loader
 from langchain_community.document_loaders import CSVLoader
 
-loader = CSVLoader(file_path="./docs/Social_Network_Ads.csv")
+loader = CSVLoader(file_path="document_loaders/docs/Social_Network_Ads.csv")
 
 docs = loader.load()
 
 print(len(docs))
 print(docs[0])
+
+"""Streaming: batches of rows, only the columns you need, 10 rows per document"""
+from document_loaders.streaming_csv_loader import StreamingCSVLoader
+
+streaming_loader = StreamingCSVLoader(
+    file_path="document_loaders/docs/Social_Network_Ads.csv",
+    content_columns=["Gender", "Age", "EstimatedSalary"],
+    metadata_columns=["User ID", "Purchased"],
+    rows_per_document=10,
+    batch_size=100,
+)
+
+for batch in streaming_loader.lazy_load_batches():
+    print(len(batch))
+print(batch[0])
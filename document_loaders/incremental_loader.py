@@ -0,0 +1,207 @@
+"""
+Incremental directory loading: only new or changed files are parsed again.
+
+A manifest remembers path, size, mtime, content hash and document count of every
+file that was loaded. On the next run:
+
+- size + mtime unchanged           -> skipped without reading the file
+- size or mtime changed, same hash -> skipped (only the manifest is updated)
+- new or different content          -> loaded, its documents are yielded
+- in the manifest but gone          -> reported in `changes.deleted`
+
+Documents get stable ids "<relative path>:<n>", `changes.stale_ids` lists the ids
+of modified and deleted files so a vector store can drop them before the new
+documents are added:
+
+    loader = IncrementalDirectoryLoader("./docs/test_dir/", glob="*.pdf")
+    changes = loader.scan()
+    vector_store.delete(changes.stale_ids)
+    vector_store.add_documents(list(loader.lazy_load()))
+
+Crash safety: every file is appended to a journal (<manifest>.log, fsync'ed) once
+all its documents were consumed, the manifest itself is only replaced atomically
+at the end of a complete run. An interrupted run resumes after the last
+committed file, a file is never skipped but may be yielded twice.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+from document_loaders.parallel_loader import LoadError, load_file
+
+MANIFEST_VERSION = 1
+
+
+class Changes(NamedTuple):
+    added: list[str]
+    modified: list[str]
+    deleted: list[str]
+    unchanged: list[str]
+    stale_ids: list[str]
+
+
+def file_hash(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _document_ids(relative: str, count: int) -> list[str]:
+    return [f"{relative}:{n}" for n in range(count)]
+
+
+class Manifest:
+    """{relative path: {"size", "mtime_ns", "sha256", "documents"}} with a write-ahead journal"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.journal_path = f"{path}.log"
+        self.files: dict[str, dict] = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION:
+                raise ValueError(f"Unsupported manifest version {data.get('version')}, expected {MANIFEST_VERSION}")
+            self.files = data["files"]
+        # entries of an interrupted run, applied on top of the last complete manifest
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        # the crash happened in the middle of this line
+                        break
+                    if record["entry"] is None:
+                        self.files.pop(record["path"], None)
+                    else:
+                        self.files[record["path"]] = record["entry"]
+        self._journal = None
+
+    def record(self, relative: str, entry: dict | None) -> None:
+        """Commit one file (None = deleted), durable when this returns"""
+        if entry is None:
+            self.files.pop(relative, None)
+        else:
+            self.files[relative] = entry
+        if self._journal is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.journal_path)), exist_ok=True)
+            self._journal = open(self.journal_path, "a", encoding="utf-8")
+        self._journal.write(json.dumps({"path": relative, "entry": entry}) + "\n")
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+
+    def checkpoint(self) -> None:
+        """Write the whole manifest (temp file + rename) and drop the journal"""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=1, sort_keys=True)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+        if os.path.exists(self.journal_path):
+            os.remove(self.journal_path)
+
+
+class IncrementalDirectoryLoader(BaseLoader):
+    """
+    loader = IncrementalDirectoryLoader("./docs/test_dir/", glob="*.pdf", loader_cls=PyPDFLoader)
+    for doc in loader.lazy_load():     # only documents of new / modified files
+        ...
+    loader.changes.deleted, loader.changes.stale_ids, loader.errors
+    """
+
+    def __init__(
+        self,
+        path: str,
+        glob: str = "**/[!.]*",
+        loader_cls=PyPDFLoader,
+        loader_kwargs: dict | None = None,
+        manifest_path: str | None = None,
+    ):
+        self.path = path
+        self.glob = glob
+        self.loader_cls = loader_cls
+        self.loader_kwargs = loader_kwargs or {}
+        self.manifest_path = manifest_path or os.path.join(path, ".ingest_manifest.json")
+        self.changes: Changes | None = None
+        self.errors: list[LoadError] = []
+        self._stats: dict[str, dict] = {}
+        self._scanned = False
+
+    def scan(self) -> Changes:
+        """Compare the folder with the manifest, nothing is parsed or written"""
+        manifest = Manifest(self.manifest_path)
+        root = Path(self.path)
+        # a glob like "*" would also match the manifest files themselves
+        own = {os.path.abspath(p) for p in (manifest.path, manifest.journal_path, f"{manifest.path}.tmp")}
+        paths = sorted(p for p in root.glob(self.glob) if p.is_file() and os.path.abspath(p) not in own)
+        added, modified, unchanged, stale_ids = [], [], [], []
+        self._stats = {}
+        for p in paths:
+            relative = p.relative_to(root).as_posix()
+            stat = p.stat()
+            entry = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+            old = manifest.files.get(relative)
+            if old is not None and old["size"] == entry["size"] and old["mtime_ns"] == entry["mtime_ns"]:
+                unchanged.append(relative)
+                continue
+            entry["sha256"] = file_hash(str(p))
+            self._stats[relative] = entry
+            if old is None:
+                added.append(relative)
+            elif old["sha256"] == entry["sha256"]:
+                # touched or copied over with the same content
+                unchanged.append(relative)
+            else:
+                modified.append(relative)
+                stale_ids.extend(_document_ids(relative, old["documents"]))
+        present = {p.relative_to(root).as_posix() for p in paths}
+        deleted = sorted(relative for relative in manifest.files if relative not in present)
+        for relative in deleted:
+            stale_ids.extend(_document_ids(relative, manifest.files[relative]["documents"]))
+        self.changes = Changes(added, modified, deleted, unchanged, stale_ids)
+        self._scanned = True
+        return self.changes
+
+    def lazy_load(self) -> Iterator[Document]:
+        # reuse the scan the caller already acted on (stale_ids), scan again otherwise
+        changes = self.changes if self._scanned else self.scan()
+        self._scanned = False
+        manifest = Manifest(self.manifest_path)
+        self.errors = []
+        to_load = set(changes.added) | set(changes.modified)
+
+        # same content, new stat: nothing to yield, just remember the new size / mtime
+        for relative, entry in self._stats.items():
+            if relative not in to_load:
+                manifest.record(relative, {**entry, "documents": manifest.files[relative]["documents"]})
+
+        for relative in sorted(to_load):
+            result = load_file(self.loader_cls, os.path.join(self.path, relative), self.loader_kwargs)
+            if isinstance(result, LoadError):
+                # not committed, the next run tries this file again
+                self.errors.append(result)
+                continue
+            for doc, doc_id in zip(result, _document_ids(relative, len(result))):
+                doc.id = doc.id or doc_id
+                doc.metadata["content_hash"] = self._stats[relative]["sha256"]
+                yield doc
+            # only reached once the caller consumed every document of the file
+            manifest.record(relative, {**self._stats[relative], "documents": len(result)})
+
+        for relative in changes.deleted:
+            manifest.record(relative, None)
+        manifest.checkpoint()
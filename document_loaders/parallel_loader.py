@@ -0,0 +1,111 @@
+"""
+DirectoryLoader that parses the files in a process pool.
+
+`DirectoryLoader(path, glob="*.pdf", loader_cls=PyPDFLoader)` parses one file
+after the other on one core (use_multithreading doesn't help, PDF parsing is
+pure Python and holds the GIL). ParallelDirectoryLoader:
+
+- parses every file in a worker process, with at most `max_in_flight` files
+  submitted ahead, so memory stays bounded however many files there are
+- yields the documents in file order (sorted paths) and page order, a file's
+  documents come out as soon as it and all files before it are parsed
+- a file that fails to load doesn't stop the batch, it ends up in `loader.errors`
+
+Run a script using it under `if __name__ == "__main__":`, worker processes may
+import the main module again.
+"""
+
+import multiprocessing
+import os
+import traceback
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+from langchain_community.document_loaders import PyPDFLoader
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+
+class LoadError(NamedTuple):
+    path: str
+    error_type: str
+    message: str
+    traceback: str
+
+
+def load_file(loader_cls, path: str, loader_kwargs: dict) -> list[Document] | LoadError:
+    """All documents of one file, or the error (what every worker runs, also used by IncrementalDirectoryLoader)"""
+    try:
+        return list(loader_cls(path, **loader_kwargs).lazy_load())
+    except Exception as error:
+        return LoadError(path, type(error).__name__, str(error), traceback.format_exc())
+
+
+class ParallelDirectoryLoader(BaseLoader):
+    """
+    loader = ParallelDirectoryLoader("./docs/test_dir/", glob="*.pdf", processes=8)
+    for doc in loader.lazy_load():
+        ...
+    loader.errors   # [LoadError(path, error_type, message, traceback), ...]
+    """
+
+    def __init__(
+        self,
+        path: str,
+        glob: str = "**/[!.]*",
+        loader_cls=PyPDFLoader,
+        loader_kwargs: dict | None = None,
+        processes: int | None = None,
+        max_in_flight: int | None = None,
+        raise_errors: bool = False,
+        mp_context: str | None = None,
+    ):
+        self.path = path
+        self.glob = glob
+        self.loader_cls = loader_cls
+        self.loader_kwargs = loader_kwargs or {}
+        self.processes = processes or os.cpu_count() or 1
+        # files submitted but not yielded yet, bounds the parsed documents held in memory
+        self.max_in_flight = max_in_flight or self.processes * 4
+        self.raise_errors = raise_errors
+        # None = the platform default ("fork" on Linux), "spawn" for fork-unsafe libraries
+        self.mp_context = mp_context
+        self.errors: list[LoadError] = []
+
+    def file_paths(self) -> list[str]:
+        """Files to load, sorted so the output order never depends on the file system"""
+        return sorted(str(p) for p in Path(self.path).glob(self.glob) if p.is_file())
+
+    def _emit(self, result: list[Document] | LoadError) -> list[Document]:
+        if isinstance(result, LoadError):
+            if self.raise_errors:
+                raise RuntimeError(f"Failed to load {result.path}: {result.error_type}: {result.message}")
+            self.errors.append(result)
+            return []
+        return result
+
+    def lazy_load(self) -> Iterator[Document]:
+        self.errors = []
+        paths = self.file_paths()
+        if self.processes <= 1 or len(paths) <= 1:
+            # not worth starting a pool
+            for path in paths:
+                yield from self._emit(load_file(self.loader_cls, path, self.loader_kwargs))
+            return
+
+        context = multiprocessing.get_context(self.mp_context) if self.mp_context else None
+        executor = ProcessPoolExecutor(max_workers=min(self.processes, len(paths)), mp_context=context)
+        pending = deque()
+        try:
+            for path in paths:
+                if len(pending) >= self.max_in_flight:
+                    # futures are collected oldest first, that keeps the file order
+                    yield from self._emit(pending.popleft().result())
+                pending.append(executor.submit(load_file, self.loader_cls, path, self.loader_kwargs))
+            while pending:
+                yield from self._emit(pending.popleft().result())
+        finally:
+            # the caller may stop iterating early: drop the files that haven't started
+            executor.shutdown(wait=True, cancel_futures=True)
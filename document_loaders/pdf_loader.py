@@ -1,12 +1,16 @@
+# run from the project root: python -m document_loaders.pdf_loader
 from dotenv import load_dotenv
-from langchain_community.document_loaders import PyPDFLoader
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import PromptTemplate
 from langchain_groq import ChatGroq
 
+from document_loaders.streaming_pdf_loader import StreamingPDFLoader
+
 load_dotenv()
 
-loader = PyPDFLoader("./docs/sample.pdf")
+# the chain below only uses the first page, so only that page is parsed
+# (PyPDFLoader("document_loaders/docs/sample.pdf") extracts every page first)
+loader = StreamingPDFLoader("document_loaders/docs/sample.pdf", max_pages=1)
 
 docs = loader.load()
 
@@ -0,0 +1,121 @@
+"""
+Generated corpora for the document loader benchmarks.
+
+Text files, one CSV, PDFs and HTML pages of a configurable size, filled with
+pseudo random words (same seed, same files). The PDFs are written by hand (one
+Helvetica text block per page) so no PDF library is needed to make them.
+"""
+
+import csv
+import os
+import random
+
+WORDS = (
+    "cricket team season match score runs wicket player coach stadium pitch ball bat over "
+    "docker image container volume network git commit branch merge rebase remote push pull "
+    "energy balance health sleep water plants sunlight language model vector store retriever"
+).split()
+
+
+def sentence(rng: random.Random, words: int = 12) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def paragraph(rng: random.Random, sentences: int = 6) -> str:
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def make_text_files(folder: str, count: int, paragraphs: int = 20, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"text_{i:05d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(paragraph(rng) for _ in range(paragraphs)))
+        paths.append(path)
+    return paths
+
+
+def make_csv(path: str, rows: int, seed: int = 0) -> str:
+    """Rows like Social_Network_Ads.csv plus a free text column"""
+    rng = random.Random(seed)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["User ID", "Gender", "Age", "EstimatedSalary", "Purchased", "Comment"])
+        for i in range(rows):
+            writer.writerow([
+                15_000_000 + i,
+                rng.choice(["Male", "Female"]),
+                rng.randint(18, 60),
+                rng.randrange(15_000, 150_000, 1000),
+                rng.randint(0, 1),
+                sentence(rng),
+            ])
+    return path
+
+
+def _pdf_text(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: str, pages: list[list[str]]) -> None:
+    """Minimal PDF: one page per entry of `pages`, each line of text drawn with Helvetica"""
+    objects = [b"<< /Type /Catalog /Pages 2 0 R >>", None, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"]
+    kids = []
+    for lines in pages:
+        ops = ["BT", "/F1 10 Tf", "12 TL", "50 780 Td"]
+        ops += [f"({_pdf_text(line)}) '" for line in lines]
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        objects.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        content = len(objects)
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content
+        )
+        kids.append(len(objects))
+    objects[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % kid for kid in kids),
+        len(kids),
+    )
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    with open(path, "wb") as f:
+        f.write(out)
+
+
+def make_pdf(path: str, pages: int, lines_per_page: int = 50, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    write_pdf(path, [[sentence(rng) for _ in range(lines_per_page)] for _ in range(pages)])
+    return path
+
+
+def make_pdfs(folder: str, count: int, pages: int = 5, lines_per_page: int = 50, seed: int = 0) -> list[str]:
+    os.makedirs(folder, exist_ok=True)
+    return [
+        make_pdf(os.path.join(folder, f"report_{i:05d}.pdf"), pages, lines_per_page, seed=seed + i)
+        for i in range(count)
+    ]
+
+
+def make_html_pages(folder: str, count: int, paragraphs: int = 20, seed: int = 0) -> list[str]:
+    rng = random.Random(seed)
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"page_{i:05d}.html")
+        body = "\n".join(f"<p>{paragraph(rng)}</p>" for _ in range(paragraphs))
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(f"<html><head><title>Page {i}</title></head><body><h1>Page {i}</h1>\n{body}\n</body></html>")
+        paths.append(path)
+    return paths
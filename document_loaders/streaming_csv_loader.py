@@ -0,0 +1,115 @@
+"""
+CSV loader for big exports: row batches, column projection, several rows per document.
+
+`CSVLoader(path).load()` keeps one Document per row in memory, with every column
+in page_content. StreamingCSVLoader:
+
+- reads the file in batches of `batch_size` rows, only one batch is in memory,
+  `lazy_load_batches()` hands out the batches themselves (e.g. for
+  `vector_store.add_documents(batch)`)
+- projects columns: `content_columns` go into page_content ("column: value" lines
+  like CSVLoader), `metadata_columns` into metadata, other columns are dropped.
+  Columns are looked up by position once, not per row with a dict
+- packs `rows_per_document` rows into one Document (rows separated by a blank
+  line), metadata columns then hold the list of values of its rows
+
+With rows_per_document=1 the documents are the same as the ones of
+CSVLoader(path, content_columns=..., metadata_columns=...).
+"""
+
+import csv
+from itertools import islice
+from pathlib import PurePath
+from typing import Iterator, Sequence
+
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+
+
+class StreamingCSVLoader(BaseLoader):
+    """
+    loader = StreamingCSVLoader(
+        "./docs/Social_Network_Ads.csv",
+        content_columns=["Gender", "Age", "EstimatedSalary"],
+        metadata_columns=["User ID", "Purchased"],
+        rows_per_document=10,
+    )
+    for batch in loader.lazy_load_batches():
+        vector_store.add_documents(batch)
+    """
+
+    def __init__(
+        self,
+        file_path: str | PurePath,
+        content_columns: Sequence[str] = (),
+        metadata_columns: Sequence[str] = (),
+        rows_per_document: int = 1,
+        batch_size: int = 1000,
+        source_column: str | None = None,
+        encoding: str | None = None,
+        csv_args: dict | None = None,
+    ):
+        if rows_per_document < 1 or batch_size < 1:
+            raise ValueError("rows_per_document and batch_size must be at least 1")
+        self.file_path = str(file_path)
+        # empty = every column that isn't a metadata column, like CSVLoader
+        self.content_columns = list(content_columns)
+        self.metadata_columns = list(metadata_columns)
+        self.rows_per_document = rows_per_document
+        self.batch_size = batch_size
+        self.source_column = source_column
+        self.encoding = encoding
+        self.csv_args = csv_args or {}
+
+    def _positions(self, header: list[str]) -> tuple[list[tuple[str, int]], list[tuple[str, int]], int | None]:
+        """(name, index) of the content and metadata columns, index of the source column"""
+        index = {name: i for i, name in enumerate(header)}
+
+        def find(name: str, kind: str) -> int:
+            if name not in index:
+                raise ValueError(f"{kind} column '{name}' not found in CSV file, columns: {header}")
+            return index[name]
+
+        names = self.content_columns or [name for name in header if name not in self.metadata_columns]
+        content = [(name.strip(), find(name, "Content")) for name in names]
+        metadata = [(name, find(name, "Metadata")) for name in self.metadata_columns]
+        source = find(self.source_column, "Source") if self.source_column is not None else None
+        return content, metadata, source
+
+    def lazy_load_batches(self) -> Iterator[list[Document]]:
+        """Lists of up to `batch_size` rows' worth of documents"""
+        with open(self.file_path, newline="", encoding=self.encoding) as f:
+            reader = csv.reader(f, **self.csv_args)
+            header = next(reader, None)
+            if header is None:
+                return
+            content, metadata, source = self._positions(header)
+            # whole documents per batch, a document never spans two batches
+            rows_per_batch = max(self.batch_size // self.rows_per_document, 1) * self.rows_per_document
+            row = 0
+            while rows := list(islice(reader, rows_per_batch)):
+                batch = [
+                    self._document(rows[start:start + self.rows_per_document], row + start, content, metadata, source)
+                    for start in range(0, len(rows), self.rows_per_document)
+                ]
+                row += len(rows)
+                yield batch
+
+    def _document(self, rows: list[list[str]], first_row: int, content, metadata, source) -> Document:
+        # a short row (missing trailing fields) gives "None", like CSVLoader with csv.DictReader
+        text = "\n\n".join(
+            "\n".join(f"{name}: {values[i].strip() if i < len(values) else None}" for name, i in content)
+            for values in rows
+        )
+        if self.rows_per_document == 1:
+            values = rows[0]
+            meta = {name: values[i] if i < len(values) else None for name, i in metadata}
+        else:
+            meta = {name: [values[i] if i < len(values) else None for values in rows] for name, i in metadata}
+            meta["rows"] = len(rows)
+        meta = {"source": rows[0][source] if source is not None else self.file_path, "row": first_row} | meta
+        return Document(page_content=text, metadata=meta)
+
+    def lazy_load(self) -> Iterator[Document]:
+        for batch in self.lazy_load_batches():
+            yield from batch
@@ -0,0 +1,151 @@
+"""
+PDF loader that only parses the pages you ask for.
+
+`PyPDFLoader(path).load()` reads the whole file into memory and extracts the text
+of every page, and pypdf builds the list of all pages (plus all page labels, for
+every page) before the first one comes out. StreamingPDFLoader:
+
+- reads from the open file, nothing is loaded up front
+- walks the page tree itself and skips whole subtrees with the `/Count` of the
+  node, so page 0 of a 2000 page PDF is one object lookup, not 2000
+- extracts text only for the requested pages (`pages`, 0-based like
+  metadata["page"], and / or `max_pages`), one page at a time
+- drops pypdf's object cache after every page, so memory stays flat however
+  many pages are streamed
+
+Documents look like the ones of PyPDFLoader (mode="page"): same source, page,
+page_label and total_pages metadata.
+
+    loader = StreamingPDFLoader("./docs/sample.pdf", max_pages=1)
+    loader = StreamingPDFLoader("big.pdf", pages=range(10, 20))
+    loader = StreamingPDFLoader("big.pdf", pages=[0, 5, -1])    # -1 = last page
+"""
+
+from collections import deque
+from pathlib import PurePath
+from typing import Iterable, Iterator
+
+import pypdf
+from langchain_core.document_loaders import BaseLoader
+from langchain_core.documents import Document
+from pypdf.generic import ArrayObject, DictionaryObject, IndirectObject, NameObject
+
+# the public reader.page_labels builds the labels of every page and flattens the page tree,
+# the per-page lookup behind it is private, so fall back to PyPDFLoader's default label without it
+try:
+    from pypdf._page_labels import index2label
+except ImportError:
+    def index2label(reader: pypdf.PdfReader, index: int) -> str:
+        return str(index + 1)
+
+# page attributes a page takes from its parent /Pages node when it doesn't set them itself
+_INHERITABLE = tuple(NameObject(key) for key in ("/Resources", "/MediaBox", "/CropBox", "/Rotate"))
+_MAX_DEPTH = 64
+
+
+def _document_metadata(reader: pypdf.PdfReader, source: str, total_pages: int) -> dict:
+    metadata = {"producer": "PyPDF", "creator": "PyPDF", "creationdate": ""}
+    for key, value in (reader.metadata or {}).items():
+        metadata[key.lstrip("/").lower()] = value if isinstance(value, int) else str(value).strip()
+    metadata["source"] = source
+    metadata["total_pages"] = total_pages
+    return metadata
+
+
+def _select(pages: Iterable[int] | None, max_pages: int | None, total: int) -> list[int]:
+    """Requested page indexes in document order, negative ones count from the end"""
+    if pages is None:
+        selected = range(total)
+    else:
+        selected = sorted({p + total if p < 0 else p for p in pages} & set(range(total)))
+    return list(selected[:max_pages] if max_pages is not None else selected)
+
+
+def _is_pages(node: DictionaryObject) -> bool:
+    return node.get("/Type") == "/Pages" or "/Kids" in node
+
+
+def _page(reader: pypdf.PdfReader, kid, inherit: dict) -> pypdf.PageObject:
+    page = pypdf.PageObject(reader, kid if isinstance(kid, IndirectObject) else None)
+    page.update(kid.get_object())
+    for key, value in inherit.items():
+        page.setdefault(key, value)
+    return page
+
+
+def _walk(reader: pypdf.PdfReader, node: DictionaryObject, inherit: dict, first: int, targets: deque, depth: int = 0):
+    """Pages of `targets` (sorted, consumed from the left) below `node`, whose first page has index `first`"""
+    if depth > _MAX_DEPTH:
+        raise ValueError("PDF page tree is too deep (or has a cycle)")
+    inherit = inherit | {key: node[key] for key in _INHERITABLE if key in node}
+    kids = node.get("/Kids", ArrayObject()).get_object()
+    if node.get("/Count") == len(kids):
+        # as many kids as pages: every kid is a page, jump straight to it
+        while targets and targets[0] < first + len(kids):
+            kid = kids[targets[0] - first]
+            if _is_pages(kid.get_object()):
+                break
+            index = targets.popleft()
+            yield index, _page(reader, kid, inherit)
+        else:
+            return
+    position = first
+    for kid in kids:
+        while targets and targets[0] < position:
+            # broken /Count, the page doesn't exist where it should
+            targets.popleft()
+        if not targets:
+            return
+        kid_node = kid.get_object()
+        if _is_pages(kid_node):
+            count = kid_node.get("/Count", 0)
+            # a subtree without any requested page is skipped without opening its kids
+            if targets[0] < position + count:
+                yield from _walk(reader, kid_node, inherit, position, targets, depth + 1)
+            position += count
+        else:
+            if targets[0] == position:
+                yield targets.popleft(), _page(reader, kid, inherit)
+            position += 1
+
+
+def iter_pages(reader: pypdf.PdfReader, indexes: Iterable[int]) -> Iterator[tuple[int, pypdf.PageObject]]:
+    """(index, page) for the sorted `indexes`, without flattening the whole page tree"""
+    yield from _walk(reader, reader.root_object["/Pages"].get_object(), {}, 0, deque(indexes))
+
+
+class StreamingPDFLoader(BaseLoader):
+    """
+    loader = StreamingPDFLoader("./docs/sample.pdf", pages=range(0, 3), max_pages=2)
+    docs = loader.load()          # 2 documents, pages 0 and 1
+    """
+
+    def __init__(
+        self,
+        file_path: str | PurePath,
+        pages: Iterable[int] | None = None,
+        max_pages: int | None = None,
+        password: str | None = None,
+        extraction_mode: str = "plain",
+        extraction_kwargs: dict | None = None,
+    ):
+        self.file_path = str(file_path)
+        self.pages = pages
+        self.max_pages = max_pages
+        self.password = password
+        self.extraction_mode = extraction_mode
+        self.extraction_kwargs = extraction_kwargs or {}
+
+    def lazy_load(self) -> Iterator[Document]:
+        with open(self.file_path, "rb") as f:
+            reader = pypdf.PdfReader(f, password=self.password)
+            # the page count of the root node, len(reader.pages) would flatten the page tree
+            total = int(reader.root_object["/Pages"].get_object().get("/Count", 0))
+            metadata = _document_metadata(reader, self.file_path, total)
+            for index, page in iter_pages(reader, _select(self.pages, self.max_pages, total)):
+                text = page.extract_text(extraction_mode=self.extraction_mode, **self.extraction_kwargs)
+                label = index2label(reader, index)
+                del page
+                # parsed content streams stay in pypdf's cache otherwise, the page tree nodes are kept by _walk
+                reader.resolved_objects.clear()
+                yield Document(page_content=text.strip(), metadata=metadata | {"page": index, "page_label": label})
@@ -0,0 +1,219 @@
+"""
+Concurrent, rate limit aware batched embedding.
+
+`FAISS.from_documents(chunks, embeddings)` sends every chunk in one synchronous
+pass. BatchEmbedder wraps the embedding model instead: the input is split into
+batches bounded by size and tokens, batches run concurrently under asyncio,
+a token bucket keeps us under the provider's rate limit, throttled batches are
+retried with exponential backoff and the vectors come back in input order.
+
+    vector_store = FAISS.from_documents(chunks, BatchEmbedder(embeddings))
+"""
+
+import asyncio
+import random
+import threading
+import time
+
+from langchain_core.embeddings import Embeddings
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (about 4 characters per token for English text)"""
+    return len(text) // 4 + 1
+
+
+def is_rate_limit_error(exc: Exception) -> bool:
+    """Whether an exception from a provider SDK means we are being throttled"""
+    status = getattr(exc, "status_code", None) or getattr(
+        getattr(exc, "response", None), "status_code", None
+    )
+    if status == 429:
+        return True
+    name = type(exc).__name__.lower()
+    message = str(exc).lower()
+    return (
+        "ratelimit" in name
+        or "resourceexhausted" in name
+        or "429" in message
+        or "rate limit" in message
+        or "quota" in message
+    )
+
+
+def make_batches(
+    texts: list[str],
+    max_batch_size: int,
+    max_batch_tokens: int,
+    length_function=estimate_tokens,
+) -> list[list[int]]:
+    """
+    Group text positions into batches with at most `max_batch_size` texts and
+    `max_batch_tokens` tokens. A single text larger than the token limit gets its own batch.
+    """
+    batches, current, current_tokens = [], [], 0
+    for position, text in enumerate(texts):
+        tokens = length_function(text)
+        if current and (
+            len(current) >= max_batch_size or current_tokens + tokens > max_batch_tokens
+        ):
+            batches.append(current)
+            current, current_tokens = [], 0
+        current.append(position)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+class TokenBucket:
+    """Async token bucket: `rate` tokens are refilled per second up to `capacity`"""
+
+    def __init__(self, rate: float, capacity: float | None = None):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, amount: float = 1.0) -> None:
+        # a request bigger than the bucket can never fit, so it waits for a full bucket
+        amount = min(amount, self.capacity)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= amount:
+                    self._tokens -= amount
+                    return
+                await asyncio.sleep((amount - self._tokens) / self.rate)
+
+
+def _run_sync(coro):
+    """asyncio.run that also works inside Jupyter, where a loop is already running"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(coro)
+
+    result = {}
+
+    def runner():
+        try:
+            result["value"] = asyncio.run(coro)
+        except BaseException as exc:
+            result["error"] = exc
+
+    thread = threading.Thread(target=runner)
+    thread.start()
+    thread.join()
+    if "error" in result:
+        raise result["error"]
+    return result["value"]
+
+
+class BatchEmbedder(Embeddings):
+    """
+    Drop-in Embeddings wrapper that embeds documents in concurrent batches.
+
+    max_batch_size / max_batch_tokens: bounds of a single provider call
+    max_concurrency:                   batches in flight at the same time
+    tokens_per_second:                 token bucket limit on text tokens (None = unlimited)
+    requests_per_second:               token bucket limit on calls (None = unlimited)
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        max_batch_size: int = 64,
+        max_batch_tokens: int = 8000,
+        max_concurrency: int = 8,
+        tokens_per_second: float | None = None,
+        requests_per_second: float | None = None,
+        max_retries: int = 6,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        length_function=estimate_tokens,
+    ):
+        self.embeddings = embeddings
+        self.max_batch_size = max_batch_size
+        self.max_batch_tokens = max_batch_tokens
+        self.max_concurrency = max_concurrency
+        self.tokens_per_second = tokens_per_second
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.length_function = length_function
+
+        self.batches = 0
+        self.retries = 0
+
+    async def _embed_batch(self, texts, semaphore, token_bucket, request_bucket):
+        tokens = sum(self.length_function(text) for text in texts)
+        attempt = 0
+        while True:
+            async with semaphore:
+                if token_bucket:
+                    await token_bucket.acquire(tokens)
+                if request_bucket:
+                    await request_bucket.acquire(1)
+                try:
+                    vectors = await self.embeddings.aembed_documents(texts)
+                    self.batches += 1
+                    return vectors
+                except Exception as exc:
+                    if not is_rate_limit_error(exc) or attempt >= self.max_retries:
+                        raise
+                    retry_after = getattr(exc, "retry_after", None)
+
+            # back off outside the semaphore so other batches can use the slot
+            delay = min(self.backoff_max, self.backoff_base * 2**attempt)
+            delay = max(delay * random.uniform(0.5, 1.0), retry_after or 0)
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        token_bucket = (
+            TokenBucket(self.tokens_per_second, max(self.tokens_per_second, self.max_batch_tokens))
+            if self.tokens_per_second
+            else None
+        )
+        request_bucket = (
+            TokenBucket(self.requests_per_second) if self.requests_per_second else None
+        )
+
+        batches = make_batches(
+            texts, self.max_batch_size, self.max_batch_tokens, self.length_function
+        )
+        results = await asyncio.gather(
+            *(
+                self._embed_batch(
+                    [texts[i] for i in batch], semaphore, token_bucket, request_bucket
+                )
+                for batch in batches
+            )
+        )
+
+        # put every vector back at the position of its text
+        vectors = [None] * len(texts)
+        for batch, batch_vectors in zip(batches, results):
+            for position, vector in zip(batch, batch_vectors):
+                vectors[position] = vector
+        return vectors
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return _run_sync(self.aembed_documents(texts))
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embeddings.embed_query(text)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return await self.embeddings.aembed_query(text)
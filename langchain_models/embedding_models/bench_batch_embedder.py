@@ -0,0 +1,98 @@
+"""
+Benchmark: one synchronous pass vs BatchEmbedder, against a fake remote endpoint
+
+Run from the project root:
+    python -m langchain_models.embedding_models.bench_batch_embedder --texts 5000
+"""
+
+import argparse
+import time
+
+from langchain_models.embedding_models.batch_embedder import BatchEmbedder
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+
+
+def make_texts(count: int) -> list[str]:
+    words = "langchain vector store embedding chunk transcript query index retrieval".split()
+    return [
+        " ".join(words[(i + j) % len(words)] for j in range(40 + i % 60))
+        for i in range(count)
+    ]
+
+
+def timed(label, embedder, texts, model):
+    start = time.perf_counter()
+    vectors = embedder.embed_documents(texts)
+    elapsed = time.perf_counter() - start
+    assert len(vectors) == len(texts)
+    print(
+        f"{label:<38} {elapsed:7.2f}s  {len(texts) / elapsed:8,.0f} texts/s"
+        f"  calls={model.calls} throttled={model.throttled}"
+    )
+    return vectors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--texts", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.15, help="seconds per call")
+    parser.add_argument("--per-text", type=float, default=0.002, help="seconds per text")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    texts = make_texts(args.texts)
+
+    def model(**kwargs):
+        return HashEmbeddings(latency=args.latency, per_text_latency=args.per_text, **kwargs)
+
+    # what FAISS.from_documents does today: one call with every chunk
+    baseline_model = model()
+    baseline = timed("single synchronous pass", baseline_model, texts, baseline_model)
+
+    sequential_model = model()
+    timed(
+        "batched, concurrency=1",
+        BatchEmbedder(sequential_model, max_batch_size=64, max_concurrency=1),
+        texts,
+        sequential_model,
+    )
+
+    concurrent_model = model()
+    ordered = timed(
+        f"batched, concurrency={args.concurrency}",
+        BatchEmbedder(concurrent_model, max_batch_size=64, max_concurrency=args.concurrency),
+        texts,
+        concurrent_model,
+    )
+    # results must come back in the original order
+    assert ordered == baseline
+
+    throttled_model = model(throttle_every=7)
+    timed(
+        f"concurrency={args.concurrency}, every 7th call throttled",
+        BatchEmbedder(
+            throttled_model,
+            max_batch_size=64,
+            max_concurrency=args.concurrency,
+            backoff_base=0.05,
+        ),
+        texts,
+        throttled_model,
+    )
+
+    limited_model = model()
+    timed(
+        f"concurrency={args.concurrency}, 20 requests/s limit",
+        BatchEmbedder(
+            limited_model,
+            max_batch_size=64,
+            max_concurrency=args.concurrency,
+            requests_per_second=20,
+        ),
+        texts,
+        limited_model,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Benchmark: docs/sec of EncoderPool from 1 to N worker processes
+
+Uses the offline TinyEncoderEmbeddings stand-in by default, pass --model to use
+a real sentence-transformers model. Before timing, the pool output is checked
+against in-process embed_documents on shuffled lengths. Run from the project root:
+    python -m langchain_models.embedding_models.bench_encoder_pool --docs 4000 --max-workers 4
+"""
+
+import argparse
+import functools
+import os
+import random
+import tempfile
+import time
+
+import numpy as np
+
+from langchain_models.embedding_models.encoder_pool import EncoderPool, huggingface_factory
+from langchain_models.embedding_models.fake_embeddings import TinyEncoderEmbeddings
+
+
+def make_texts(count: int) -> list[str]:
+    words = "delhi capital india batman spiderman testing list cricket captain bowler".split()
+    # lengths vary a lot, like real chunks, so padding waste matters
+    return [" ".join(words[(i * 7 + j) % len(words)] for j in range(5 + (i * 37) % 200)) for i in range(count)]
+
+
+def counting_factory(log_path: str) -> TinyEncoderEmbeddings:
+    """TinyEncoderEmbeddings that appends the worker pid to log_path every time a model is built"""
+    with open(log_path, "a") as f:
+        f.write(f"{os.getpid()}\n")
+    return TinyEncoderEmbeddings()
+
+
+def check_against_in_process(processes: int = 2) -> None:
+    """Pool vectors must equal in-process vectors, in input order, with one model load per worker"""
+    texts = make_texts(500)
+    random.Random(0).shuffle(texts)
+    expected = np.asarray(TinyEncoderEmbeddings().embed_documents(texts))
+
+    with tempfile.TemporaryDirectory() as folder:
+        log_path = os.path.join(folder, "loads.txt")
+        # batch_size and sort_window that don't divide the input, so the last batch/window are partial
+        pool = EncoderPool(
+            functools.partial(counting_factory, log_path), processes=processes, batch_size=7, sort_window=45
+        )
+        with pool:
+            positions = [i for batch in pool._batches(texts) for i in batch]
+            first = np.asarray(pool.embed_documents(texts))
+            second = np.asarray(list(pool.iter_embed_documents(texts[::-1])))
+        with open(log_path) as f:
+            loads = f.read().split()
+
+    assert sorted(positions) == list(range(len(texts))), "length sorting lost or repeated texts"
+    assert positions != list(range(len(texts))), "texts were not reordered by length"
+    # batches are padded differently than the single in-process batch, so allow float noise
+    assert np.allclose(first, expected, atol=1e-5), "pool vectors differ from in-process vectors or order"
+    assert np.allclose(second, expected[::-1], atol=1e-5), "streamed vectors out of order"
+    assert len(loads) == len(set(loads)) <= processes, f"model loaded more than once per worker: {loads}"
+    print(f"pool == in-process on {len(texts)} shuffled texts, {len(loads)} model loads for {processes} workers")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=4000)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--model", default=None, help="e.g. sentence-transformers/all-MiniLM-L6-v2")
+    args = parser.parse_args()
+
+    factory = (
+        functools.partial(huggingface_factory, args.model) if args.model else TinyEncoderEmbeddings
+    )
+    check_against_in_process()
+    texts = make_texts(args.docs)
+
+    workers = 1
+    baseline = None
+    while workers <= args.max_workers:
+        for sort in (False, True):
+            if sort is False and workers != 1:
+                continue
+            # sort_window=1 means batches keep the input order (no length sorting)
+            pool = EncoderPool(factory, processes=workers, batch_size=args.batch_size, sort_window=None if sort else 1)
+            with pool:
+                pool.embed_documents(texts[: workers * args.batch_size])  # load models, warm up
+                start = time.perf_counter()
+                vectors = pool.embed_documents(texts)
+                elapsed = time.perf_counter() - start
+            assert len(vectors) == len(texts)
+            rate = len(texts) / elapsed
+            baseline = baseline or rate
+            label = f"workers={workers} {'sorted' if sort else 'unsorted'}"
+            print(f"{label:<26} {rate:8,.0f} docs/s  {rate / baseline:5.2f}x")
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: sort-everything scoring (document_similarity.py) vs SimilarityEngine
+
+Run from the project root:
+    python -m langchain_models.embedding_models.bench_similarity --docs 100000 --queries 1000
+"""
+
+import argparse
+import time
+
+import numpy as np
+from sklearn.metrics.pairwise import cosine_similarity
+
+from langchain_models.embedding_models.similarity_engine import SimilarityEngine
+
+
+def old_approach(queries, docs, k):
+    """One cosine_similarity call and a full sort of the corpus per query"""
+    results = []
+    for query in queries:
+        scores = cosine_similarity([query], docs)[0]
+        ranked = sorted(list(enumerate(scores)), key=lambda x: x[1])
+        results.append(ranked[::-1][:k])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--k", type=int, default=5)
+    # the old approach is very slow, so it is only timed on a sample of queries
+    parser.add_argument("--old-sample", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    docs = rng.standard_normal((args.docs, args.dim), dtype=np.float32)
+    queries = rng.standard_normal((args.queries, args.dim), dtype=np.float32)
+
+    start = time.perf_counter()
+    engine = SimilarityEngine(docs)
+    build = time.perf_counter() - start
+
+    start = time.perf_counter()
+    new_results = engine.search(queries, k=args.k)
+    new_time = time.perf_counter() - start
+
+    sample = queries[: args.old_sample]
+    start = time.perf_counter()
+    old_results = old_approach(sample, docs, args.k)
+    old_time = (time.perf_counter() - start) * len(queries) / len(sample)
+
+    # both approaches must agree on the best hits
+    for old, new in zip(old_results, new_results):
+        assert [i for i, _ in old] == [i for i, _ in new]
+
+    print(f"corpus={args.docs} x {args.dim}, queries={args.queries}, k={args.k}")
+    print(f"engine build (normalize once): {build:.3f}s")
+    print(f"old approach (extrapolated):  {old_time:.3f}s  {len(queries) / old_time:,.0f} q/s")
+    print(f"SimilarityEngine:              {new_time:.3f}s  {len(queries) / new_time:,.0f} q/s")
+    print(f"speedup: {old_time / new_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,7 @@
-import numpy as np
 from dotenv import load_dotenv
 from langchain_google_genai import GoogleGenerativeAIEmbeddings
-from sklearn.metrics.pairwise import cosine_similarity
+
+from langchain_models.embedding_models.similarity_engine import SimilarityEngine
 
 load_dotenv()
 
@@ -26,15 +26,15 @@ query_embeddings = embedding.embed_query(query)
 
 
 # now check similarity between query and document embedding
+# the engine normalizes the documents once and keeps them in a single float32 matrix
+engine = SimilarityEngine(doc_embeddings)
 
-scores = cosine_similarity([query_embeddings], doc_embeddings)[0]
-
-# enumerate to attach a number with each output and then if we sort then positioning will still be available
-# sorting based on score value not on index
-print(sorted(list(enumerate(scores)), key=lambda x: x[1]))
+# search returns (index, score) pairs for every query, best first
+# index is still attached to each score so we can show the corresponding text
+print(engine.search([query_embeddings], k=len(documents))[0])
 
-# now extract the highest
-index, high_score = sorted(list(enumerate(scores)), key=lambda x: x[1])[-1]
+# now extract the highest (top-k uses partial selection, no full sort of the corpus)
+index, high_score = engine.search([query_embeddings], k=1)[0][0]
 
 
 # Now print the result
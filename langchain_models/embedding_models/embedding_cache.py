@@ -0,0 +1,200 @@
+"""
+Persistent, content-addressed cache for any LangChain embedding model.
+
+Every vector is stored in SQLite as a float32 blob keyed on
+(model name, dimensions, query/document, sha256 of the text), so
+GoogleGenerativeAIEmbeddings, OpenAIEmbeddings and HuggingFaceEmbeddings
+can all share one cache file. Only cache misses are sent to the provider.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# sqlite has a limit on the number of "?" in a single statement
+_LOOKUP_CHUNK = 500
+
+
+def model_identity(embeddings: Embeddings) -> tuple[str, int | None]:
+    """Best effort (model name, dimensions) of a LangChain embedding object"""
+    name = None
+    for attr in ("model", "model_name", "repo_id"):
+        name = getattr(embeddings, attr, None)
+        if name:
+            break
+    name = f"{type(embeddings).__name__}:{name or 'default'}"
+    return name, getattr(embeddings, "dimensions", None)
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Wrap an embedding model with a disk backed LRU cache.
+
+    embedding = CachedEmbeddings(OpenAIEmbeddings(model="text-embedding-3-large"))
+    embedding.embed_documents(texts)  # only unseen texts are sent to OpenAI
+    embedding.stats()                 # {"hits": ..., "misses": ..., ...}
+    """
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        path: str = "embedding_cache.sqlite",
+        max_bytes: int = 512 * 1024 * 1024,
+        namespace: str | None = None,
+    ):
+        self.embeddings = embeddings
+        self.path = path
+        # size cap on the stored vectors, least recently used rows are evicted first
+        self.max_bytes = max_bytes
+
+        model, dimensions = model_identity(embeddings)
+        self.namespace = namespace or f"{model}|{dimensions}"
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            ) WITHOUT ROWID"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_last_used ON embeddings(last_used)"
+        )
+        self._conn.commit()
+        self._bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings"
+        ).fetchone()[0]
+
+    def _key(self, kind: str, text: str) -> bytes:
+        raw = f"{self.namespace}\0{kind}\0{text}".encode("utf-8")
+        return hashlib.sha256(raw).digest()
+
+    def _lookup(self, keys: list[bytes]) -> dict[bytes, list[float]]:
+        found = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            for start in range(0, len(unique), _LOOKUP_CHUNK):
+                chunk = unique[start : start + _LOOKUP_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", chunk
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+
+            # touch the hits so they move to the end of the LRU order
+            if found:
+                now = time.time()
+                self._conn.executemany(
+                    "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                    [(now, key) for key in found],
+                )
+                self._conn.commit()
+        return found
+
+    def _store(self, items: dict[bytes, list[float]]) -> None:
+        now = time.time()
+        rows = [
+            (key, np.asarray(vector, dtype=np.float32).tobytes(), now)
+            for key, vector in items.items()
+        ]
+        with self._lock:
+            # a key stored by another thread (or process) in the meantime gets replaced,
+            # only the difference to its old size counts
+            replaced = 0
+            keys = [key for key, _, _ in rows]
+            for start in range(0, len(keys), _LOOKUP_CHUNK):
+                chunk = keys[start : start + _LOOKUP_CHUNK]
+                marks = ",".join("?" * len(chunk))
+                replaced += self._conn.execute(
+                    "SELECT COALESCE(SUM(LENGTH(vector)), 0) FROM embeddings "
+                    f"WHERE key IN ({marks})",
+                    chunk,
+                ).fetchone()[0]
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector, last_used) VALUES (?, ?, ?)",
+                rows,
+            )
+            self._bytes += sum(len(blob) for _, blob, _ in rows) - replaced
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self) -> None:
+        if self._bytes <= self.max_bytes:
+            return
+        victims, freed = [], 0
+        cursor = self._conn.execute(
+            "SELECT key, LENGTH(vector) FROM embeddings ORDER BY last_used"
+        )
+        for key, size in cursor:
+            victims.append((key,))
+            freed += size
+            if self._bytes - freed <= self.max_bytes:
+                break
+        self._conn.executemany("DELETE FROM embeddings WHERE key = ?", victims)
+        self._bytes -= freed
+        self.evictions += len(victims)
+
+    def _embed(self, kind: str, texts: list[str], embed_fn) -> list[list[float]]:
+        keys = [self._key(kind, text) for text in texts]
+        found = self._lookup(keys)
+
+        # send every distinct missing text to the provider exactly once
+        missing = {}
+        for key, text in zip(keys, texts):
+            if key not in found and key not in missing:
+                missing[key] = text
+        # a text repeated inside the batch is only paid for once, so it counts as a hit
+        with self._lock:
+            self.hits += len(keys) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            vectors = embed_fn(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self._store(fresh)
+            found.update(fresh)
+
+        return [list(found[key]) for key in keys]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed("document", texts, self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        # some providers embed queries differently, so they get their own keys
+        return self._embed(
+            "query", [text], lambda texts: [self.embeddings.embed_query(texts[0])]
+        )[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            hits, misses = self.hits, self.misses
+            evictions, stored = self.evictions, self._bytes
+        total = hits + misses
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / total if total else 0.0,
+            "evictions": evictions,
+            "stored_bytes": stored,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM embeddings")
+            self._conn.commit()
+            self._bytes = 0
+
+    def close(self) -> None:
+        self._conn.close()
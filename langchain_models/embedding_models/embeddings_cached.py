@@ -0,0 +1,26 @@
+"""
+Example for caching embeddings on disk so re-runs don't embed the same text again
+"""
+
+from dotenv import load_dotenv
+from langchain_huggingface import HuggingFaceEmbeddings
+
+from langchain_models.embedding_models.embedding_cache import CachedEmbeddings
+
+load_dotenv()
+
+# works the same for OpenAIEmbeddings or GoogleGenerativeAIEmbeddings
+embedding = CachedEmbeddings(
+    HuggingFaceEmbeddings(model_name="sentence-transformers/all-MiniLM-L6-v2"),
+    path="embedding_cache.sqlite",
+    max_bytes=64 * 1024 * 1024,  # least recently used vectors are evicted above 64MB
+)
+
+documents = ["This is the testing list", "I am Batman", "He is spiderMan"]
+
+# first run: all misses, second run (or re-running the script): all hits
+vectors = embedding.embed_documents(documents)
+vectors = embedding.embed_documents(documents + ["Delhi is the capital of India"])
+
+print(len(vectors))
+print(embedding.stats())
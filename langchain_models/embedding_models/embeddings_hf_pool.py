@@ -0,0 +1,21 @@
+"""
+Example for encoding many documents with a local HuggingFace model on all CPU cores
+
+Run from the project root:
+    python -m langchain_models.embedding_models.embeddings_hf_pool
+"""
+
+from langchain_models.embedding_models.encoder_pool import pool_for
+
+documents = ["This is the testing list", "I am Batman", "He is spiderMan"] * 1000
+
+# worker processes use "spawn", so the pool has to be created under the main guard
+if __name__ == "__main__":
+    with pool_for("sentence-transformers/all-MiniLM-L6-v2", processes=4) as embedding:
+        vectors = embedding.embed_documents(documents)
+
+        # or stream the vectors (in input order) while later batches are still encoding
+        for i, vector in enumerate(embedding.iter_embed_documents(documents[:10])):
+            print(i, vector[:3])
+
+    print(len(vectors))
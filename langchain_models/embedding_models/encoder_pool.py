@@ -0,0 +1,147 @@
+"""
+Multi-process encoder pool for local embedding models (HuggingFaceEmbeddings).
+
+`HuggingFaceEmbeddings.embed_documents` runs in one process. EncoderPool shards
+the input across worker processes instead:
+
+- every worker loads the model once (pool initializer)
+- texts are sorted by length inside a window, so batches hold similar lengths
+  and the model wastes less time on padding
+- vectors are streamed back in the original order while later batches still run
+"""
+
+import functools
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# model of the current worker process, loaded once by _init_worker
+_worker_model = None
+
+
+def _init_worker(model_factory: Callable[[], Embeddings], threads: int) -> None:
+    global _worker_model
+    # N workers x all cores each would oversubscribe the CPU
+    try:
+        from threadpoolctl import threadpool_limits
+
+        threadpool_limits(threads)
+    except ImportError:
+        pass
+    try:
+        import torch
+
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+    _worker_model = model_factory()
+
+
+def _encode(texts: list[str]) -> np.ndarray:
+    return np.asarray(_worker_model.embed_documents(texts), dtype=np.float32)
+
+
+def huggingface_factory(model_name: str = "sentence-transformers/all-MiniLM-L6-v2", **kwargs):
+    """Picklable factory that builds HuggingFaceEmbeddings inside a worker"""
+    from langchain_huggingface import HuggingFaceEmbeddings
+
+    return HuggingFaceEmbeddings(model_name=model_name, **kwargs)
+
+
+class EncoderPool(Embeddings):
+    """
+    with pool_for("sentence-transformers/all-MiniLM-L6-v2", processes=4) as embedding:
+        vectors = embedding.embed_documents(texts)
+
+    model_factory must be picklable (a module level function or functools.partial).
+    """
+
+    def __init__(
+        self,
+        model_factory: Callable[[], Embeddings] = huggingface_factory,
+        processes: int | None = None,
+        batch_size: int = 32,
+        sort_window: int | None = None,
+        threads_per_worker: int = 1,
+        max_in_flight: int | None = None,
+    ):
+        self.model_factory = model_factory
+        self.processes = processes or os.cpu_count() or 1
+        self.batch_size = batch_size
+        # texts are only reordered inside a window, so results can stream out early
+        self.sort_window = sort_window or batch_size * self.processes * 8
+        self.threads_per_worker = threads_per_worker
+        self.max_in_flight = max_in_flight or self.processes * 2
+        self._executor = None
+
+    def start(self) -> "EncoderPool":
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                # spawn: torch and BLAS thread pools are not fork safe
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_factory, self.threads_per_worker),
+            )
+        return self
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def __enter__(self) -> "EncoderPool":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _batches(self, texts: list[str]) -> Iterator[list[int]]:
+        for start in range(0, len(texts), self.sort_window):
+            window = range(start, min(start + self.sort_window, len(texts)))
+            window = sorted(window, key=lambda i: len(texts[i]), reverse=True)
+            for offset in range(0, len(window), self.batch_size):
+                yield window[offset : offset + self.batch_size]
+
+    def iter_embed_documents(self, texts: list[str]) -> Iterator[list[float]]:
+        """Yield one vector per text, in input order, as soon as it is ready"""
+        self.start()
+        pending = deque()
+        ready: dict[int, np.ndarray] = {}
+        next_position = 0
+
+        def collect_oldest():
+            positions, future = pending.popleft()
+            for position, vector in zip(positions, future.result()):
+                ready[position] = vector
+
+        for positions in self._batches(texts):
+            if len(pending) >= self.max_in_flight:
+                collect_oldest()
+                while next_position in ready:
+                    yield ready.pop(next_position).tolist()
+                    next_position += 1
+            batch = [texts[i] for i in positions]
+            pending.append((positions, self._executor.submit(_encode, batch)))
+
+        while pending:
+            collect_oldest()
+            while next_position in ready:
+                yield ready.pop(next_position).tolist()
+                next_position += 1
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return list(self.iter_embed_documents(texts))
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+
+def pool_for(model_name: str, processes: int | None = None, **kwargs) -> EncoderPool:
+    """EncoderPool running HuggingFaceEmbeddings(model_name=...) in every worker"""
+    return EncoderPool(functools.partial(huggingface_factory, model_name), processes, **kwargs)
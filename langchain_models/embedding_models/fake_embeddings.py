@@ -0,0 +1,155 @@
+"""
+Deterministic offline embedding model for tests and benchmarks.
+
+Texts are turned into hashed bag-of-words vectors, so texts sharing words are
+similar (good enough to check retrieval quality) and no network is needed.
+Latency and rate limit errors can be injected to imitate a remote provider.
+"""
+
+import asyncio
+import hashlib
+import re
+import threading
+import time
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_WORD = re.compile(r"\w+")
+
+
+class FakeRateLimitError(Exception):
+    """Raised by HashEmbeddings to imitate an HTTP 429 from a provider"""
+
+    status_code = 429
+
+    def __init__(self, retry_after: float | None = None):
+        super().__init__("429 Too Many Requests (rate limit exceeded)")
+        self.retry_after = retry_after
+
+
+def _bucket(token: str, dim: int) -> tuple[int, float]:
+    digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    # lowest bit decides the sign so collisions cancel out instead of piling up
+    return (value >> 1) % dim, 1.0 if value & 1 else -1.0
+
+
+class HashEmbeddings(Embeddings):
+    """
+    Offline stand-in for GoogleGenerativeAIEmbeddings / OpenAIEmbeddings.
+
+    latency:           seconds added to every call (network round trip)
+    per_text_latency:  seconds added for every text in a call (server side work)
+    throttle_every:    every n-th call raises FakeRateLimitError
+    """
+
+    def __init__(
+        self,
+        dim: int = 256,
+        latency: float = 0.0,
+        per_text_latency: float = 0.0,
+        throttle_every: int | None = None,
+        model: str = "hash-embeddings",
+    ):
+        self.dim = dim
+        self.dimensions = dim
+        self.model = model
+        self.latency = latency
+        self.per_text_latency = per_text_latency
+        self.throttle_every = throttle_every
+
+        # counters so callers can check how much work reached the "provider"
+        self.calls = 0
+        self.texts_embedded = 0
+        self.throttled = 0
+        self._lock = threading.Lock()
+
+    def _vector(self, text: str) -> list[float]:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in _WORD.findall(text.lower()):
+            index, sign = _bucket(token, self.dim)
+            vector[index] += sign
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector /= norm
+        return vector.tolist()
+
+    def _start_call(self, count: int) -> float:
+        with self._lock:
+            self.calls += 1
+            if self.throttle_every and self.calls % self.throttle_every == 0:
+                self.throttled += 1
+                raise FakeRateLimitError(retry_after=self.latency)
+            self.texts_embedded += count
+        return self.latency + self.per_text_latency * count
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        delay = self._start_call(len(texts))
+        if delay:
+            time.sleep(delay)
+        return [self._vector(text) for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        delay = self._start_call(len(texts))
+        if delay:
+            await asyncio.sleep(delay)
+        return [self._vector(text) for text in texts]
+
+    async def aembed_query(self, text: str) -> list[float]:
+        return (await self.aembed_documents([text]))[0]
+
+
+class TinyEncoderEmbeddings(HashEmbeddings):
+    """
+    CPU bound offline stand-in for a local sentence-transformers model.
+
+    Like a transformer, every batch is padded to its longest text and a few dense
+    layers run over every (padded) token, so the cost grows with padding waste.
+    """
+
+    def __init__(self, dim: int = 384, hidden: int = 256, layers: int = 2, max_tokens: int = 256):
+        super().__init__(dim=dim, model="tiny-encoder")
+        self.hidden = hidden
+        self.max_tokens = max_tokens
+        rng = np.random.default_rng(42)
+        self._token_table = rng.standard_normal((4096, hidden), dtype=np.float32)
+        self._weights = [
+            rng.standard_normal((hidden, hidden), dtype=np.float32) / np.sqrt(hidden)
+            for _ in range(layers)
+        ]
+        self._output = rng.standard_normal((hidden, dim), dtype=np.float32) / np.sqrt(hidden)
+        self.padded_tokens = 0
+
+    def _token_ids(self, text: str) -> list[int]:
+        tokens = _WORD.findall(text.lower())[: self.max_tokens] or [""]
+        return [_bucket(token, len(self._token_table))[0] for token in tokens]
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        self._start_call(len(texts))
+        ids = [self._token_ids(text) for text in texts]
+        width = max(len(row) for row in ids)
+        self.padded_tokens += width * len(ids)
+
+        # (batch, width) token ids padded with 0 plus a mask of the real tokens
+        padded = np.zeros((len(ids), width), dtype=np.int64)
+        mask = np.zeros((len(ids), width, 1), dtype=np.float32)
+        for row, token_ids in enumerate(ids):
+            padded[row, : len(token_ids)] = token_ids
+            mask[row, : len(token_ids)] = 1.0
+
+        hidden = self._token_table[padded]
+        for weight in self._weights:
+            hidden = np.tanh(hidden @ weight)
+        pooled = (hidden * mask).sum(axis=1) / mask.sum(axis=1)
+        vectors = pooled @ self._output
+        vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors.tolist()
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self.embed_documents(texts)
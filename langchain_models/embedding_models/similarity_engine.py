@@ -0,0 +1,200 @@
+"""
+Reusable cosine similarity engine.
+
+Document vectors are normalized once and kept in one contiguous float32 matrix,
+so scoring a whole batch of queries is a single matrix product and the top-k
+is picked with a partial selection (argpartition) instead of sorting every score.
+"""
+
+import copy
+import json
+import os
+
+import numpy as np
+
+
+def normalize_rows(vectors) -> np.ndarray:
+    """Return a C-contiguous float32 copy of `vectors` with unit length rows"""
+    matrix = np.array(vectors, dtype=np.float32, ndmin=2, copy=True, order="C")
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    # zero vectors stay zero instead of turning into nan
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
+
+
+def top_k(scores: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Pick the k highest scores of every row of a (queries x docs) score matrix.
+
+    argpartition finds the k best in O(n), only those k are then sorted.
+    Returns (indices, scores) both shaped (queries, k), best first.
+    """
+    scores = np.atleast_2d(scores)
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        empty = np.empty((scores.shape[0], 0))
+        return empty.astype(np.int64), empty.astype(np.float32)
+
+    if k < scores.shape[1]:
+        part = np.argpartition(scores, -k, axis=1)[:, -k:]
+    else:
+        part = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    part_scores = np.take_along_axis(scores, part, axis=1)
+
+    # sort only the k selected items (descending)
+    order = np.argsort(-part_scores, axis=1, kind="stable")
+    indices = np.take_along_axis(part, order, axis=1)
+    return indices, np.take_along_axis(part_scores, order, axis=1)
+
+
+def chunked_top_k(score_chunk, total: int, k: int, chunk_size: int = 65536):
+    """
+    Top-k over `total` rows without materializing every score at once.
+
+    `score_chunk(start, stop)` returns the (queries x rows) scores of rows start..stop,
+    the per chunk winners are merged so memory stays bounded by the chunk size.
+    """
+    best_idx = best_scores = None
+    for start in range(0, total, chunk_size):
+        stop = min(start + chunk_size, total)
+        idx, scores = top_k(score_chunk(start, stop), k)
+        idx = idx + start
+        if best_idx is not None:
+            idx = np.concatenate([best_idx, idx], axis=1)
+            scores = np.concatenate([best_scores, scores], axis=1)
+            order, scores = top_k(scores, k)
+            idx = np.take_along_axis(idx, order, axis=1)
+        best_idx, best_scores = idx, scores
+    return best_idx, best_scores
+
+
+class SimilarityEngine:
+    """
+    Exact cosine similarity search over pre-normalized document vectors.
+
+    engine = SimilarityEngine(doc_embeddings)
+    engine.search(query_embeddings, k=3)  # [[(index, score), ...], ...]
+    """
+
+    # name written to index.json, used to pick the class when loading from disk
+    kind = "flat"
+
+    def __init__(self, vectors=None, query_batch_size: int = 1024):
+        # queries are scored in chunks so the score matrix stays bounded in memory
+        self.query_batch_size = query_batch_size
+        self._matrix = np.empty((0, 0), dtype=np.float32)
+        if vectors is not None and len(vectors):
+            self.add(vectors)
+
+    @classmethod
+    def from_normalized(cls, matrix: np.ndarray, query_batch_size: int = 1024):
+        """Wrap an already normalized float32 matrix (e.g. a np.memmap) without copying"""
+        engine = cls(query_batch_size=query_batch_size)
+        engine._matrix = matrix
+        return engine
+
+    def __len__(self) -> int:
+        return self._matrix.shape[0]
+
+    def copy(self):
+        """
+        Independent copy that shares the current matrix.
+        add / remove replace the matrix instead of writing into it, so nothing is copied here.
+        """
+        return copy.copy(self)
+
+    def params(self) -> dict:
+        """Constructor arguments, saved next to the vectors"""
+        return {"query_batch_size": self.query_batch_size}
+
+    def save(self, folder: str) -> None:
+        """Write the normalized matrix as vectors.npy (a flat float32 file) + index.json"""
+        np.save(os.path.join(folder, "vectors.npy"), self._matrix)
+        with open(os.path.join(folder, "index.json"), "w") as f:
+            json.dump({"kind": self.kind, "params": self.params()}, f)
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True):
+        """
+        Open a saved index. With mmap=True the vectors are not read into memory,
+        pages are loaded by the OS when a search touches them (and shared between processes).
+        Adding or removing rows later makes a private in-memory copy.
+        """
+        with open(os.path.join(folder, "index.json")) as f:
+            config = json.load(f)
+        index = cls(**config["params"])
+        index._matrix = np.load(os.path.join(folder, "vectors.npy"), mmap_mode="r" if mmap else None)
+        return index
+
+    @property
+    def dim(self) -> int:
+        return self._matrix.shape[1]
+
+    @property
+    def matrix(self) -> np.ndarray:
+        """Normalized document vectors, one row per document"""
+        return self._matrix
+
+    def add(self, vectors) -> None:
+        """Append document vectors, row ids continue from the current size"""
+        new_rows = normalize_rows(vectors)
+        if len(self) == 0:
+            self._matrix = new_rows
+        else:
+            if new_rows.shape[1] != self.dim:
+                raise ValueError(
+                    f"Expected vectors of dimension {self.dim}, got {new_rows.shape[1]}"
+                )
+            self._matrix = np.concatenate([self._matrix, new_rows])
+
+    def remove(self, rows) -> None:
+        """Drop rows, the rows after them move up to keep the matrix contiguous"""
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(rows, dtype=np.int64)] = False
+        self._matrix = np.ascontiguousarray(self._matrix[keep])
+
+    def scores(self, queries) -> np.ndarray:
+        """Cosine similarity of every query against every document"""
+        return normalize_rows(queries) @ self._matrix.T
+
+    def vectors(self, rows) -> np.ndarray:
+        """Normalized vectors of the given rows"""
+        return self._matrix[np.asarray(rows, dtype=np.int64)]
+
+    def score_rows(self, queries, rows) -> np.ndarray:
+        """Cosine similarity of every query against the given rows only"""
+        return normalize_rows(queries) @ self._matrix[rows].T
+
+    def search_arrays(self, queries, k: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        """Top-k for a batch of queries as (indices, scores) arrays of shape (queries, k)"""
+        queries = normalize_rows(queries)
+        if len(self) == 0 or queries.shape[0] == 0:
+            empty = np.empty((queries.shape[0], 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        all_indices, all_scores = [], []
+        for start in range(0, queries.shape[0], self.query_batch_size):
+            batch = queries[start : start + self.query_batch_size]
+            indices, scores = top_k(batch @ self._matrix.T, k)
+            all_indices.append(indices)
+            all_scores.append(scores)
+        return np.concatenate(all_indices), np.concatenate(all_scores)
+
+    def search(self, queries, k: int = 4) -> list[list[tuple[int, float]]]:
+        """Top-k (index, score) pairs for every query, best first"""
+        indices, scores = self.search_arrays(queries, k)
+        return [
+            [(int(i), float(s)) for i, s in zip(row_idx, row_scores)]
+            for row_idx, row_scores in zip(indices, scores)
+        ]
+
+
+def recall_at_k(exact_indices, approx_indices) -> float:
+    """Fraction of the exact top-k neighbours that an approximate search also returned"""
+    found = total = 0
+    for exact, approx in zip(exact_indices, approx_indices):
+        exact = set(int(i) for i in exact)
+        found += len(exact & set(int(i) for i in approx))
+        total += len(exact)
+    return found / total if total else 1.0
@@ -0,0 +1,102 @@
+"""
+Benchmark: CachedRetriever in front of a slow source retriever
+
+By default the source is an offline fake with `--latency` seconds per call and
+pages of `--page-chars` characters (Wikipedia pages are often 50-200k), so it
+runs without network. With --live the real WikipediaRetriever is used and its
+results are recorded into --fixtures, a later run with --replay reads only them.
+
+Run from the project root:
+    python -m retrievers.bench_cached_retriever --latency 0.6 --concurrency 16
+    python -m retrievers.bench_cached_retriever --live --fixtures fixtures/wikipedia
+    python -m retrievers.bench_cached_retriever --replay --fixtures fixtures/wikipedia
+"""
+
+import argparse
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from retrievers.cached_retriever import CachedRetriever
+
+QUERIES = ["One Piece", "Naruto", "Photosynthesis", "Grand Canyon", "Black hole"]
+
+
+class FakeWikipediaRetriever(BaseRetriever):
+    """Sleeps like an API round trip and returns top_k_results long pages"""
+
+    latency: float = 0.6
+    page_chars: int = 100_000
+    top_k_results: int = 2
+    calls: int = 0
+
+    def _get_relevant_documents(self, query: str, *, run_manager) -> list[Document]:
+        self.calls += 1
+        time.sleep(self.latency)
+        return [
+            Document(
+                page_content=(f"{query} page {i}. " * self.page_chars)[: self.page_chars],
+                metadata={"title": f"{query} ({i})", "source": f"https://en.wikipedia.org/wiki/{query.replace(' ', '_')}_{i}"},
+            )
+            for i in range(self.top_k_results)
+        ]
+
+
+def timed(function) -> float:
+    start = time.perf_counter()
+    function()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=0.6)
+    parser.add_argument("--page-chars", type=int, default=100_000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--max-content-chars", type=int, default=4000)
+    parser.add_argument("--fixtures", default=None, help="fixture folder, default a temporary one")
+    parser.add_argument("--live", action="store_true", help="record the real WikipediaRetriever")
+    parser.add_argument("--replay", action="store_true", help="only read the fixtures, no source calls")
+    args = parser.parse_args()
+
+    fixtures = args.fixtures or tempfile.mkdtemp()
+    if args.live:
+        from langchain_community.retrievers import WikipediaRetriever
+
+        source = WikipediaRetriever(top_k_results=2)
+    else:
+        source = FakeWikipediaRetriever(latency=args.latency, page_chars=args.page_chars)
+
+    if args.replay:
+        replay = CachedRetriever(retriever=source, mode="replay", fixtures=fixtures)
+        seconds = timed(lambda: [replay.invoke(q) for q in QUERIES])
+        print(f"replay {len(QUERIES)} queries from {fixtures}: {seconds * 1000:.1f}ms, source calls: 0")
+        return
+
+    cached = CachedRetriever(retriever=source, fixtures=fixtures, max_content_chars=args.max_content_chars)
+    uncached = timed(lambda: [source.invoke(q) for q in QUERIES])
+    cold = timed(lambda: [cached.invoke(q) for q in QUERIES])
+    warm = timed(lambda: [cached.invoke(q.lower()) for q in QUERIES])
+    print(f"{len(QUERIES)} queries   source: {uncached:.2f}s   cold cache: {cold:.2f}s   warm cache: {warm * 1000:.2f}ms")
+
+    # a burst of identical queries on an empty cache: single-flight fetches once
+    burst = CachedRetriever(retriever=source, max_content_chars=args.max_content_chars)
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        seconds = timed(lambda: list(pool.map(burst.invoke, ["One Piece"] * args.concurrency)))
+    print(f"{args.concurrency} concurrent identical queries: {seconds:.2f}s, source fetches: {burst.fetches}")
+
+    size = sum(len(doc.page_content) for q in QUERIES for doc in cached.invoke(q))
+    print(f"cached content: {size / 1e3:.0f}k chars (cap {args.max_content_chars} per page), fixtures in {fixtures}")
+    replay = CachedRetriever(retriever=source, mode="replay", fixtures=fixtures)
+    seconds = timed(lambda: [replay.invoke(q) for q in QUERIES])
+    print(f"replay from fixtures: {seconds * 1000:.1f}ms, source fetches of the cached retriever: {cached.fetches}")
+    if args.fixtures is None:
+        shutil.rmtree(fixtures)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark: LLMChainExtractor vs EmbeddingSentenceCompressor on the photosynthesis example
+
+The LLM extractor is the reference: its kept sentences are the "gold" context and
+the embedding compressor is scored with sentence precision / recall against it,
+plus the time per query and the number of LLM / embedding calls.
+
+Offline by default: the LLM is a FakeListChatModel returning what the extractor
+would return (with --llm-latency per call) and the embeddings are HashEmbeddings,
+which only see word overlap. Thresholds depend on the model, the default 0.18 is
+tuned for HashEmbeddings; with a sentence-transformers model try 0.4 - 0.5:
+
+Run from the project root:
+    python -m retrievers.bench_compressor --llm-latency 0.8
+    python -m retrievers.bench_compressor --hf-model sentence-transformers/all-MiniLM-L6-v2 --threshold 0.45
+"""
+
+import argparse
+import time
+
+from langchain.retrievers.document_compressors import LLMChainExtractor
+from langchain_core.documents import Document
+from langchain_core.language_models import FakeListChatModel
+
+from langchain_models.embedding_models.batch_embedder import estimate_tokens
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+from retrievers.sentence_compressor import EmbeddingSentenceCompressor, split_sentences
+
+QUERY = "What is photosynthesis"
+DOCS = [
+    Document(
+        page_content=(
+            "The Grand Canyon is one of the most visited natural wonders in the world.\n"
+            "Photosynthesis is the process by which green plants convert sunlight into energy.\n"
+            "Millions of tourists travel to see it every year. The rocks date back millions of years."
+        ),
+        metadata={"source": "Doc1"},
+    ),
+    Document(
+        page_content=(
+            "In medieval Europe, castles were built primarily for defense.\n"
+            "The chlorophyll in plant cells captures sunlight during photosynthesis.\n"
+            "Knights wore armor made of metal. Siege weapons were often used to breach castle walls."
+        ),
+        metadata={"source": "Doc2"},
+    ),
+    Document(
+        page_content=(
+            "Basketball was invented by Dr. James Naismith in the late 19th century.\n"
+            "It was originally played with a soccer ball and peach baskets. NBA is now a global league."
+        ),
+        metadata={"source": "Doc3"},
+    ),
+    Document(
+        page_content=(
+            "The history of cinema began in the late 1800s. Silent films were the earliest form.\n"
+            "Thomas Edison was among the pioneers. Photosynthesis does not occur in animal cells.\n"
+            "Modern filmmaking involves complex CGI and sound design."
+        ),
+        metadata={"source": "Doc4"},
+    ),
+]
+# what the LLM extractor returns for every document, NO_OUTPUT drops the document
+EXTRACTS = [
+    "Photosynthesis is the process by which green plants convert sunlight into energy.",
+    "The chlorophyll in plant cells captures sunlight during photosynthesis.",
+    "NO_OUTPUT",
+    "Photosynthesis does not occur in animal cells.",
+]
+
+
+def kept_sentences(docs: list[Document]) -> set[tuple[str, str]]:
+    return {(doc.metadata["source"], sentence) for doc in docs for sentence in split_sentences(doc.page_content)}
+
+
+def timed(compressor, repeat: int) -> tuple[float, list[Document]]:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        docs = list(compressor.compress_documents(DOCS, QUERY))
+    return (time.perf_counter() - start) / repeat, docs
+
+
+def report(name: str, seconds: float, docs: list[Document], gold: set, calls: str):
+    kept = kept_sentences(docs)
+    hits = len(kept & gold)
+    precision = hits / len(kept) if kept else 0.0
+    recall = hits / len(gold) if gold else 1.0
+    tokens = sum(estimate_tokens(doc.page_content) for doc in docs)
+    print(
+        f"{name:<22} {seconds * 1000:9.1f}ms {calls:>10} {len(kept):>5} {tokens:>7}"
+        f" {precision:10.2f} {recall:7.2f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--threshold", type=float, default=0.18)
+    parser.add_argument("--token-budget", type=int, default=40)
+    parser.add_argument("--hf-model", default=None, help="use a local sentence-transformers model instead of HashEmbeddings")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--show-scores", action="store_true")
+    args = parser.parse_args()
+
+    if args.hf_model:
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        embedding = HuggingFaceEmbeddings(model_name=args.hf_model)
+    else:
+        embedding = HashEmbeddings(dim=512)
+
+    llm = FakeListChatModel(responses=EXTRACTS, sleep=args.llm_latency)
+    extractor = LLMChainExtractor.from_llm(llm)
+    llm_seconds, llm_docs = timed(extractor, args.repeat)
+    gold = kept_sentences(llm_docs)
+
+    by_threshold = EmbeddingSentenceCompressor(embeddings=embedding, similarity_threshold=args.threshold)
+    by_budget = EmbeddingSentenceCompressor(
+        embeddings=embedding, similarity_threshold=None, token_budget=args.token_budget
+    )
+    if args.show_scores:
+        for doc, (sentences, scores) in zip(DOCS, by_threshold.score_sentences(DOCS, QUERY)):
+            for sentence, score in zip(sentences, scores):
+                print(f"{score:6.3f}  {doc.metadata['source']}  {sentence}")
+        print()
+
+    source_tokens = sum(estimate_tokens(doc.page_content) for doc in DOCS)
+    print(f"query={QUERY!r}, {len(DOCS)} docs, {source_tokens} tokens, llm={args.llm_latency}s per call")
+    print(f"{'compressor':<22} {'per query':>11} {'calls':>10} {'kept':>5} {'tokens':>7} {'precision':>10} {'recall':>7}")
+    report("llm extractor", llm_seconds, llm_docs, gold, f"{len(DOCS)} llm")
+    for name, compressor in [
+        (f"threshold {args.threshold}", by_threshold),
+        (f"token budget {args.token_budget}", by_budget),
+    ]:
+        seconds, docs = timed(compressor, args.repeat)
+        report(name, seconds, docs, gold, "2 embed")
+
+
+if __name__ == "__main__":
+    main()
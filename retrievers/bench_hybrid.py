@@ -0,0 +1,151 @@
+"""
+Benchmark: BM25Index build / add / query / save / load, against a per-document BM25
+
+The reference scores every document per query the way rank_bm25's BM25Okapi
+does (a dict of term counts per document), which is what `BM25Retriever` from
+langchain_community uses. Synthetic documents with a Zipf-like vocabulary.
+Also checks that a HybridRetriever filter limits the BM25 hits as well as the dense ones.
+
+Run from the project root:
+    python -m retrievers.bench_hybrid --sizes 10000 100000 500000
+"""
+
+import argparse
+import math
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+import numpy as np
+from langchain_core.documents import Document
+
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+from retrievers.bm25_index import BM25Index, tokenize
+from retrievers.hybrid import HybridRetriever
+from vector_stores.local_store import LocalVectorStore
+
+
+def make_texts(count: int, vocabulary: int, seed: int) -> list[str]:
+    rng = np.random.default_rng(seed)
+    weights = 1 / np.arange(1, vocabulary + 1)
+    weights /= weights.sum()
+    lengths = rng.integers(5, 60, size=count)
+    words = rng.choice(vocabulary, size=int(lengths.sum()), p=weights)
+    texts, start = [], 0
+    for length in lengths:
+        texts.append(" ".join(f"w{w}" for w in words[start : start + length]))
+        start += length
+    return texts
+
+
+class PerDocumentBM25:
+    """rank_bm25 style: one Counter per document, every query scores every document"""
+
+    def __init__(self, texts: list[str], k1: float = 1.5, b: float = 0.75):
+        self.k1, self.b = k1, b
+        self.counts = [Counter(tokenize(text)) for text in texts]
+        self.lengths = [sum(c.values()) for c in self.counts]
+        self.avgdl = sum(self.lengths) / len(self.lengths)
+        df = Counter(term for c in self.counts for term in c)
+        n = len(texts)
+        self.idf = {term: math.log1p((n - d + 0.5) / (d + 0.5)) for term, d in df.items()}
+
+    def top(self, query: str, k: int) -> list[int]:
+        terms = tokenize(query)
+        scores = []
+        for counts, length in zip(self.counts, self.lengths):
+            score = 0.0
+            norm = self.k1 * (1 - self.b + self.b * length / self.avgdl)
+            for term in terms:
+                tf = counts.get(term)
+                if tf:
+                    score += self.idf[term] * tf * (self.k1 + 1) / (tf + norm)
+            scores.append(score)
+        return sorted(range(len(scores)), key=lambda i: -scores[i])[:k]
+
+
+def latencies(search, queries: list[str]) -> np.ndarray:
+    times = []
+    for query in queries:
+        start = time.perf_counter()
+        search(query)
+        times.append(time.perf_counter() - start)
+    return np.array(times) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--add-batch", type=int, default=1000)
+    parser.add_argument("--reference-max", type=int, default=20_000, help="skip the per-document BM25 above this size")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(1)
+    queries = [" ".join(f"w{w}" for w in rng.integers(0, 2000, size=rng.integers(2, 6))) for _ in range(args.queries)]
+    print(f"{'docs':>8} {'build':>8} {'docs/s':>9} {'add':>8} {'p50':>8} {'p99':>8} {'qps':>7} {'save':>7} {'load':>7} {'per-doc p50':>12}")
+
+    for size in args.sizes:
+        texts = make_texts(size, args.vocabulary, seed=size)
+        start = time.perf_counter()
+        index = BM25Index.from_texts(texts)
+        build = time.perf_counter() - start
+
+        extra = make_texts(args.add_batch, args.vocabulary, seed=size + 1)
+        start = time.perf_counter()
+        index.add_texts(extra)
+        add = time.perf_counter() - start
+
+        times = latencies(lambda q: index.search(q, args.k), queries)
+
+        folder = tempfile.mkdtemp()
+        start = time.perf_counter()
+        index.save(os.path.join(folder, "bm25"))
+        save = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = BM25Index.load(os.path.join(folder, "bm25"))
+        load = time.perf_counter() - start
+        assert [d.page_content for d, _ in loaded.search(queries[0], args.k)] == [
+            d.page_content for d, _ in index.search(queries[0], args.k)
+        ]
+        shutil.rmtree(folder)
+
+        reference = "-"
+        if size <= args.reference_max:
+            per_document = PerDocumentBM25(texts + extra)
+            reference = f"{np.percentile(latencies(lambda q: per_document.top(q, args.k), queries[:20]), 50):10.1f}ms"
+
+        print(
+            f"{size:>8} {build:7.2f}s {size / build:9.0f} {add * 1000:6.1f}ms"
+            f" {np.percentile(times, 50):6.2f}ms {np.percentile(times, 99):6.2f}ms {1000 / times.mean():7.0f}"
+            f" {save:6.2f}s {load:6.2f}s {reference:>12}"
+        )
+
+    check_hybrid_filter(make_texts(5000, args.vocabulary, seed=0), queries[:20])
+
+
+def check_hybrid_filter(texts: list[str], queries: list[str]) -> None:
+    """Every document returned with search_kwargs={"filter": ...} must match the filter, BM25 hits too"""
+    docs = [Document(page_content=text, metadata={"group": i % 10}) for i, text in enumerate(texts)]
+    retriever = HybridRetriever.from_documents(docs, HashEmbeddings(dim=64), LocalVectorStore, k=10)
+    filters = [
+        ({"group": 3}, {3}),
+        ({"group": {"$in": [1, 2]}}, {1, 2}),
+        # callable filters (FAISS style) only reach BM25 here, LocalVectorStore takes where dicts
+        (lambda metadata: metadata["group"] == 7, {7}),
+    ]
+    for where, allowed in filters:
+        retriever.search_kwargs = {"filter": where}
+        found = [doc for query in queries for doc, _ in retriever._lexical(query)]
+        if not callable(where):
+            found += [doc for query in queries for doc in retriever.invoke(query)]
+        assert found and all(doc.metadata["group"] in allowed for doc in found), f"filter {where} leaked"
+    retriever.close()
+    print(f"hybrid filter applied to the dense and BM25 hits of {len(queries)} queries")
+
+if __name__ == "__main__":
+    main()
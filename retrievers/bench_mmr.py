@@ -0,0 +1,73 @@
+"""
+Benchmark: MMR selection time per query
+
+- langchain: langchain_core maximal_marginal_relevance (used by FAISS / Chroma),
+             recomputes the similarity to every picked document on each step
+- naive:     the same recomputation, vectorized with numpy
+- running:   retrievers.mmr, one running-max update per step
+- batched:   retrievers.mmr for a batch of queries at once (time per query)
+
+Run from the project root:
+    python -m retrievers.bench_mmr --dim 768
+"""
+
+import argparse
+import time
+
+from langchain_core.vectorstores.utils import maximal_marginal_relevance
+
+from retrievers.mmr import mmr_select, mmr_select_batch, naive_mmr
+from vector_stores.synthetic_data import make_clustered_vectors, make_queries
+
+
+def per_query(function, queries, repeat: int = 1) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for query in queries:
+            function(query)
+    return (time.perf_counter() - start) / (repeat * len(queries))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=32)
+    parser.add_argument("--fetch-k", type=int, nargs="+", default=[100, 300, 1000])
+    parser.add_argument("--k", type=int, nargs="+", default=[10, 50])
+    parser.add_argument("--lambda-mult", type=float, default=0.5)
+    args = parser.parse_args()
+
+    print(f"dim={args.dim}, {args.queries} queries, lambda_mult={args.lambda_mult}")
+    print(f"{'fetch_k':>8} {'k':>4} {'langchain':>11} {'naive':>11} {'running':>11} {'batched':>11}  speedup vs langchain / naive, same picks")
+    for fetch_k in args.fetch_k:
+        candidates = [
+            make_clustered_vectors(fetch_k, args.dim, clusters=20, seed=seed) for seed in range(args.queries)
+        ]
+        queries = make_queries(candidates[0], args.queries)
+        for k in args.k:
+            lam = args.lambda_mult
+            picks = {}
+
+            def run(name, select):
+                picks[name] = []
+                return per_query(lambda i: picks[name].append(select(i)), range(args.queries))
+
+            langchain = run("langchain", lambda i: maximal_marginal_relevance(queries[i], candidates[i], lam, k))
+            naive = run("naive", lambda i: naive_mmr(queries[i][None], candidates[i], k, lam))
+            running = run("running", lambda i: mmr_select(queries[i], candidates[i], k, lam))
+
+            start = time.perf_counter()
+            batched_picks = mmr_select_batch(queries, candidates, k, lam)
+            batched = (time.perf_counter() - start) / args.queries
+
+            # same selections up to float rounding on near ties
+            same = sum(a == b for a, b in zip(picks["langchain"], batched_picks)) / args.queries
+            print(
+                f"{fetch_k:>8} {k:>4} {langchain * 1000:9.2f}ms {naive * 1000:9.2f}ms "
+                f"{running * 1000:9.2f}ms {batched * 1000:9.2f}ms  "
+                f"{langchain / running:6.1f}x / {naive / running:4.1f}x  {same:.0%}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""
+Benchmark: MultiQueryRetriever vs FusionMultiQueryRetriever end-to-end latency
+
+The LLM and the embedding model are offline fakes with injected latency
+(FakeListChatModel(sleep=...), HashEmbeddings(latency=...)), so the numbers
+show how many round trips each retriever makes.
+
+Run from the project root:
+    python -m retrievers.bench_multi_query --llm-latency 0.8 --embed-latency 0.15
+"""
+
+import argparse
+import time
+
+from langchain.retrievers.multi_query import MultiQueryRetriever
+from langchain_core.language_models import FakeListChatModel
+
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+from retrievers.multi_query import FusionMultiQueryRetriever
+from vector_stores.local_store import LocalVectorStore
+
+QUESTION = "How to improve energy and maintain balance"
+REWRITES = [
+    "ways to boost daily energy levels",
+    "how to keep a balanced lifestyle",
+    "habits that increase energy",
+    "tips for work life balance",
+    "what gives the body more energy",
+    "how to maintain physical and mental balance",
+    "natural ways to feel more energetic",
+    "balancing energy through the day",
+]
+
+
+def timed(retriever, question: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    docs = retriever.invoke(question)
+    return time.perf_counter() - start, len(docs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=2000)
+    parser.add_argument("--llm-latency", type=float, default=0.8)
+    parser.add_argument("--embed-latency", type=float, default=0.15)
+    parser.add_argument("--rewrites", type=int, nargs="+", default=[3, 5, 8])
+    args = parser.parse_args()
+
+    texts = [f"note {i}: {REWRITES[i % len(REWRITES)]} and topic {i % 37}" for i in range(args.docs)]
+    embedding = HashEmbeddings(dim=256, latency=args.embed_latency)
+    store = LocalVectorStore.from_texts(texts, embedding)
+    print(f"llm={args.llm_latency}s per call, embedding={args.embed_latency}s per call, {args.docs} docs")
+    print(f"{'rewrites':>8} {'multi query':>12} {'fusion':>8} {'fusion cached':>14} {'one retrieval':>14}")
+
+    for count in args.rewrites:
+        llm = FakeListChatModel(responses=["\n".join(REWRITES[:count])], sleep=args.llm_latency)
+        retriever = store.as_retriever(search_kwargs={"k": 5})
+        multi = MultiQueryRetriever.from_llm(retriever=retriever, llm=llm, include_original=True)
+        fusion = FusionMultiQueryRetriever.from_llm(retriever=retriever, llm=llm)
+
+        baseline, _ = timed(multi, QUESTION)
+        first, _ = timed(fusion, QUESTION)
+        cached, _ = timed(fusion, QUESTION)
+        single, _ = timed(retriever, QUESTION)
+        print(f"{count:>8} {baseline:11.2f}s {first:7.2f}s {cached:13.2f}s {single:13.2f}s")
+
+
+if __name__ == "__main__":
+    main()
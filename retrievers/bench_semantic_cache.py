@@ -0,0 +1,101 @@
+"""
+Benchmark: retriever with and without SemanticCacheRetriever on a repetitive query stream
+
+Users ask a few popular questions over and over, with different casing,
+punctuation and filler words. The stream draws questions with a Zipf-like
+popularity and picks a random variant of each. HashEmbeddings with injected
+latency stands in for the embedding API, so the threshold here is tuned for it.
+
+Run from the project root:
+    python -m retrievers.bench_semantic_cache --queries 2000 --embed-latency 0.05
+"""
+
+import argparse
+import random
+import time
+
+import numpy as np
+
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+from retrievers.semantic_cache import SemanticCacheRetriever
+from vector_stores.local_store import LocalVectorStore
+
+TOPICS = [
+    "langchain", "vector stores", "retrievers", "embeddings", "prompt templates", "output parsers",
+    "document loaders", "text splitters", "chat models", "runnables", "agents", "memory",
+]
+
+
+def variants(topic: str) -> list[str]:
+    return [
+        f"What is {topic}",
+        f"what is {topic.title()}?",
+        f"What is {topic} exactly",
+        f"WHAT IS {topic.upper()}",
+        f"what are {topic}",
+    ]
+
+
+def percentiles(times: list[float]) -> str:
+    ms = np.array(times) * 1000
+    return f"p50 {np.percentile(ms, 50):6.2f}ms  p99 {np.percentile(ms, 99):6.2f}ms  total {ms.sum() / 1000:6.2f}s"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--embed-latency", type=float, default=0.02)
+    parser.add_argument("--threshold", type=float, default=0.9)
+    parser.add_argument("--max-entries", type=int, default=256)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    questions = [(f"{name} {i}" if i else name) for i in range(5) for name in TOPICS]
+    weights = [1 / (rank + 1) for rank in range(len(questions))]
+    asked = rng.choices(questions, weights=weights, k=args.queries)
+    stream = [rng.choice(variants(q)) for q in asked]
+
+    embedding = HashEmbeddings(dim=256, latency=args.embed_latency)
+    # every question has a few documents about it, the rest is filler
+    texts = [f"{q} explained, note {j}" for q in questions for j in range(4)]
+    metadatas = [{"question": q} for q in questions for _ in range(4)]
+    texts += [f"unrelated note {i} about topic {i % 97}" for i in range(args.docs - len(texts))]
+    metadatas += [{"question": None}] * (len(texts) - len(metadatas))
+    store = LocalVectorStore.from_texts(texts, embedding, metadatas=metadatas)
+    retriever = store.as_retriever(search_kwargs={"k": 4})
+    cached = SemanticCacheRetriever(
+        retriever=retriever, similarity_threshold=args.threshold, max_entries=args.max_entries
+    )
+
+    for name, target in [("plain retriever", retriever), ("semantic cache", cached)]:
+        calls = embedding.calls
+        times, relevant = [], 0
+        for query, question in zip(stream, asked):
+            start = time.perf_counter()
+            docs = target.invoke(query)
+            times.append(time.perf_counter() - start)
+            relevant += sum(doc.metadata["question"] == question for doc in docs)
+        # share of returned documents that belong to the question asked, a hit on another question lowers it
+        precision = relevant / (4 * len(stream))
+        print(f"{name:<16} {percentiles(times)}  embedding calls {embedding.calls - calls:>5}  precision {precision:.3f}")
+
+    stats = cached.stats()
+    print(
+        f"hit rate {stats['hit_rate']:.1%} ({stats['exact_hits']} exact), entries {stats['entries']},"
+        f" saved {stats['saved_seconds']:.2f}s, avg miss {stats['avg_miss_seconds'] * 1000:.1f}ms"
+    )
+    check_exact_keys(retriever)
+
+
+def check_exact_keys(retriever) -> None:
+    """Case and spacing repeats skip the embedding call, questions that differ in punctuation don't share a key"""
+    cached = SemanticCacheRetriever(retriever=retriever, similarity_threshold=1.1)
+    for query in ["What is C++?", "What is C#", "What is C", "what  is c++?", "WHAT IS C#"]:
+        cached.invoke(query)
+    print(f"exact keys: {cached.stats()['exact_hits']} exact hits for 2 case/space repeats")
+    assert cached.stats()["exact_hits"] == 2, "punctuation dropped from the exact key"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Corpora with known answers for the retrieval benchmark suite (benchmark_suite.py).
+
+Synthetic corpus: every document belongs to a topic and mixes words of its topic
+with common filler words (Zipf-like, like real text). Every query is built from
+the words of one target document, so the target is the relevant document
+and recall@k says whether a retriever finds it. Same seed, same corpus.
+
+Fixture corpus: a JSON file
+    {"documents": [{"id": "d1", "text": "...", "metadata": {...}}, ...],
+     "queries":   [{"query": "...", "relevant": ["d1", ...]}, ...]}
+"""
+
+import json
+import os
+from typing import NamedTuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+class Corpus(NamedTuple):
+    name: str
+    documents: list[Document]
+    queries: list[str]
+    relevant: list[set[str]]
+
+
+def make_corpus(
+    size: int,
+    queries: int = 200,
+    topic_size: int = 50,
+    topic_words: int = 40,
+    common_words: int = 5000,
+    doc_words: tuple[int, int] = (20, 60),
+    seed: int = 0,
+) -> Corpus:
+    """`size` documents in size / topic_size topics, `queries` queries with one relevant document each"""
+    rng = np.random.default_rng(seed)
+    topics = max(1, size // topic_size)
+    common_p = 1 / np.arange(1, common_words + 1)
+    common_p /= common_p.sum()
+
+    documents, words_of = [], []
+    for i in range(size):
+        topic = i % topics
+        length = int(rng.integers(*doc_words))
+        own = [f"t{topic}w{w}" for w in rng.integers(0, topic_words, size=length // 3)]
+        filler = [f"c{w}" for w in rng.choice(common_words, size=length - len(own), p=common_p)]
+        words = own + filler
+        rng.shuffle(words)
+        words_of.append(own)
+        documents.append(
+            Document(id=f"doc-{i}", page_content=" ".join(words), metadata={"topic": topic, "row": i})
+        )
+
+    query_texts, relevant = [], []
+    for target in rng.integers(0, size, size=queries):
+        own = words_of[target]
+        picked = list(rng.choice(own, size=min(4, len(own)), replace=False))
+        picked.append(f"c{int(rng.choice(common_words, p=common_p))}")
+        query_texts.append(" ".join(picked))
+        relevant.append({documents[target].id})
+    return Corpus(f"synthetic-{size}", documents, query_texts, relevant)
+
+
+def load_fixture(path: str) -> Corpus:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    documents = [
+        Document(id=str(doc["id"]), page_content=doc["text"], metadata=doc.get("metadata", {}))
+        for doc in data["documents"]
+    ]
+    queries = [q["query"] for q in data["queries"]]
+    relevant = [{str(i) for i in q["relevant"]} for q in data["queries"]]
+    return Corpus(os.path.basename(path), documents, queries, relevant)
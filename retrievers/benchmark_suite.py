@@ -0,0 +1,273 @@
+"""
+Offline retrieval benchmark and regression suite.
+
+For every corpus size and retriever configuration it measures:
+
+    build_seconds        embed the corpus and build the index
+    memory_mb            peak RSS growth while building (every run is a fresh process)
+    qps, p50/p95/p99_ms  sequential queries, one at a time
+    recall_at_k, mrr     against the known relevant documents of the corpus
+
+Everything is offline and deterministic: synthetic corpora (benchmark_corpus.py)
+or a fixture file, HashEmbeddings as the embedder, a rule based "LLM" for the
+multi query retriever. Results are written as JSON, --compare checks them against
+an earlier file and exits with 1 when a configuration got slower or less accurate.
+
+Run from the project root:
+    python -m retrievers.benchmark_suite --sizes 1000 10000 --output results.json
+    python -m retrievers.benchmark_suite --sizes 1000 10000 --compare results.json
+    python -m retrievers.benchmark_suite --configs flat hybrid --fixture my_corpus.json
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+from langchain_core.runnables import RunnableLambda
+
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+from retrievers.benchmark_corpus import Corpus, load_fixture, make_corpus
+
+
+def _flat(corpus: Corpus, embedding, k: int):
+    from vector_stores.local_store import LocalVectorStore
+
+    return LocalVectorStore.from_documents(corpus.documents, embedding).as_retriever(search_kwargs={"k": k})
+
+
+def _ivf(corpus: Corpus, embedding, k: int):
+    from vector_stores.ivf_index import IVFIndex
+    from vector_stores.local_store import LocalVectorStore
+
+    # train early so the smaller corpora are searched through the partitions too
+    store = LocalVectorStore.from_documents(corpus.documents, embedding, index=IVFIndex(nprobe=32, train_at=1000))
+    return store.as_retriever(search_kwargs={"k": k})
+
+
+def _quantized(corpus: Corpus, embedding, k: int):
+    from vector_stores.local_store import LocalVectorStore
+    from vector_stores.quantized_index import QuantizedIndex
+
+    store = LocalVectorStore.from_documents(corpus.documents, embedding, index=QuantizedIndex("int8"))
+    return store.as_retriever(search_kwargs={"k": k})
+
+
+def _mmr(corpus: Corpus, embedding, k: int):
+    from vector_stores.local_store import LocalVectorStore
+
+    store = LocalVectorStore.from_documents(corpus.documents, embedding)
+    return store.as_retriever(search_type="mmr", search_kwargs={"k": k, "fetch_k": 4 * k, "lambda_mult": 0.5})
+
+
+def _faiss(corpus: Corpus, embedding, k: int):
+    # what Chat_Tube uses
+    from langchain_community.vectorstores import FAISS
+
+    store = FAISS.from_documents(corpus.documents, embedding, ids=[doc.id for doc in corpus.documents])
+    return store.as_retriever(search_kwargs={"k": k})
+
+
+def _bm25(corpus: Corpus, embedding, k: int):
+    from retrievers.bm25_index import BM25Index
+
+    index = BM25Index.from_documents(corpus.documents)
+    return RunnableLambda(lambda query: [doc for doc, _ in index.search(query, k)])
+
+
+def _hybrid(corpus: Corpus, embedding, k: int):
+    from retrievers.hybrid import HybridRetriever
+    from vector_stores.local_store import LocalVectorStore
+
+    return HybridRetriever.from_documents(corpus.documents, embedding, LocalVectorStore, k=k, fetch_k=4 * k)
+
+
+def _rewrite(inputs: dict) -> list[str]:
+    # stand-in for the LLM: drop one word at a time, deterministic and free
+    words = inputs["question"].split()
+    return [" ".join(words[:i] + words[i + 1 :]) for i in range(min(3, len(words)))]
+
+
+def _multi_query(corpus: Corpus, embedding, k: int):
+    from retrievers.multi_query import FusionMultiQueryRetriever
+
+    retriever = _flat(corpus, embedding, k)
+    return FusionMultiQueryRetriever(retriever=retriever, llm_chain=RunnableLambda(_rewrite), top_n=k, cache_size=0)
+
+
+def _compression(corpus: Corpus, embedding, k: int):
+    from langchain.retrievers import ContextualCompressionRetriever
+
+    from retrievers.sentence_compressor import EmbeddingSentenceCompressor
+
+    return ContextualCompressionRetriever(
+        base_retriever=_flat(corpus, embedding, k),
+        base_compressor=EmbeddingSentenceCompressor(embeddings=embedding, similarity_threshold=0.2),
+    )
+
+
+CONFIGS = {
+    "flat": _flat,
+    "ivf": _ivf,
+    "quantized": _quantized,
+    "mmr": _mmr,
+    "faiss": _faiss,
+    "bm25": _bm25,
+    "hybrid": _hybrid,
+    "multi_query": _multi_query,
+    "compression": _compression,
+}
+
+
+def _rss_mb(field: str) -> float:
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(f"{field}:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def run_config(config: str, corpus: Corpus, k: int, dim: int) -> dict:
+    """Build one configuration and run all queries of the corpus (inside the child process)"""
+    embedding = HashEmbeddings(dim=dim)
+    rss_before = _rss_mb("VmRSS")
+    start = time.perf_counter()
+    retriever = CONFIGS[config](corpus, embedding, k)
+    build = time.perf_counter() - start
+    memory = _rss_mb("VmHWM") - rss_before
+
+    for query in corpus.queries[:5]:
+        retriever.invoke(query)
+    times, recalls, reciprocal_ranks = [], [], []
+    for query, relevant in zip(corpus.queries, corpus.relevant):
+        start = time.perf_counter()
+        docs = retriever.invoke(query)
+        times.append(time.perf_counter() - start)
+        ids = [doc.id for doc in docs[:k]]
+        recalls.append(len(relevant.intersection(ids)) / len(relevant))
+        rank = next((i for i, doc_id in enumerate(ids, start=1) if doc_id in relevant), None)
+        reciprocal_ranks.append(1 / rank if rank else 0.0)
+
+    ms = np.array(times) * 1000
+    return {
+        "config": config,
+        "corpus": corpus.name,
+        "documents": len(corpus.documents),
+        "queries": len(corpus.queries),
+        "k": k,
+        "build_seconds": round(build, 4),
+        "memory_mb": round(memory, 1),
+        "qps": round(len(times) / sum(times), 1),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p95_ms": round(float(np.percentile(ms, 95)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        f"recall_at_{k}": round(float(np.mean(recalls)), 4),
+        "mrr": round(float(np.mean(reciprocal_ranks)), 4),
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results: list[dict], baseline_path: str, tolerance: float) -> list[str]:
+    """Regressions of `results` against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = {(r["config"], r["corpus"]): r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\n{'config':<12} {'corpus':<18} {'qps':>16} {'p99 ms':>18} {'recall':>16}")
+    for result in results:
+        old = baseline.get((result["config"], result["corpus"]))
+        if old is None:
+            continue
+        recall_key = f"recall_at_{result['k']}"
+        problems = []
+        if result["qps"] < old["qps"] * (1 - tolerance):
+            problems.append("qps")
+        if result["p99_ms"] > old["p99_ms"] * (1 + tolerance):
+            problems.append("p99")
+        if result.get(recall_key, 0) < old.get(recall_key, 0) - 0.01:
+            problems.append("recall")
+        print(
+            f"{result['config']:<12} {result['corpus']:<18}"
+            f" {old['qps']:>7.0f} -> {result['qps']:<6.0f} {old['p99_ms']:>8.2f} -> {result['p99_ms']:<6.2f}"
+            f" {old.get(recall_key, 0):>6.3f} -> {result.get(recall_key, 0):<6.3f} {' '.join(problems)}"
+        )
+        regressions.extend(f"{result['config']}/{result['corpus']}: {p}" for p in problems)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000])
+    parser.add_argument("--configs", nargs="+", default=list(CONFIGS), choices=list(CONFIGS))
+    parser.add_argument("--fixture", default=None, help="JSON corpus file instead of the synthetic sizes")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="write the results to this JSON file")
+    parser.add_argument("--compare", default=None, help="earlier results file to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed qps / p99 change before it's a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--size", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        corpus = load_fixture(args.fixture) if args.fixture else make_corpus(args.size, args.queries, seed=args.seed)
+        print(json.dumps(run_config(args.child, corpus, args.k, args.dim)))
+        return
+
+    results = []
+    print(f"{'config':<12} {'corpus':<18} {'build s':>8} {'mem MB':>7} {'qps':>7} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'recall':>7} {'mrr':>6}")
+    for size in [None] if args.fixture else args.sizes:
+        for config in args.configs:
+            # a fresh process per run, so memory and caches of one run don't leak into the next
+            command = [
+                sys.executable, "-m", "retrievers.benchmark_suite", "--child", config,
+                "--queries", str(args.queries), "--k", str(args.k), "--dim", str(args.dim), "--seed", str(args.seed),
+            ]
+            command += ["--fixture", args.fixture] if args.fixture else ["--size", str(size)]
+            child = subprocess.run(command, capture_output=True, text=True)
+            if child.returncode:
+                print(f"{config:<12} failed: {child.stderr.strip().splitlines()[-1] if child.stderr.strip() else child.returncode}")
+                continue
+            result = json.loads(child.stdout.strip().splitlines()[-1])
+            results.append(result)
+            print(
+                f"{config:<12} {result['corpus']:<18} {result['build_seconds']:8.2f} {result['memory_mb']:7.1f}"
+                f" {result['qps']:7.0f} {result['p50_ms']:7.2f} {result['p95_ms']:7.2f} {result['p99_ms']:7.2f}"
+                f" {result[f'recall_at_{args.k}']:7.3f} {result['mrr']:6.3f}"
+            )
+
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "settings": {"k": args.k, "dim": args.dim, "queries": args.queries, "seed": args.seed},
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print("\nregressions:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nno regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+In-memory BM25 inverted index with array-backed postings.
+
+Terms get integer ids, the postings of a batch of documents are stored as one
+immutable segment of numpy arrays (CSR layout):
+
+    terms     sorted term ids in the segment
+    offsets   postings of terms[i] are docs[offsets[i]:offsets[i + 1]]
+    docs      row of the document (int32)
+    tfs       term frequency in that document (float32)
+
+`add_documents` builds a new segment from the batch, small segments are merged
+when a newer one gets as big as them (like a binary counter), so there are
+O(log n) segments and every posting is rewritten O(log n) times.
+
+A query looks up its term ids in every segment (np.searchsorted), scores the
+postings with numpy and keeps the top k, no Python loop over documents.
+Searches read an immutable snapshot, adds never block them.
+"""
+
+import json
+import os
+import re
+import shutil
+import threading
+from typing import Callable, NamedTuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+from vector_stores.mmap_format import (
+    RecordFile,
+    decode_document,
+    decode_string,
+    encode_document,
+    write_records,
+)
+
+FORMAT_VERSION = 1
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN.findall(text.lower())
+
+
+class _Segment(NamedTuple):
+    terms: np.ndarray
+    offsets: np.ndarray
+    docs: np.ndarray
+    tfs: np.ndarray
+
+    def postings(self, term_ids: np.ndarray):
+        """(term id, docs, tfs) of the query terms present in this segment"""
+        pos = np.searchsorted(self.terms, term_ids)
+        for term_id, i in zip(term_ids, pos):
+            if i < len(self.terms) and self.terms[i] == term_id:
+                start, stop = self.offsets[i], self.offsets[i + 1]
+                yield term_id, self.docs[start:stop], self.tfs[start:stop]
+
+
+def _build_segment(term_ids: np.ndarray, rows: np.ndarray, tfs: np.ndarray | None = None) -> _Segment:
+    """Segment from (term id, row) pairs, repeated pairs are counted as the term frequency"""
+    keys = (term_ids.astype(np.int64) << 32) | rows.astype(np.int64)
+    if tfs is None:
+        keys, counts = np.unique(keys, return_counts=True)
+        tfs = counts.astype(np.float32)
+    else:
+        order = np.argsort(keys, kind="stable")
+        keys, tfs = keys[order], tfs[order]
+    terms, starts = np.unique(keys >> 32, return_index=True)
+    return _Segment(
+        terms=terms.astype(np.int32),
+        offsets=np.append(starts, len(keys)).astype(np.int64),
+        docs=(keys & 0xFFFFFFFF).astype(np.int32),
+        tfs=tfs.astype(np.float32),
+    )
+
+
+def _merge(segments: list[_Segment]) -> _Segment:
+    term_ids = np.concatenate([np.repeat(s.terms, np.diff(s.offsets)) for s in segments])
+    rows = np.concatenate([s.docs for s in segments])
+    tfs = np.concatenate([s.tfs for s in segments])
+    return _build_segment(term_ids, rows, tfs)
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """`array` with room for `size` entries, capacity doubles so appends are amortized O(1)"""
+    if size <= len(array):
+        return array
+    grown = np.zeros(max(size, 2 * len(array), 1024), dtype=array.dtype)
+    grown[: len(array)] = array
+    return grown
+
+
+class _Snapshot(NamedTuple):
+    segments: tuple
+    lengths: np.ndarray
+    df: np.ndarray
+    size: int
+    total_length: float
+
+
+class BM25Index:
+    """
+    bm25 = BM25Index.from_documents(docs)
+    bm25.add_documents(more_docs)
+    bm25.search("How to improve energy and maintain balance", k=5)   # [(doc, score), ...]
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75, tokenizer: Callable[[str], list[str]] = tokenize):
+        self.k1 = k1
+        self.b = b
+        self.tokenizer = tokenizer
+        self.vocabulary: dict[str, int] = {}
+        self._docs: list | RecordFile = []
+        self._lock = threading.Lock()
+        self._snapshot = _Snapshot((), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int32), 0, 0.0)
+
+    @classmethod
+    def from_documents(cls, documents: list[Document], **kwargs) -> "BM25Index":
+        index = cls(**kwargs)
+        index.add_documents(documents)
+        return index
+
+    @classmethod
+    def from_texts(cls, texts: list[str], metadatas: list[dict] | None = None, **kwargs) -> "BM25Index":
+        metadatas = metadatas or [{} for _ in texts]
+        return cls.from_documents(
+            [Document(page_content=text, metadata=metadata) for text, metadata in zip(texts, metadatas)], **kwargs
+        )
+
+    def __len__(self) -> int:
+        return self._snapshot.size
+
+    @property
+    def segment_count(self) -> int:
+        return len(self._snapshot.segments)
+
+    def _term_ids(self, tokens: list[str], grow: bool) -> list[int]:
+        if not grow:
+            return [self.vocabulary[t] for t in tokens if t in self.vocabulary]
+        vocabulary = self.vocabulary
+        return [vocabulary.setdefault(t, len(vocabulary)) for t in tokens]
+
+    def add_documents(self, documents: list[Document]) -> list[int]:
+        """Index a batch of documents as one new segment, returns their rows"""
+        tokenized = [self.tokenizer(doc.page_content) for doc in documents]
+        with self._lock:
+            snap = self._snapshot
+            term_ids = [self._term_ids(tokens, grow=True) for tokens in tokenized]
+            doc_lengths = np.array([len(ids) for ids in term_ids], dtype=np.int64)
+            rows = np.arange(snap.size, snap.size + len(documents))
+            segments = list(snap.segments)
+            if doc_lengths.sum():
+                flat = np.fromiter((t for ids in term_ids for t in ids), dtype=np.int32, count=int(doc_lengths.sum()))
+                segment = _build_segment(flat, np.repeat(rows, doc_lengths))
+                segments.append(segment)
+                # merge while the previous segment is not bigger than the new one
+                while len(segments) > 1 and len(segments[-2].docs) <= 2 * len(segments[-1].docs):
+                    segments[-2:] = [_merge(segments[-2:])]
+            else:
+                segment = None
+
+            # lengths only grows past the old size, searches on the old snapshot never read the new part
+            lengths = _grow(snap.lengths, snap.size + len(documents))
+            lengths[rows] = doc_lengths
+            # df is copied, a search must see the df that matches its segments
+            df = _grow(snap.df.copy(), len(self.vocabulary))
+            if segment is not None:
+                df[segment.terms] += np.diff(segment.offsets).astype(df.dtype)
+            for doc in documents:
+                self._docs.append(doc)
+            self._snapshot = _Snapshot(
+                segments=tuple(segments),
+                lengths=lengths,
+                df=df,
+                size=snap.size + len(documents),
+                total_length=snap.total_length + float(doc_lengths.sum()),
+            )
+        return rows.tolist()
+
+    def add_texts(self, texts: list[str], metadatas: list[dict] | None = None, ids: list[str] | None = None) -> list[int]:
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [None] * len(texts)
+        return self.add_documents(
+            [Document(id=i, page_content=t, metadata=m) for t, m, i in zip(texts, metadatas, ids)]
+        )
+
+    def optimize(self) -> None:
+        """Merge all segments into one (done by save as well)"""
+        with self._lock:
+            snap = self._snapshot
+            if len(snap.segments) > 1:
+                self._snapshot = snap._replace(segments=(_merge(list(snap.segments)),))
+
+    def score_rows(self, query: str, k: int = 4) -> tuple[np.ndarray, np.ndarray]:
+        """(rows, bm25 scores) of the k best matching documents, best first"""
+        snap = self._snapshot
+        term_ids = np.array(self._term_ids(self.tokenizer(query), grow=False), dtype=np.int32)
+        # terms of an add that is still running are not in this snapshot yet
+        term_ids, qtf = np.unique(term_ids[term_ids < len(snap.df)], return_counts=True)
+        if not snap.size or not len(term_ids) or k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        df = snap.df[term_ids].astype(np.float64)
+        idf = np.log1p((snap.size - df + 0.5) / (df + 0.5)) * qtf
+        weight = dict(zip(term_ids.tolist(), idf))
+        avgdl = snap.total_length / snap.size
+
+        hits, scores = [], []
+        for segment in snap.segments:
+            for term_id, docs, tfs in segment.postings(term_ids):
+                hits.append(docs)
+                norm = self.k1 * (1 - self.b + self.b * snap.lengths[docs] / avgdl)
+                scores.append(weight[int(term_id)] * tfs * (self.k1 + 1) / (tfs + norm))
+        if not hits:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        hits, scores = np.concatenate(hits), np.concatenate(scores)
+
+        # few postings: sum per hit document, many: one dense pass over all rows
+        if len(hits) * 16 < snap.size:
+            rows, inverse = np.unique(hits, return_inverse=True)
+            totals = np.bincount(inverse, weights=scores)
+        else:
+            totals = np.bincount(hits, weights=scores, minlength=snap.size)
+            rows = np.flatnonzero(totals)
+            totals = totals[rows]
+
+        if k < len(rows):
+            top = np.argpartition(-totals, k - 1)[:k]
+            rows, totals = rows[top], totals[top]
+        order = np.lexsort((rows, -totals))
+        return rows[order].astype(np.int64), totals[order].astype(np.float32)
+
+    def search(self, query: str, k: int = 4) -> list[tuple[Document, float]]:
+        rows, scores = self.score_rows(query, k)
+        docs = self._docs
+        return [(docs[row], float(score)) for row, score in zip(rows.tolist(), scores)]
+
+    def save(self, folder: str) -> None:
+        """
+        Write the index to `folder`:
+
+            bm25.json                               format version, parameters and sizes
+            terms.npy, offsets.npy, docs.npy, tfs.npy   the postings (one merged segment)
+            lengths.npy                             token count of every document
+            vocabulary.bin, documents.bin + *.offsets.npy   term strings (by id) and the documents
+
+        Written to a temporary folder which then replaces `folder`, like LocalVectorStore.save_local.
+        """
+        self.optimize()
+        snap = self._snapshot
+        tmp = f"{folder}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        segment = snap.segments[0] if snap.segments else _build_segment(
+            np.empty(0, dtype=np.int32), np.empty(0, dtype=np.int64)
+        )
+        for name, array in zip(_Segment._fields, segment):
+            np.save(os.path.join(tmp, f"{name}.npy"), array)
+        np.save(os.path.join(tmp, "lengths.npy"), snap.lengths[: snap.size])
+        terms = sorted(self.vocabulary, key=self.vocabulary.get)
+        write_records(tmp, "vocabulary", (term.encode("utf-8") for term in terms))
+        write_records(tmp, "documents", (encode_document(self._docs[row]) for row in range(snap.size)))
+        with open(os.path.join(tmp, "bm25.json"), "w") as f:
+            json.dump({"format": FORMAT_VERSION, "k1": self.k1, "b": self.b, "size": snap.size}, f)
+
+        old = f"{folder}.old"
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(folder):
+            os.rename(folder, old)
+        os.rename(tmp, folder)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True, tokenizer: Callable[[str], list[str]] = tokenize) -> "BM25Index":
+        """
+        Open an index written by save. With mmap=True the postings and documents stay
+        on disk. Pass the same tokenizer the index was built with.
+        """
+        with open(os.path.join(folder, "bm25.json")) as f:
+            config = json.load(f)
+        if config["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported bm25 format {config['format']}, expected {FORMAT_VERSION}")
+        mode = "r" if mmap else None
+        segment = _Segment(*(np.load(os.path.join(folder, f"{name}.npy"), mmap_mode=mode) for name in _Segment._fields))
+
+        index = cls(k1=config["k1"], b=config["b"], tokenizer=tokenizer)
+        index.vocabulary = {term: i for i, term in enumerate(RecordFile(folder, "vocabulary", decode_string))}
+        index._docs = RecordFile(folder, "documents", decode_document)
+        if not mmap:
+            index._docs = list(index._docs)
+        lengths = np.load(os.path.join(folder, "lengths.npy"))
+        df = np.zeros(len(index.vocabulary), dtype=np.int32)
+        df[np.asarray(segment.terms)] = np.diff(segment.offsets)
+        index._snapshot = _Snapshot(
+            segments=(segment,) if len(segment.terms) else (),
+            lengths=lengths.astype(np.float32),
+            df=df,
+            size=config["size"],
+            total_length=float(lengths.sum()),
+        )
+        return index
@@ -0,0 +1,195 @@
+"""
+Caching layer for source retrievers that call a remote API (WikipediaRetriever, ArxivRetriever, ...).
+
+`WikipediaRetriever(top_k_results=2).invoke("One Piece")` searches Wikipedia and
+downloads the full pages on every call. CachedRetriever wraps any retriever:
+
+- results are stored per normalized query ("  One  piece" == "one piece") and expire after `ttl` seconds
+- single-flight: concurrent calls with the same query wait for one fetch instead of all fetching
+- page content is cut to `max_content_chars` before it is cached
+- with `fixtures=<folder>` results are also written as JSON files (one per query), so
+  tests and benchmarks can replay them offline
+
+Modes:
+    "cache"   use cached / fixture results while fresh, fetch otherwise
+    "record"  always fetch and overwrite the fixture (refresh a fixture store)
+    "replay"  never fetch, a query without a fixture raises LookupError
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from concurrent.futures import Future
+from typing import Literal
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from pydantic import PrivateAttr
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", query).casefold().split())
+
+
+class CachedRetriever(BaseRetriever):
+    """
+    retriever = CachedRetriever(retriever=WikipediaRetriever(top_k_results=2), fixtures="fixtures/wikipedia")
+    retriever.invoke("One Piece")    # fetched once, then served from the cache / fixture
+    """
+
+    retriever: BaseRetriever
+    mode: Literal["cache", "record", "replay"] = "cache"
+    ttl: float | None = 24 * 3600
+    """Seconds a result stays fresh, None = forever (fixtures never expire in replay mode)"""
+    max_content_chars: int | None = 4000
+    cache_size: int = 1024
+    """Queries kept in memory (LRU), the fixture folder has no limit"""
+    fixtures: str | None = None
+    """Folder with one JSON file per query, None = memory only"""
+    hits: int = 0
+    misses: int = 0
+    fetches: int = 0
+
+    _memory: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _inflight: dict = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _fixture_path(self, key: str) -> str:
+        return os.path.join(self.fixtures, hashlib.sha1(key.encode("utf-8")).hexdigest() + ".json")
+
+    def _fresh(self, created: float) -> bool:
+        return self.mode == "replay" or self.ttl is None or time.time() - created < self.ttl
+
+    def _lookup(self, key: str) -> list[Document] | None:
+        """Cached documents for `key` if fresh, from memory first then the fixture folder"""
+        if self.mode == "record":
+            return None
+        entry = self._memory.get(key)
+        if entry is None and self.fixtures is not None:
+            entry = self._read_fixture(key)
+            if entry is not None:
+                self._remember(key, entry)
+        if entry is None or not self._fresh(entry[0]):
+            return None
+        self._memory.move_to_end(key)
+        return list(entry[1])
+
+    def _read_fixture(self, key: str):
+        try:
+            with open(self._fixture_path(key), encoding="utf-8") as f:
+                record = json.load(f)
+        except FileNotFoundError:
+            return None
+        documents = [
+            Document(id=doc_id, page_content=text, metadata=metadata) for doc_id, text, metadata in record["documents"]
+        ]
+        return record["created"], documents
+
+    def _write_fixture(self, key: str, query: str, created: float, documents: list[Document]) -> None:
+        os.makedirs(self.fixtures, exist_ok=True)
+        path = self._fixture_path(key)
+        record = {
+            "query": query,
+            "created": created,
+            "documents": [[doc.id, doc.page_content, doc.metadata] for doc in documents],
+        }
+        # write + rename, a reader never sees half a fixture
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(record, f, ensure_ascii=False, indent=1, default=str)
+        os.replace(tmp, path)
+
+    def _remember(self, key: str, entry) -> None:
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.cache_size:
+            self._memory.popitem(last=False)
+
+    def _cap(self, documents: list[Document]) -> list[Document]:
+        if self.max_content_chars is None:
+            return documents
+        return [
+            Document(id=doc.id, page_content=doc.page_content[: self.max_content_chars], metadata=doc.metadata)
+            for doc in documents
+        ]
+
+    def _store(self, key: str, query: str, documents: list[Document]) -> list[Document]:
+        documents = self._cap(documents)
+        created = time.time()
+        with self._lock:
+            self._remember(key, (created, documents))
+        if self.fixtures is not None:
+            self._write_fixture(key, query, created, documents)
+        return documents
+
+    def _claim(self, query: str) -> tuple[str, list[Document] | None, Future | None, bool]:
+        """(key, cached documents, future to wait on or to resolve, True if this call has to fetch)"""
+        key = normalize_query(query)
+        with self._lock:
+            cached = self._lookup(key)
+            if cached is not None:
+                self.hits += 1
+                return key, cached, None, False
+            self.misses += 1
+            if self.mode == "replay":
+                raise LookupError(f"No fixture for query {query!r} in {self.fixtures}")
+            future = self._inflight.get(key)
+            if future is not None:
+                return key, None, future, False
+            future = self._inflight[key] = Future()
+            self.fetches += 1
+            return key, None, future, True
+
+    def _finish(self, key: str, future: Future, documents=None, error: BaseException | None = None) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        # errors are passed to the waiting calls but never cached
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(documents)
+
+    def clear(self) -> None:
+        """Drop the in-memory cache (fixture files are kept)"""
+        with self._lock:
+            self._memory.clear()
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        key, cached, future, leader = self._claim(query)
+        if cached is not None:
+            return cached
+        if not leader:
+            return list(future.result())
+        try:
+            documents = self._store(key, query, self.retriever.invoke(query, config={"callbacks": run_manager.get_child()}))
+        except BaseException as error:
+            self._finish(key, future, error=error)
+            raise
+        self._finish(key, future, documents)
+        return list(documents)
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        key, cached, future, leader = self._claim(query)
+        if cached is not None:
+            return cached
+        if not leader:
+            return list(await asyncio.wrap_future(future))
+        try:
+            documents = await self.retriever.ainvoke(query, config={"callbacks": run_manager.get_child()})
+            documents = await asyncio.to_thread(self._store, key, query, documents)
+        except BaseException as error:
+            self._finish(key, future, error=error)
+            raise
+        self._finish(key, future, documents)
+        return list(documents)
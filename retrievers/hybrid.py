@@ -0,0 +1,167 @@
+"""
+Hybrid retriever: BM25 keyword search + dense vector search, fused into one list.
+
+Dense search finds paraphrases but can miss exact keywords ("energy", "balance",
+names, error codes), BM25 finds the keywords but no synonyms. HybridRetriever runs
+both for every query, in parallel, and fuses the two rankings:
+
+- fusion="rrf":      Reciprocal Rank Fusion (rank_fusion.py), raw scores are ignored
+- fusion="weighted": min-max normalized scores, dense_weight * dense + (1 - dense_weight) * bm25
+
+The BM25 index (bm25_index.py) lives next to the vector store (FAISS, Chroma,
+LocalVectorStore, ...), `add_documents` writes to both with the same ids so the
+fusion can match a document found by both searches. A `filter` in search_kwargs
+is applied to both searches.
+"""
+
+import asyncio
+import os
+import uuid
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Literal
+
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStore
+from pydantic import PrivateAttr
+
+from retrievers.bm25_index import BM25Index
+from retrievers.rank_fusion import document_key, reciprocal_rank_fusion_with_scores
+from vector_stores.metadata_index import MetadataIndex
+
+
+def _min_max(results: list[tuple[Document, float]]) -> list[tuple[Document, float]]:
+    if not results:
+        return []
+    scores = [score for _, score in results]
+    low, high = min(scores), max(scores)
+    if high == low:
+        return [(doc, 1.0) for doc, _ in results]
+    return [(doc, (score - low) / (high - low)) for doc, score in results]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    retriever = HybridRetriever.from_documents(docs, embedding_model, FAISS, k=5)
+    retriever.invoke("How to improve energy and maintain balance")
+    """
+
+    vectorstore: VectorStore
+    bm25: BM25Index
+    k: int = 4
+    fetch_k: int = 20
+    """Results taken from each search before fusing"""
+    fusion: Literal["rrf", "weighted"] = "rrf"
+    dense_weight: float = 0.5
+    """Weight of the dense ranking, BM25 gets 1 - dense_weight (in both fusion modes)"""
+    rrf_k: int = 60
+    search_kwargs: dict = {}
+    """
+    Extra arguments for the dense search, e.g. {"filter": {...}}. The filter (a Chroma
+    style where dict, or a callable on the metadata like FAISS takes) also limits the BM25 hits
+    """
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    _pool: ThreadPoolExecutor | None = PrivateAttr(default=None)
+
+    @classmethod
+    def from_documents(
+        cls,
+        documents: list[Document],
+        embedding: Embeddings,
+        vectorstore_cls: type[VectorStore],
+        bm25_kwargs: dict | None = None,
+        **kwargs,
+    ) -> "HybridRetriever":
+        documents = [
+            Document(id=doc.id or str(uuid.uuid4()), page_content=doc.page_content, metadata=doc.metadata)
+            for doc in documents
+        ]
+        vectorstore = vectorstore_cls.from_documents(documents, embedding, ids=[doc.id for doc in documents])
+        return cls(vectorstore=vectorstore, bm25=BM25Index.from_documents(documents, **(bm25_kwargs or {})), **kwargs)
+
+    def add_documents(self, documents: list[Document]) -> list[str]:
+        """Add to the vector store and the BM25 index with the same ids"""
+        documents = [
+            Document(id=doc.id or str(uuid.uuid4()), page_content=doc.page_content, metadata=doc.metadata)
+            for doc in documents
+        ]
+        ids = self.vectorstore.add_documents(documents, ids=[doc.id for doc in documents])
+        self.bm25.add_documents(documents)
+        return ids
+
+    def save_local(self, folder: str) -> None:
+        """Save the BM25 index to folder/bm25 (the vector store is saved with its own API)"""
+        os.makedirs(folder, exist_ok=True)
+        self.bm25.save(os.path.join(folder, "bm25"))
+
+    def _dense(self, query: str) -> list[tuple[Document, float]]:
+        return self.vectorstore.similarity_search_with_relevance_scores(query, k=self.fetch_k, **self.search_kwargs)
+
+    def _lexical(self, query: str) -> list[tuple[Document, float]]:
+        where = self.search_kwargs.get("filter")
+        if not where:
+            return self.bm25.search(query, k=self.fetch_k)
+        # over-fetch until fetch_k hits pass the filter or every matching document was seen
+        fetch = self.fetch_k * 4
+        while True:
+            hits = self.bm25.search(query, k=fetch)
+            if callable(where):
+                kept = [hit for hit in hits if where(hit[0].metadata)]
+            else:
+                metadata_index = MetadataIndex()
+                metadata_index.add([doc.metadata for doc, _ in hits])
+                kept = [hits[row] for row in metadata_index.match(where)]
+            if len(kept) >= self.fetch_k or len(hits) < fetch:
+                return kept[: self.fetch_k]
+            fetch *= 4
+
+    def close(self) -> None:
+        """Stop the BM25 worker threads (also done when the retriever is garbage collected)"""
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+    def fuse(
+        self, dense: list[tuple[Document, float]], lexical: list[tuple[Document, float]]
+    ) -> list[tuple[Document, float]]:
+        """Fused (document, score) pairs, best first, at most k"""
+        weights = [self.dense_weight, 1 - self.dense_weight]
+        if self.fusion == "rrf":
+            rankings = [[doc for doc, _ in dense], [doc for doc, _ in lexical]]
+            return reciprocal_rank_fusion_with_scores(rankings, k=self.rrf_k, weights=weights)[: self.k]
+
+        scores: dict[str, float] = {}
+        documents: dict[str, Document] = {}
+        for results, weight in zip([dense, lexical], weights):
+            for doc, score in _min_max(results):
+                key = document_key(doc)
+                documents.setdefault(key, doc)
+                scores[key] = scores.get(key, 0.0) + weight * score
+        ordered = sorted(scores, key=scores.get, reverse=True)[: self.k]
+        return [(documents[key], scores[key]) for key in ordered]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=4)
+            weakref.finalize(self, self._pool.shutdown, wait=False)
+        # BM25 runs in the pool while this thread does the embedding call and the vector search
+        lexical = self._pool.submit(self._lexical, query)
+        dense = self._dense(query)
+        return [doc for doc, _ in self.fuse(dense, lexical.result())]
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        dense, lexical = await asyncio.gather(
+            self.vectorstore.asimilarity_search_with_relevance_scores(query, k=self.fetch_k, **self.search_kwargs),
+            asyncio.to_thread(self._lexical, query),
+        )
+        return [doc for doc, _ in self.fuse(dense, lexical)]
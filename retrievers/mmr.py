@@ -0,0 +1,105 @@
+"""
+Maximal Marginal Relevance (MMR) with one vectorized update per selection step.
+
+MMR picks k of the fetch_k candidates, every step taking the candidate with the best
+
+    lambda_mult * sim(query, candidate) - (1 - lambda_mult) * max sim(candidate, already picked)
+
+The usual implementation recomputes the similarity of every candidate to every
+picked document on each step (O(k^2 * fetch_k) similarities). Here a running
+"max similarity to the picked ones" is kept per candidate: after a pick only the
+similarities to that one new document are computed and folded in with a max,
+so a step is one (fetch_k x dim) product and the selection is O(k * fetch_k).
+Candidate-candidate similarities are never computed for pairs that are not needed.
+
+A batch of queries is processed together, every step updates all queries at once.
+"""
+
+import numpy as np
+
+from langchain_models.embedding_models.similarity_engine import normalize_rows
+
+
+def mmr_select_batch(
+    queries,
+    candidates: list,
+    k: int = 4,
+    lambda_mult: float = 0.5,
+    block_bytes: int = 4 << 20,
+) -> list[list[int]]:
+    """
+    MMR for several queries at once.
+
+    `candidates[i]` holds the candidate vectors of query i (fetch_k x dim, any
+    fetch_k), the result has the picked candidate positions per query, in pick order.
+    Queries are processed in groups of about `block_bytes` of candidates, every
+    step reads the whole group so it should stay in the CPU cache.
+    """
+    queries = normalize_rows(queries)
+    if not len(queries):
+        return []
+    per_query = max(1, max(len(c) for c in candidates) * queries.shape[1] * 4)
+    group = max(1, block_bytes // per_query)
+    picks = []
+    for start in range(0, len(queries), group):
+        stop = start + group
+        picks.extend(_select_group(queries[start:stop], candidates[start:stop], k, lambda_mult))
+    return picks
+
+
+def _select_group(queries: np.ndarray, candidates: list, k: int, lambda_mult: float) -> list[list[int]]:
+    counts = np.array([len(c) for c in candidates])
+    if not counts.max(initial=0):
+        return [[] for _ in queries]
+
+    # pad to one (queries x fetch_k x dim) block, padding can never be picked
+    fetch_k, dim = counts.max(), queries.shape[1]
+    block = np.zeros((len(queries), fetch_k, dim), dtype=np.float32)
+    for i, vectors in enumerate(candidates):
+        block[i, : len(vectors)] = vectors
+    norms = np.linalg.norm(block, axis=2, keepdims=True)
+    norms[norms == 0] = 1.0
+    block /= norms
+    valid = np.arange(fetch_k) < counts[:, None]
+
+    # matmul on (fetch_k x dim) @ (dim x 1) stacks goes through BLAS, einsum would not
+    relevance = np.matmul(block, queries[:, :, None])[:, :, 0]
+    # nothing picked yet: no redundancy penalty for the first pick
+    max_similarity = np.full((len(queries), fetch_k), -np.inf, dtype=np.float32)
+    available = valid.copy()
+    steps = min(k, fetch_k)
+    picks = np.empty((len(queries), steps), dtype=np.int64)
+    rows = np.arange(len(queries))
+
+    for step in range(steps):
+        if step == 0:
+            scores = relevance.copy()
+        else:
+            scores = lambda_mult * relevance - (1 - lambda_mult) * max_similarity
+        scores[~available] = -np.inf
+        best = np.argmax(scores, axis=1)
+        picks[:, step] = best
+        available[rows, best] = False
+        # similarity of every candidate to the document just picked, folded into the running max
+        picked = block[rows, best]
+        np.maximum(max_similarity, np.matmul(block, picked[:, :, None])[:, :, 0], out=max_similarity)
+
+    return [picks[i, : min(k, counts[i])].tolist() for i in range(len(queries))]
+
+
+def mmr_select(query, candidates, k: int = 4, lambda_mult: float = 0.5) -> list[int]:
+    """Positions of the k candidates picked by MMR for one query"""
+    return mmr_select_batch([query], [np.asarray(candidates, dtype=np.float32)], k, lambda_mult)[0]
+
+
+def naive_mmr(query, candidates, k: int = 4, lambda_mult: float = 0.5) -> list[int]:
+    """Reference implementation: recomputes the similarity to all picked documents on every step"""
+    vectors = normalize_rows(candidates)
+    relevance = vectors @ normalize_rows(query)[0]
+    picked = [int(np.argmax(relevance))]
+    while len(picked) < min(k, len(vectors)):
+        redundancy = (vectors @ vectors[picked].T).max(axis=1)
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[picked] = -np.inf
+        picked.append(int(np.argmax(scores)))
+    return picked
@@ -0,0 +1,198 @@
+"""
+MultiQueryRetriever that costs about one retrieval instead of N.
+
+`MultiQueryRetriever.from_llm(...)` asks the LLM for rewrites of the question and
+then runs the base retriever for every rewrite (embed + search each time).
+FusionMultiQueryRetriever:
+
+- embeds the original question and all rewrites in one batched call: the model's
+  batch query API when it has one (`task_type="RETRIEVAL_QUERY"`), else
+  embed_documents. `per_query=True` goes back to concurrent embed_query calls
+- runs the vector searches concurrently
+- merges the result lists with Reciprocal Rank Fusion, deduplicated by doc.id
+- caches the LLM rewrites per question (LRU), a repeated question skips the LLM
+
+Same constructor as the original:
+
+    retriever = FusionMultiQueryRetriever.from_llm(
+        retriever=vectorstore.as_retriever(search_kwargs={"k": 5}),
+        llm=ChatGoogleGenerativeAI(model="gemini-2.5-flash"),
+    )
+"""
+
+import asyncio
+import inspect
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from langchain.retrievers.multi_query import (
+    DEFAULT_QUERY_PROMPT,
+    LineListOutputParser,
+    MultiQueryRetriever,
+)
+from langchain_core.callbacks import (
+    AsyncCallbackManagerForRetrieverRun,
+    CallbackManagerForRetrieverRun,
+)
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.prompts import BasePromptTemplate
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStoreRetriever
+from pydantic import PrivateAttr
+
+from retrievers.rank_fusion import reciprocal_rank_fusion
+
+
+def _query_batch_kwargs(embeddings: Embeddings) -> dict:
+    """Extra embed_documents arguments that embed the texts as queries (e.g. Google's task_type)"""
+    if "task_type" in inspect.signature(embeddings.embed_documents).parameters:
+        return {"task_type": "RETRIEVAL_QUERY"}
+    return {}
+
+
+class FusionMultiQueryRetriever(MultiQueryRetriever):
+    include_original: bool = True
+    """Search with the original question too (it is embedded in the same batch)"""
+    rrf_k: int = 60
+    top_n: int | None = None
+    """Number of fused documents to return, None = all of them"""
+    max_concurrency: int = 8
+    cache_size: int = 256
+    """Number of questions whose rewrites are kept, 0 disables the cache"""
+    embed_queries: Callable[[list[str]], list[list[float]]] | None = None
+    """
+    Custom batch query embedder (one call for all queries). By default the store's model
+    embeds them in one embed_documents call, as queries when it takes a task_type
+    """
+    per_query: bool = False
+    """
+    Embed every query with its own embed_query call (concurrently) instead, for models
+    that embed queries differently from documents and have no batch query API
+    """
+    cache_hits: int = 0
+    cache_misses: int = 0
+
+    _rewrites: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+
+    @classmethod
+    def from_llm(
+        cls,
+        retriever: BaseRetriever,
+        llm: BaseLanguageModel,
+        prompt: BasePromptTemplate = DEFAULT_QUERY_PROMPT,
+        include_original: bool = True,
+        **kwargs,
+    ) -> "FusionMultiQueryRetriever":
+        return cls(
+            retriever=retriever,
+            llm_chain=prompt | llm | LineListOutputParser(),
+            include_original=include_original,
+            **kwargs,
+        )
+
+    def _cached(self, question: str) -> list[str] | None:
+        rewrites = self._rewrites.get(question)
+        if rewrites is None:
+            self.cache_misses += 1
+            return None
+        self._rewrites.move_to_end(question)
+        self.cache_hits += 1
+        return list(rewrites)
+
+    def _remember(self, question: str, rewrites: list[str]) -> None:
+        if self.cache_size <= 0:
+            return
+        self._rewrites[question] = list(rewrites)
+        if len(self._rewrites) > self.cache_size:
+            self._rewrites.popitem(last=False)
+
+    def clear_cache(self) -> None:
+        self._rewrites.clear()
+
+    def generate_queries(self, question: str, run_manager: CallbackManagerForRetrieverRun) -> list[str]:
+        rewrites = self._cached(question)
+        if rewrites is None:
+            rewrites = super().generate_queries(question, run_manager)
+            self._remember(question, rewrites)
+        return rewrites
+
+    async def agenerate_queries(
+        self, question: str, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[str]:
+        rewrites = self._cached(question)
+        if rewrites is None:
+            rewrites = await super().agenerate_queries(question, run_manager)
+            self._remember(question, rewrites)
+        return rewrites
+
+    def _all_queries(self, question: str, rewrites: list[str]) -> list[str]:
+        queries = [question] + rewrites if self.include_original else rewrites
+        # the LLM sometimes repeats a line or the question itself
+        return list(dict.fromkeys(q.strip() for q in queries if q.strip()))
+
+    def _vector_search(self):
+        """(vector_store, search_kwargs) when the base retriever is a plain similarity search"""
+        retriever = self.retriever
+        if isinstance(retriever, VectorStoreRetriever) and retriever.search_type == "similarity":
+            store = retriever.vectorstore
+            if self.embed_queries is not None or store.embeddings is not None:
+                return store, retriever.search_kwargs
+        return None, None
+
+    def retrieve_rankings(
+        self, queries: list[str], run_manager: CallbackManagerForRetrieverRun
+    ) -> list[list[Document]]:
+        """One ranked result list per query"""
+        store, search_kwargs = self._vector_search()
+        if store is None:
+            # any other retriever: run it for all queries concurrently
+            return self.retriever.batch(
+                queries,
+                config={"callbacks": run_manager.get_child(), "max_concurrency": self.max_concurrency},
+            )
+        with ThreadPoolExecutor(max_workers=min(self.max_concurrency, len(queries))) as pool:
+            if self.embed_queries is not None:
+                vectors = self.embed_queries(queries)
+            elif self.per_query:
+                vectors = list(pool.map(store.embeddings.embed_query, queries))
+            else:
+                vectors = store.embeddings.embed_documents(queries, **_query_batch_kwargs(store.embeddings))
+            return list(pool.map(lambda vector: store.similarity_search_by_vector(vector, **search_kwargs), vectors))
+
+    async def aretrieve_rankings(
+        self, queries: list[str], run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[list[Document]]:
+        store, search_kwargs = self._vector_search()
+        if store is None:
+            return await self.retriever.abatch(
+                queries,
+                config={"callbacks": run_manager.get_child(), "max_concurrency": self.max_concurrency},
+            )
+        if self.embed_queries is not None:
+            vectors = await asyncio.to_thread(self.embed_queries, queries)
+        elif self.per_query:
+            vectors = await asyncio.gather(*(store.embeddings.aembed_query(query) for query in queries))
+        else:
+            vectors = await store.embeddings.aembed_documents(queries, **_query_batch_kwargs(store.embeddings))
+        return await asyncio.gather(
+            *(store.asimilarity_search_by_vector(vector, **search_kwargs) for vector in vectors)
+        )
+
+    def _fuse(self, rankings: list[list[Document]]) -> list[Document]:
+        fused = reciprocal_rank_fusion(rankings, k=self.rrf_k)
+        return fused if self.top_n is None else fused[: self.top_n]
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        queries = self._all_queries(query, self.generate_queries(query, run_manager))
+        return self._fuse(self.retrieve_rankings(queries, run_manager))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> list[Document]:
+        queries = self._all_queries(query, await self.agenerate_queries(query, run_manager))
+        return self._fuse(await self.aretrieve_rankings(queries, run_manager))
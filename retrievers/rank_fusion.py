@@ -0,0 +1,58 @@
+"""
+Reciprocal Rank Fusion (RRF): merge several ranked result lists into one.
+
+Every document gets sum(weight / (k + rank)) over the lists it appears in
+(rank starts at 1), so documents ranked high by several lists win and the raw
+scores of the lists never have to be comparable.
+
+Documents are matched by `doc.id` (set by Chroma, FAISS, LocalVectorStore, ...),
+two different documents with the same text stay separate. Only documents
+without an id fall back to their content + metadata.
+"""
+
+import json
+from typing import Callable
+
+from langchain_core.documents import Document
+
+
+def document_key(doc: Document) -> str:
+    if doc.id is not None:
+        return f"id:{doc.id}"
+    return "content:" + json.dumps([doc.page_content, doc.metadata], sort_keys=True, default=str)
+
+
+def reciprocal_rank_fusion_with_scores(
+    rankings: list[list[Document]],
+    k: int = 60,
+    weights: list[float] | None = None,
+    key: Callable[[Document], str] = document_key,
+) -> list[tuple[Document, float]]:
+    """Fused (document, rrf score) pairs, best first"""
+    weights = weights or [1.0] * len(rankings)
+    if len(weights) != len(rankings):
+        raise ValueError("rankings and weights must have the same length")
+    scores: dict[str, float] = {}
+    documents: dict[str, Document] = {}
+    for ranking, weight in zip(rankings, weights):
+        seen = set()
+        for rank, doc in enumerate(ranking, start=1):
+            doc_key = key(doc)
+            # a document listed twice in one ranking only counts at its best rank
+            if doc_key in seen:
+                continue
+            seen.add(doc_key)
+            documents.setdefault(doc_key, doc)
+            scores[doc_key] = scores.get(doc_key, 0.0) + weight / (k + rank)
+    # sorted is stable: on equal scores the document seen first stays first
+    ordered = sorted(scores, key=scores.get, reverse=True)
+    return [(documents[doc_key], scores[doc_key]) for doc_key in ordered]
+
+
+def reciprocal_rank_fusion(
+    rankings: list[list[Document]],
+    k: int = 60,
+    weights: list[float] | None = None,
+    key: Callable[[Document], str] = document_key,
+) -> list[Document]:
+    return [doc for doc, _ in reciprocal_rank_fusion_with_scores(rankings, k, weights, key)]
@@ -0,0 +1,189 @@
+"""
+Semantic query cache in front of a retriever.
+
+"What is Langchain" and "what is LangChain?" are the same question but each one
+costs an embedding call and a search. SemanticCacheRetriever keeps the
+embeddings of recent queries in a small SimilarityEngine, a new query whose
+embedding is within `similarity_threshold` (cosine) of a cached one gets the
+cached documents back:
+
+- an exact repeat (same text after normalization) skips even the embedding call
+- on a miss the query vector is reused for the vector search, the query is embedded once
+- LRU eviction above `max_entries`, entries expire after `ttl` seconds
+- the cache is cleared when the vector store changes (LocalVectorStore.version,
+  or any `store_version` callable), or by calling `invalidate()`
+- `stats()` reports hits, hit rate and the retrieval time the hits saved
+
+The threshold depends on the embedding model, too low and different questions share results.
+"""
+
+import threading
+import time
+from typing import Any, Callable, NamedTuple
+
+import numpy as np
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.retrievers import BaseRetriever
+from langchain_core.vectorstores import VectorStoreRetriever
+from pydantic import PrivateAttr
+
+from langchain_models.embedding_models.similarity_engine import SimilarityEngine
+from retrievers.cached_retriever import normalize_query
+
+
+class _Entry(NamedTuple):
+    key: str
+    documents: list[Document]
+    created: float
+    fetch_seconds: float
+
+
+class SemanticCacheRetriever(BaseRetriever):
+    """
+    retriever = SemanticCacheRetriever(retriever=vectorstore.as_retriever(search_kwargs={"k": 5}))
+    retriever.invoke("What is Langchain")
+    retriever.invoke("what is LangChain?")   # served from the cache
+    retriever.stats()
+    """
+
+    retriever: BaseRetriever
+    embeddings: Embeddings | None = None
+    """Embeds the queries, defaults to the vector store's embeddings"""
+    similarity_threshold: float = 0.95
+    max_entries: int = 1024
+    ttl: float | None = 3600
+    store_version: Callable[[], Any] | None = None
+    """Returns something that changes when the store changes, defaults to vectorstore.version if there is one"""
+    hits: int = 0
+    misses: int = 0
+    exact_hits: int = 0
+    saved_seconds: float = 0.0
+    miss_seconds: float = 0.0
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    _engine: SimilarityEngine = PrivateAttr(default_factory=SimilarityEngine)
+    _entries: list = PrivateAttr(default_factory=list)
+    _last_used: list = PrivateAttr(default_factory=list)
+    _keys: dict = PrivateAttr(default_factory=dict)
+    _version: Any = PrivateAttr(default=None)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    def _vectorstore(self):
+        retriever = self.retriever
+        return retriever.vectorstore if isinstance(retriever, VectorStoreRetriever) else None
+
+    def _embedder(self) -> Embeddings:
+        if self.embeddings is not None:
+            return self.embeddings
+        store = self._vectorstore()
+        if store is None or store.embeddings is None:
+            raise ValueError("Pass embeddings=... when the wrapped retriever is not a vector store retriever")
+        return store.embeddings
+
+    def _current_version(self):
+        if self.store_version is not None:
+            return self.store_version()
+        return getattr(self._vectorstore(), "version", None)
+
+    def invalidate(self) -> None:
+        """Drop every cached query"""
+        with self._lock:
+            self._engine = SimilarityEngine()
+            self._entries, self._last_used, self._keys = [], [], {}
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "exact_hits": self.exact_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "saved_seconds": self.saved_seconds,
+            "avg_miss_seconds": self.miss_seconds / self.misses if self.misses else 0.0,
+        }
+
+    def _remove(self, rows: list[int]) -> None:
+        self._engine.remove(rows)
+        drop = set(rows)
+        self._entries = [entry for row, entry in enumerate(self._entries) if row not in drop]
+        self._last_used = [used for row, used in enumerate(self._last_used) if row not in drop]
+        self._keys = {entry.key: row for row, entry in enumerate(self._entries)}
+
+    def _hit(self, row: int, now: float, spent: float) -> list[Document] | None:
+        """Documents of entry `row`, None (and the entry dropped) if it expired"""
+        entry = self._entries[row]
+        if self.ttl is not None and now - entry.created >= self.ttl:
+            self._remove([row])
+            return None
+        self._last_used[row] = now
+        self.hits += 1
+        self.saved_seconds += max(0.0, entry.fetch_seconds - spent)
+        return list(entry.documents)
+
+    def _lookup(self, key: str, vector: np.ndarray | None, spent: float = 0.0) -> list[Document] | None:
+        now = time.monotonic()
+        with self._lock:
+            version = self._current_version()
+            if version != self._version:
+                self._engine = SimilarityEngine()
+                self._entries, self._last_used, self._keys = [], [], {}
+                self._version = version
+            row = self._keys.get(key)
+            if row is not None:
+                documents = self._hit(row, now, spent)
+                if documents is not None:
+                    self.exact_hits += 1
+                return documents
+            if vector is None or not len(self._engine):
+                return None
+            rows, scores = self._engine.search_arrays(vector[None, :], k=1)
+            if scores[0, 0] < self.similarity_threshold:
+                return None
+            return self._hit(int(rows[0, 0]), now, spent)
+
+    def _insert(self, key: str, vector: np.ndarray, documents: list[Document], fetch_seconds: float, version) -> None:
+        now = time.monotonic()
+        with self._lock:
+            # the store changed while we were fetching: the result may already be stale
+            if version != self._current_version() or key in self._keys:
+                return
+            if len(self._entries) >= self.max_entries:
+                self._remove([int(np.argmin(self._last_used))])
+            self._engine.add(vector[None, :])
+            self._entries.append(_Entry(key, list(documents), now, fetch_seconds))
+            self._last_used.append(now)
+            self._keys[key] = len(self._entries) - 1
+
+    def _search(self, query: str, vector: np.ndarray, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        store = self._vectorstore()
+        if store is not None and self.retriever.search_type == "similarity" and self.embeddings is None:
+            # the query is already embedded, search with its vector instead of embedding it again
+            return store.similarity_search_by_vector(vector.tolist(), **self.retriever.search_kwargs)
+        return self.retriever.invoke(query, config={"callbacks": run_manager.get_child()})
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        # case and spaces only: punctuation can matter ("What is C++?" vs "What is C#"), the vectors decide those
+        key = normalize_query(query)
+        documents = self._lookup(key, None)
+        if documents is not None:
+            return documents
+
+        start = time.perf_counter()
+        vector = np.asarray(self._embedder().embed_query(query), dtype=np.float32)
+        # a semantic hit still paid for the embedding call
+        documents = self._lookup(key, vector, spent=time.perf_counter() - start)
+        if documents is not None:
+            return documents
+
+        version = self._version
+        documents = self._search(query, vector, run_manager)
+        fetch_seconds = time.perf_counter() - start
+        with self._lock:
+            self.misses += 1
+            self.miss_seconds += fetch_seconds
+        self._insert(key, vector, documents, fetch_seconds, version)
+        return documents
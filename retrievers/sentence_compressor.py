@@ -0,0 +1,143 @@
+"""
+Local sentence-level document compressor for ContextualCompressionRetriever.
+
+`LLMChainExtractor` sends every retrieved document to the LLM to pull out the
+relevant sentences, one round trip per document per query. Here the documents
+are split into sentences, the query is embedded with embed_query while all the
+sentences are embedded in one embed_documents batch (both calls run at the same
+time), and only the sentences close to the query are kept:
+
+- similarity_threshold: keep sentences with cosine similarity >= threshold
+- token_budget:         keep the best sentences (over all documents) until the budget is used
+
+Kept sentences stay in their original order, documents with nothing left are dropped.
+Thresholds depend on the embedding model, check a few scores with `score_sentences` first.
+"""
+
+import asyncio
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Sequence
+
+import numpy as np
+from langchain_core.callbacks import Callbacks
+from langchain_core.documents import BaseDocumentCompressor, Document
+from langchain_core.embeddings import Embeddings
+
+from langchain_models.embedding_models.batch_embedder import estimate_tokens
+from langchain_models.embedding_models.similarity_engine import normalize_rows
+
+# sentence ends (. ! ? followed by whitespace) and line breaks
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+|\s*\n\s*")
+# "Dr. James" is one sentence, a part ending in one of these is glued to the next one
+_ABBREVIATION = re.compile(r"(?:\b(?:Dr|Mr|Mrs|Ms|Prof|St|vs|etc|e\.g|i\.e)|\b[A-Z])\.$")
+
+
+def split_sentences(text: str) -> list[str]:
+    sentences: list[str] = []
+    glue = False
+    for part in _SENTENCE_END.split(text):
+        part = part.strip()
+        if not part:
+            continue
+        if glue:
+            sentences[-1] += " " + part
+        else:
+            sentences.append(part)
+        glue = bool(_ABBREVIATION.search(part))
+    return sentences
+
+
+class EmbeddingSentenceCompressor(BaseDocumentCompressor):
+    """
+    compressor = EmbeddingSentenceCompressor(embeddings=embedding_model, similarity_threshold=0.5)
+    retriever = ContextualCompressionRetriever(base_retriever=base_retriever, base_compressor=compressor)
+    """
+
+    embeddings: Embeddings
+    similarity_threshold: float | None = 0.5
+    token_budget: int | None = None
+    length_function: Callable[[str], int] = estimate_tokens
+
+    model_config = {"arbitrary_types_allowed": True}
+
+    def score_sentences(self, documents: Sequence[Document], query: str) -> list[tuple[list[str], np.ndarray]]:
+        """(sentences, similarity to the query) of every document, one embedding call for all the sentences"""
+        sentences = [split_sentences(doc.page_content) for doc in documents]
+        flat = [sentence for doc_sentences in sentences for sentence in doc_sentences]
+        if not flat:
+            return self._scores(sentences, None, None)
+        # the query is embedded as a query (models can embed them differently), next to the sentence batch
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            query_vector = pool.submit(self.embeddings.embed_query, query)
+            vectors = self.embeddings.embed_documents(flat)
+            return self._scores(sentences, query_vector.result(), vectors)
+
+    async def ascore_sentences(self, documents: Sequence[Document], query: str) -> list[tuple[list[str], np.ndarray]]:
+        sentences = [split_sentences(doc.page_content) for doc in documents]
+        flat = [sentence for doc_sentences in sentences for sentence in doc_sentences]
+        if not flat:
+            return self._scores(sentences, None, None)
+        query_vector, vectors = await asyncio.gather(
+            self.embeddings.aembed_query(query), self.embeddings.aembed_documents(flat)
+        )
+        return self._scores(sentences, query_vector, vectors)
+
+    @staticmethod
+    def _scores(sentences: list[list[str]], query_vector, vectors) -> list[tuple[list[str], np.ndarray]]:
+        if vectors is None:
+            return [([], np.empty(0, dtype=np.float32)) for _ in sentences]
+        scores = normalize_rows(vectors) @ normalize_rows([query_vector])[0]
+        result, start = [], 0
+        for doc_sentences in sentences:
+            result.append((doc_sentences, scores[start : start + len(doc_sentences)]))
+            start += len(doc_sentences)
+        return result
+
+    def _select(self, scored: list[tuple[list[str], np.ndarray]]) -> list[np.ndarray]:
+        keep = [
+            np.ones(len(scores), dtype=bool) if self.similarity_threshold is None
+            else scores >= self.similarity_threshold
+            for _, scores in scored
+        ]
+        if self.token_budget is None:
+            return keep
+
+        # best sentences first, over all documents, while they fit in the budget
+        candidates = [
+            (float(scores[i]), doc, i)
+            for doc, (_, scores) in enumerate(scored)
+            for i in np.flatnonzero(keep[doc])
+        ]
+        budget = self.token_budget
+        keep = [np.zeros(len(scores), dtype=bool) for _, scores in scored]
+        for _, doc, i in sorted(candidates, key=lambda c: -c[0]):
+            cost = self.length_function(scored[doc][0][i])
+            if cost <= budget:
+                keep[doc][i] = True
+                budget -= cost
+        return keep
+
+    def _compress(self, documents: Sequence[Document], scored) -> list[Document]:
+        compressed = []
+        for doc, (sentences, _), keep in zip(documents, scored, self._select(scored)):
+            if keep.any():
+                text = " ".join(sentence for sentence, kept in zip(sentences, keep) if kept)
+                compressed.append(Document(id=doc.id, page_content=text, metadata=dict(doc.metadata)))
+        return compressed
+
+    def compress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Callbacks | None = None,
+    ) -> Sequence[Document]:
+        return self._compress(documents, self.score_sentences(documents, query))
+
+    async def acompress_documents(
+        self,
+        documents: Sequence[Document],
+        query: str,
+        callbacks: Callbacks | None = None,
+    ) -> Sequence[Document]:
+        return self._compress(documents, await self.ascore_sentences(documents, query))
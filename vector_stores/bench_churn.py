@@ -0,0 +1,175 @@
+"""
+Benchmark: delete latency and search speed of a high churn collection
+
+Every round deletes `--batch` documents and adds as many new ones (an update
+stream), then runs a few searches. Compared compaction policies:
+
+- eager:       compact on every delete (rewrites the whole index each time)
+- never:       tombstones only, dead rows pile up
+- background:  tombstones + background compaction at 20% dead
+
+It then checks that searches (plain, filtered and MMR) running in other threads
+while documents are added never fail and never return a deleted document: flat
+index, IVF index, an IVF index that retrains every few adds, and int8 / binary
+quantized indexes with rescoring while documents are also deleted and compacted.
+
+Run from the project root:
+    python -m vector_stores.bench_churn --docs 200000 --rounds 200
+"""
+
+import argparse
+import sys
+import threading
+import time
+
+import numpy as np
+
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+from vector_stores.ivf_index import IVFIndex
+from vector_stores.local_store import LocalVectorStore
+from vector_stores.quantized_index import QuantizedIndex
+from vector_stores.synthetic_data import make_clustered_vectors, make_queries
+
+POLICIES = {
+    "eager": {"compact_threshold": 0.0, "background_compaction": False},
+    "never": {"compact_threshold": None},
+    "background": {"compact_threshold": 0.2, "background_compaction": True},
+}
+
+
+def ms(values) -> str:
+    p50, p99 = np.percentile(values, [50, 99]) * 1000
+    return f"{p50:7.2f} /{p99:8.2f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--rounds", type=int, default=200)
+    parser.add_argument("--batch", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    total = args.docs + args.rounds * args.batch
+    vectors = make_clustered_vectors(total, args.dim)
+    queries = make_queries(vectors, 5)
+    ids = [f"doc-{i}" for i in range(total)]
+    print(f"corpus={args.docs} x {args.dim}, {args.rounds} rounds of {args.batch} deletes + {args.batch} adds")
+    print(f"{'policy':>10} {'delete p50/p99':>20} {'search p50/p99 first':>22} {'search p50/p99 last':>22}  stats")
+
+    for name, policy in POLICIES.items():
+        store = LocalVectorStore(HashEmbeddings(dim=args.dim), **policy)
+        store.add_embeddings(zip(ids[: args.docs], vectors[: args.docs]), ids=ids[: args.docs])
+        rng = np.random.default_rng(0)
+        live = list(range(args.docs))
+        deletes, searches = [], []
+
+        for round_ in range(args.rounds):
+            picks = set(rng.choice(len(live), args.batch, replace=False).tolist())
+            victims = [ids[row] for i, row in enumerate(live) if i in picks]
+            live = [row for i, row in enumerate(live) if i not in picks]
+            start = time.perf_counter()
+            store.delete(victims)
+            deletes.append(time.perf_counter() - start)
+
+            new = range(args.docs + round_ * args.batch, args.docs + (round_ + 1) * args.batch)
+            store.add_embeddings(zip([ids[i] for i in new], vectors[new.start : new.stop]), ids=[ids[i] for i in new])
+            live.extend(new)
+
+            start = time.perf_counter()
+            for query in queries:
+                store.similarity_search_with_score_by_vector(query, args.k)
+            searches.append((time.perf_counter() - start) / len(queries))
+
+        store.wait_for_compaction()
+        quarter = max(1, args.rounds // 4)
+        stats = store.stats()
+        print(
+            f"{name:>10} {ms(deletes):>20} {ms(searches[:quarter]):>22} {ms(searches[-quarter:]):>22}  "
+            f"dead={stats['dead_ratio']:.0%} segments={stats['segments']} compactions={stats['compactions']}"
+        )
+
+    concurrent = [
+        ("flat", None, 1000, 1, None),
+        ("ivf", IVFIndex(train_at=1000, retrain_growth=2.0), 1000, 1, None),
+        # trains while searches run, then retrains on almost every add
+        ("ivf retraining", IVFIndex(train_at=500, retrain_growth=1.05), 100, 50, None),
+        # every add appends to the float file, deletes and compactions rewrite it
+        ("int8 + rescore", QuantizedIndex(mode="int8", rescore=True), 1000, 10, 0.1),
+        ("binary + rescore", QuantizedIndex(mode="binary", rescore=True), 1000, 10, 0.1),
+    ]
+    for name, index, start, batch, compact in concurrent:
+        check_concurrent_reads(
+            name, index, vectors[:4000], ids[:4000], queries, args.k, start=start, batch=batch, compact_threshold=compact
+        )
+
+
+def check_concurrent_reads(
+    name,
+    index,
+    vectors,
+    ids,
+    queries,
+    k,
+    readers: int = 4,
+    start: int = 1000,
+    batch: int = 1,
+    compact_threshold: float | None = None,
+):
+    """
+    Searches (plain, filtered, MMR) run in `readers` threads while the rest of the vectors are added `batch` at a time.
+    With a `compact_threshold` every added batch also deletes a few older documents, so compactions run too.
+    """
+    store = LocalVectorStore(HashEmbeddings(dim=vectors.shape[1]), index=index, compact_threshold=compact_threshold)
+    metadatas = [{"even": i % 2 == 0} for i in range(len(ids))]
+    store.add_embeddings(zip(ids[:start], vectors[:start]), metadatas[:start], ids=ids[:start])
+    store.delete(ids[: start : 10])
+    # appended only once a delete returned, a search started after that must not see them
+    deleted = list(ids[: start : 10])
+    done = threading.Event()
+    errors, searches = [], [0] * readers
+
+    def read(reader):
+        while not done.is_set():
+            try:
+                for query in queries:
+                    for filter in (None, {"even": True}):
+                        gone = set(deleted)
+                        found = store.similarity_search_by_vector(query, k, filter=filter)
+                        found += store.max_marginal_relevance_search_by_vector(query, k, filter=filter)
+                        assert not gone & {doc.id for doc in found}, "deleted document returned"
+                        searches[reader] += 2
+            except Exception as error:  # noqa: BLE001 - reported below
+                errors.append(error)
+                return
+
+    # switch threads far more often than the default 5ms, so reads land inside every write
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    threads = [threading.Thread(target=read, args=(reader,)) for reader in range(readers)]
+    for thread in threads:
+        thread.start()
+    for row in range(start, len(ids), batch):
+        rows = slice(row, row + batch)
+        store.add_embeddings(zip(ids[rows], vectors[rows]), metadatas[rows], ids=ids[rows])
+        if compact_threshold is not None:
+            # delete every 5th document of an earlier batch (none of them deleted above)
+            old = ids[row - start + 1 : row - start + batch : 5]
+            store.delete(old)
+            deleted.extend(old)
+    done.set()
+    for thread in threads:
+        thread.join()
+    sys.setswitchinterval(interval)
+    store.wait_for_compaction()
+
+    print(
+        f"{name}: {sum(searches)} searches during {len(ids) - start} adds, "
+        f"compactions={store.compactions}, errors={errors[:1]}"
+    )
+    assert not errors, f"concurrent search failed on {name}: {errors[0]!r}"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Benchmark: time until a fresh process answers its first query
+
+- rebuild:  re-embed every text and add it to a new store (what a script without persistence does)
+- pickle:   unpickle index + ids + documents (like FAISS.load_local) and re-index the metadata
+- mmap:     LocalVectorStore.load_local, files are memory mapped
+
+Every variant runs in its own fresh process, timings start after the imports.
+The saved files are in the OS page cache (they were just written), which is also
+the common case for several workers opening the same store.
+
+Run from the project root:
+    python -m vector_stores.bench_cold_start --docs 200000
+"""
+
+import argparse
+import json
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+from vector_stores.local_store import LocalVectorStore
+
+QUERY = "document 42 about cricket"
+
+
+def texts_and_metadata(count: int):
+    texts = [f"document {i} about cricket team {i % 10} and season {i % 17}" for i in range(count)]
+    metadatas = [{"team": f"t{i % 10}", "season": i % 17} for i in range(count)]
+    return texts, metadatas
+
+
+def peak_rss_mb() -> float:
+    # VmHWM (Linux) starts fresh in every process, ru_maxrss would include the parent's peak
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def cold_start(variant: str, folder: str, docs: int, dim: int) -> dict:
+    """Runs inside the child process"""
+    embedding = HashEmbeddings(dim=dim)
+    start = time.perf_counter()
+    if variant == "rebuild":
+        texts, metadatas = texts_and_metadata(docs)
+        store = LocalVectorStore.from_texts(texts, embedding, metadatas)
+    elif variant == "pickle":
+        with open(os.path.join(folder, "store.pkl"), "rb") as f:
+            index, ids, docs = pickle.load(f)
+        store = LocalVectorStore(embedding, index=index)
+        store._ids, store._docs = ids, docs
+        store._rows = {doc_id: row for row, doc_id in enumerate(ids)}
+        store.metadata_index.add([doc.metadata for doc in docs])
+    else:
+        store = LocalVectorStore.load_local(os.path.join(folder, "store"), embedding)
+    opened = time.perf_counter()
+    store.similarity_search(QUERY, k=5, filter={"team": "t3"})
+    first = time.perf_counter()
+    return {
+        "open": opened - start,
+        "first_query": first - opened,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("--folder", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(cold_start(args.child, args.folder, args.docs, args.dim)))
+        return
+
+    folder = tempfile.mkdtemp()
+    try:
+        # build once (vectors from the hash model so every variant finds the same store)
+        texts, metadatas = texts_and_metadata(args.docs)
+        store = LocalVectorStore.from_texts(texts, HashEmbeddings(dim=args.dim), metadatas)
+        store.save_local(os.path.join(folder, "store"))
+        with open(os.path.join(folder, "store.pkl"), "wb") as f:
+            pickle.dump((store.index, store._ids, store._docs), f, protocol=pickle.HIGHEST_PROTOCOL)
+        size = sum(
+            os.path.getsize(os.path.join(folder, "store", name))
+            for name in os.listdir(os.path.join(folder, "store"))
+        )
+        print(f"corpus={args.docs} x {args.dim}, store on disk {size / 2**20:.0f} MB")
+        print(f"{'variant':>8} {'open':>10} {'1st query':>10} {'total':>10} {'peak RSS':>10}")
+
+        for variant in ("rebuild", "pickle", "mmap"):
+            output = subprocess.run(
+                [sys.executable, "-m", "vector_stores.bench_cold_start", "--docs", str(args.docs),
+                 "--dim", str(args.dim), "--child", variant, "--folder", folder],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            result = json.loads(output)
+            total = result["open"] + result["first_query"]
+            print(
+                f"{variant:>8} {result['open'] * 1000:8.1f}ms {result['first_query'] * 1000:8.1f}ms "
+                f"{total * 1000:8.1f}ms {result['peak_rss_mb']:8.0f}MB"
+            )
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
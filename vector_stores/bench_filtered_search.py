@@ -0,0 +1,75 @@
+"""
+Benchmark: filtered similarity search across filter selectivities
+
+Compares the naive way (search everything, drop rows that fail the filter in Python),
+pre-filtering, post-filtering and the automatic plan of LocalVectorStore.
+
+Run from the project root:
+    python -m vector_stores.bench_filtered_search --docs 200000
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from langchain_models.embedding_models.fake_embeddings import HashEmbeddings
+from vector_stores.local_store import LocalVectorStore
+from vector_stores.synthetic_data import make_clustered_vectors, make_queries
+
+# share of the corpus owned by every tenant
+SELECTIVITIES = [0.0005, 0.005, 0.05, 0.25, 0.5]
+
+
+def naive(store, query, k, where):
+    # what a store without a metadata index does: rank everything, then check metadata
+    results = store.similarity_search_with_score_by_vector(query, k=len(store))
+    matches = [r for r in results if all(r[0].metadata.get(f) == v for f, v in where.items())]
+    return matches[:k]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    vectors = make_clustered_vectors(args.docs, args.dim)
+    queries = make_queries(vectors, args.queries)
+
+    # tenants are assigned independently of the vectors
+    rng = np.random.default_rng(3)
+    shares = np.array(SELECTIVITIES + [1 - sum(SELECTIVITIES)])
+    tenants = rng.choice(len(shares), size=args.docs, p=shares)
+    metadatas = [{"tenant": f"t{t}"} for t in tenants]
+
+    store = LocalVectorStore(HashEmbeddings(dim=args.dim))
+    store.add_embeddings(((f"doc {i}", v) for i, v in enumerate(vectors)), metadatas)
+    print(f"corpus={args.docs} x {args.dim}, queries={args.queries}, k={args.k}")
+    print(f"{'selectivity':>12} {'naive':>10} {'prefilter':>10} {'postfilter':>10} {'auto':>10}  auto plan")
+
+    for tenant, share in enumerate(SELECTIVITIES):
+        where = {"tenant": f"t{tenant}"}
+        timings = {}
+
+        start = time.perf_counter()
+        for query in queries[:5]:
+            expected = naive(store, query, args.k, where)
+        timings["naive"] = (time.perf_counter() - start) / 5
+
+        for plan in ("prefilter", "postfilter", "auto"):
+            start = time.perf_counter()
+            for query in queries:
+                results = store.similarity_search_with_score_by_vector(query, args.k, filter=where, plan=plan)
+            timings[plan] = (time.perf_counter() - start) / len(queries)
+            # every plan is exact, so it must return the same documents as the naive way
+            assert [d.id for d, _ in results] == [d.id for d, _ in naive(store, query, args.k, where)]
+
+        row = " ".join(f"{timings[p] * 1000:8.2f}ms" for p in ("naive", "prefilter", "postfilter", "auto"))
+        print(f"{share:>12.2%} {row}  {store.last_plan}")
+
+
+if __name__ == "__main__":
+    main()
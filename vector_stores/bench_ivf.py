@@ -0,0 +1,70 @@
+"""
+Benchmark: exact search vs IVF-Flat as the corpus grows
+
+For every corpus size the IVF index is built once and queried with several
+nprobe values. Queries run one at a time (like a retriever does), latencies are
+reported as p50 / p99, recall@k is measured against the exact results.
+
+Run from the project root:
+    python -m vector_stores.bench_ivf --sizes 10000 100000 1000000 --dim 384
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from langchain_models.embedding_models.similarity_engine import SimilarityEngine, recall_at_k
+from vector_stores.ivf_index import IVFIndex
+from vector_stores.synthetic_data import make_clustered_vectors, make_queries
+
+
+def latencies(search, queries) -> tuple[np.ndarray, np.ndarray]:
+    """Run queries one by one, return (indices, per query seconds)"""
+    indices, timings = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found, _ = search(query[None])
+        timings.append(time.perf_counter() - start)
+        indices.append(found[0])
+    return np.array(indices), np.array(timings)
+
+
+def report(label: str, timings: np.ndarray, recall: float) -> None:
+    p50, p99 = np.percentile(timings, [50, 99]) * 1000
+    print(f"  {label:<14} p50={p50:8.2f}ms  p99={p99:8.2f}ms  recall={recall:.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 16, 64])
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        vectors = make_clustered_vectors(size, args.dim, clusters=1000)
+        queries = make_queries(vectors, args.queries)
+        exact = SimilarityEngine.from_normalized(vectors)
+
+        start = time.perf_counter()
+        index = IVFIndex(vectors)
+        build = time.perf_counter() - start
+        sizes = index.list_sizes()
+        print(
+            f"corpus={size:,} x {args.dim}: nlist={len(sizes)} (largest list {sizes.max():,}), "
+            f"build {build:.1f}s"
+        )
+
+        truth, timings = latencies(lambda q: exact.search_arrays(q, args.k), queries)
+        report("exact", timings, 1.0)
+        for nprobe in args.nprobe:
+            found, timings = latencies(lambda q: index.search_arrays(q, args.k, nprobe=nprobe), queries)
+            report(f"nprobe={nprobe}", timings, recall_at_k(truth, found))
+        del vectors, exact, index
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Benchmark: full vector scan vs two-stage prefix search (prefix scan + full rerank)
+
+Run from the project root:
+    python -m vector_stores.bench_prefix --docs 200000 --dim 768
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from langchain_models.embedding_models.similarity_engine import recall_at_k
+from vector_stores.prefix_index import PrefixIndex
+from vector_stores.synthetic_data import make_clustered_vectors, make_queries
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    args = parser.parse_args()
+
+    # energy concentrated in the first dimensions, like a Matryoshka model
+    vectors = make_clustered_vectors(args.docs, args.dim, spectrum_decay=0.15)
+    queries = make_queries(vectors, args.queries)
+    index = PrefixIndex(vectors)
+    print(f"corpus={args.docs} x {args.dim}, queries={args.queries}, k={args.k}")
+
+    def run(label, **params):
+        start = time.perf_counter()
+        indices, _ = index.search_arrays(queries, args.k, **params)
+        elapsed = time.perf_counter() - start
+        return indices, f"{label:<32} {len(queries) / elapsed:8,.0f} q/s"
+
+    exact, line = run("full scan", prefix_dims=args.dim)
+    print(f"{line}  recall@{args.k}=1.000")
+
+    for dims in (32, 64, 128):
+        for shortlist in (50, 200, 1000):
+            indices, line = run(f"prefix={dims:<4} shortlist={shortlist}", prefix_dims=dims, shortlist=shortlist)
+            print(f"{line}  recall@{args.k}={recall_at_k(exact, indices):.3f}")
+
+    check_cache_updates(vectors[:10_000], queries, args.k)
+
+
+def check_cache_updates(vectors, queries, k, prefix_dims=32):
+    """The cached prefix copy must follow add and remove like a freshly built index"""
+    index = PrefixIndex(vectors[:100], prefix_dims=prefix_dims)
+    index.search_arrays(queries, k)  # builds the cache before the updates
+    for start in range(100, len(vectors), 700):
+        index.add(vectors[start : start + 700])
+    removed = np.arange(0, len(vectors), 7)
+    index.remove(removed)
+    fresh = PrefixIndex(np.delete(vectors, removed, axis=0), prefix_dims=prefix_dims)
+    same = np.array_equal(index.search_arrays(queries, k)[0], fresh.search_arrays(queries, k)[0])
+    print(f"prefix cache after adds + remove matches a fresh index: {same}")
+    assert same, "cached prefix copy out of sync after add/remove"
+
+
+if __name__ == "__main__":
+    main()
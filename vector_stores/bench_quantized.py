@@ -0,0 +1,90 @@
+"""
+Benchmark: memory per vector, recall@k and speed of quantized search vs exact float search
+
+Speed is reported for one query per call (how a retriever searches) and for all
+queries in one batch. Also checks that int8 recall doesn't depend on how the
+vectors were added (one bulk add vs one vector, then small batches).
+
+Run from the project root:
+    python -m vector_stores.bench_quantized --docs 200000 --dim 384
+"""
+
+import argparse
+import time
+
+from langchain_models.embedding_models.similarity_engine import SimilarityEngine, recall_at_k
+from vector_stores.quantized_index import QuantizedIndex
+from vector_stores.synthetic_data import make_clustered_vectors, make_queries
+
+
+def run(label, index, queries, k, exact, single=50, **params):
+    start = time.perf_counter()
+    indices, _ = index.search_arrays(queries, k, **params)
+    batch = len(queries) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    for query in queries[:single]:
+        index.search_arrays(query[None], k, **params)
+    one = min(single, len(queries)) / (time.perf_counter() - start)
+    recall = 1.0 if exact is None else recall_at_k(exact, indices)
+    print(
+        f"{label:<28} {index_memory(index):8.1f} B/vec  recall@{k}={recall:.3f}"
+        f"  {one:8,.0f} q/s single  {batch:8,.0f} q/s batch"
+    )
+    return indices
+
+
+def check_incremental(vectors, queries, k, tolerance=0.05):
+    """int8 recall after one vector then 5 vector adds must match one bulk add"""
+    exact, _ = SimilarityEngine(vectors).search_arrays(queries, k)
+    recalls = {}
+    for label, batches in [("bulk", [len(vectors)]), ("1 + 5 per add", [1] + [5] * (len(vectors) // 5))]:
+        for rescore in (False, True):
+            index = QuantizedIndex(mode="int8", rescore=rescore)
+            start = 0
+            for size in batches:
+                index.add(vectors[start : start + size])
+                start += size
+            recalls[label, rescore] = recall_at_k(exact, index.search_arrays(queries, k)[0])
+    for rescore in (False, True):
+        bulk, incremental = recalls["bulk", rescore], recalls["1 + 5 per add", rescore]
+        print(f"int8 incremental adds, rescore={rescore!s:<5}  bulk {bulk:.3f}  incremental {incremental:.3f}")
+        assert incremental >= bulk - tolerance, f"incremental adds lost recall: {incremental:.3f} < {bulk:.3f}"
+
+
+def index_memory(index) -> float:
+    if isinstance(index, SimilarityEngine):
+        return index.matrix.nbytes / len(index)
+    return index.memory_per_vector()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--docs", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--incremental-docs", type=int, default=10_000)
+    args = parser.parse_args()
+
+    vectors = make_clustered_vectors(args.docs, args.dim)
+    queries = make_queries(vectors, args.queries)
+    print(f"corpus={args.docs} x {args.dim}, queries={args.queries}")
+
+    exact = run("float32 (exact)", SimilarityEngine(vectors), queries, args.k, None)
+
+    int8 = QuantizedIndex(mode="int8", rescore=True, oversample=4)
+    int8.add(vectors)
+    run("int8", int8, queries, args.k, exact, rescore=False)
+    run("int8 + rescore x4", int8, queries, args.k, exact)
+
+    binary = QuantizedIndex(mode="binary", rescore=True, oversample=10)
+    binary.add(vectors)
+    run("binary", binary, queries, args.k, exact, rescore=False)
+    run("binary + rescore x10", binary, queries, args.k, exact)
+    run("binary + rescore x30", binary, queries, args.k, exact, oversample=30)
+
+    check_incremental(vectors[: args.incremental_docs], queries, args.k)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,4 @@
+# run from the project root: python -m vector_stores.chromadb_example
 """Run this notebook in jupter cell for better results"""
 
 from dotenv import load_dotenv
@@ -5,6 +6,9 @@ from langchain.schema import Document
 from langchain.vectorstores import Chroma
 from langchain_google_genai.embeddings import GoogleGenerativeAIEmbeddings
 
+from vector_stores.ingest import bulk_ingest, document_id, sync_collection
+from vector_stores.metadata_index import metadata_query
+
 load_dotenv()
 
 
@@ -49,9 +53,12 @@ vector_store = Chroma(
 
 
 # add documents
-vector_store.add_documents(docs)
-"""Each document will be assigned a unique id.
-But we can also decide how to pass unique id"""
+# vector_store.add_documents(docs)
+"""Each document will be assigned a unique (random) id, so running this again
+would store and embed everything again.
+Instead we derive the id from the document itself, already stored documents are skipped"""
+report = bulk_ingest(vector_store, docs)
+print(report.inserted, report.skipped, report.updated)
 
 # view documents
 vector_store.get(include=["embeddings", "documents", "metadata"])
@@ -75,6 +82,10 @@ vector_store.similarity_search(
     filter={"team": "Chennai Super Kings"},
 )
 
+# the empty query above is still embedded and ranked against every vector,
+# when we only want to list documents the metadata is enough (no embedding call)
+metadata_query(vector_store, where={"team": "Chennai Super Kings"}, limit=10, offset=0)
+
 
 """update document"""
 
@@ -85,9 +96,9 @@ updated_doc1 = Document(
 )
 
 # pass the document id which we get at the time of creating the vector store document
-vector_store.update_document(
-    document_id="09a39dc6-3ba6-4ea7-927e-fdda591da5e4", document=updated_doc1
-)
+# ids are deterministic so we can compute it again from the original document
+doc1_id = document_id(doc1)
+vector_store.update_document(document_id=doc1_id, document=updated_doc1)
 
 
 """delete the document
@@ -95,7 +106,19 @@ pass the id's which we need to delete
 """
 
 # delete document
-vector_store.delete(ids=["09a39dc6-3ba6-4ea7-927e-fdda591da5e4"])
+vector_store.delete(ids=[doc1_id])
 
 # view documents
 vector_store.get(include=["embeddings", "documents", "metadatas"])
+
+
+"""sync the collection with the source documents
+Instead of calling update/delete by hand we pass the current list of documents,
+only new or changed documents are embedded and removed ones are deleted"""
+
+# doc1 is replaced by its updated version and doc5 is not part of the source anymore
+report = sync_collection(vector_store, [updated_doc1, doc2, doc3, doc4])
+print(report.inserted, report.updated, report.skipped, report.deleted)
+
+# view documents
+vector_store.get(include=["documents", "metadatas"])
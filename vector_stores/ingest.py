@@ -0,0 +1,177 @@
+"""
+Bulk ingest with deterministic, content derived document IDs.
+
+`vector_store.add_documents(docs)` gives every document a random UUID, so running
+the same script twice stores (and embeds) everything twice. Here the ID is derived
+from the document itself, documents that are already stored are skipped without
+calling the embedding model, and new documents are written in large batches.
+
+Works with Chroma (`get(ids=..., include=["metadatas"])`) and with any
+VectorStore that implements `get_by_ids`.
+"""
+
+import hashlib
+import json
+import uuid
+from dataclasses import dataclass, field
+
+from langchain_core.documents import Document
+
+# metadata key that keeps the content hash next to every stored document
+HASH_KEY = "content_hash"
+# fixed namespace so the same document always gets the same uuid5
+ID_NAMESPACE = uuid.UUID("6f1c1a52-6a59-4c39-9d2b-3f7c5b0f6a10")
+
+
+def content_hash(doc: Document) -> str:
+    """sha256 of page_content + metadata (without our own hash key)"""
+    metadata = {k: v for k, v in doc.metadata.items() if k != HASH_KEY}
+    payload = json.dumps([doc.page_content, metadata], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def document_id(doc: Document, key_fields: list[str] | None = None) -> str:
+    """
+    Stable ID of a document.
+
+    By default it is derived from content + metadata, so any change is a new document.
+    With `key_fields` (e.g. ["source", "page"]) the ID only depends on those metadata
+    fields, so a changed document keeps its ID and is updated in place.
+    """
+    if key_fields:
+        missing = [f for f in key_fields if f not in doc.metadata]
+        if missing:
+            raise ValueError(f"Document metadata is missing key fields {missing}")
+        identity = json.dumps({f: doc.metadata[f] for f in key_fields}, sort_keys=True, default=str)
+    else:
+        identity = content_hash(doc)
+    return str(uuid.uuid5(ID_NAMESPACE, identity))
+
+
+@dataclass
+class IngestReport:
+    inserted: int = 0
+    skipped: int = 0
+    updated: int = 0
+    ids: list[str] = field(default_factory=list)
+
+
+def stored_hashes(vector_store, ids: list[str]) -> dict[str, str | None]:
+    """Content hash of every id that already exists in the store"""
+    if hasattr(vector_store, "get"):
+        # Chroma style: one query for the whole batch, only metadata comes back
+        result = vector_store.get(ids=ids, include=["metadatas"])
+        return {
+            doc_id: (metadata or {}).get(HASH_KEY)
+            for doc_id, metadata in zip(result["ids"], result["metadatas"])
+        }
+    return {doc.id: doc.metadata.get(HASH_KEY) for doc in vector_store.get_by_ids(ids)}
+
+
+def _with_hash(doc: Document, doc_hash: str) -> Document:
+    return Document(page_content=doc.page_content, metadata={**doc.metadata, HASH_KEY: doc_hash})
+
+
+def _update(vector_store, ids: list[str], docs: list[Document]) -> None:
+    if hasattr(vector_store, "update_documents"):
+        vector_store.update_documents(ids=ids, documents=docs)
+    else:
+        vector_store.delete(ids=ids)
+        vector_store.add_documents(docs, ids=ids)
+
+
+def bulk_ingest(
+    vector_store,
+    documents,
+    batch_size: int = 1000,
+    key_fields: list[str] | None = None,
+) -> IngestReport:
+    """
+    Add `documents` (any iterable, e.g. loader.lazy_load()) to the store.
+
+    Unchanged documents are skipped, changed ones (same key, new content) are
+    updated, the rest is inserted with one add call per batch.
+    """
+    report = IngestReport()
+    batch: list[Document] = []
+
+    def flush():
+        # the last copy wins when the same document appears twice in a batch
+        by_id = {}
+        for doc in batch:
+            doc_hash = content_hash(doc)
+            by_id[document_id(doc, key_fields)] = (doc_hash, doc)
+        ids = list(by_id)
+        existing = stored_hashes(vector_store, ids)
+
+        new_ids, new_docs, changed_ids, changed_docs = [], [], [], []
+        for doc_id, (doc_hash, doc) in by_id.items():
+            if doc_id not in existing:
+                new_ids.append(doc_id)
+                new_docs.append(_with_hash(doc, doc_hash))
+            elif existing[doc_id] != doc_hash:
+                changed_ids.append(doc_id)
+                changed_docs.append(_with_hash(doc, doc_hash))
+
+        if new_docs:
+            vector_store.add_documents(new_docs, ids=new_ids)
+        if changed_docs:
+            _update(vector_store, changed_ids, changed_docs)
+
+        report.inserted += len(new_docs)
+        report.updated += len(changed_docs)
+        report.skipped += len(batch) - len(new_docs) - len(changed_docs)
+        report.ids.extend(ids)
+        batch.clear()
+
+    for doc in documents:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+@dataclass
+class SyncReport(IngestReport):
+    deleted: int = 0
+
+
+def stored_ids(vector_store, page_size: int = 1000):
+    """Page through every id of a collection without loading documents or vectors"""
+    offset = 0
+    while True:
+        page = vector_store.get(include=[], limit=page_size, offset=offset)["ids"]
+        yield from page
+        if len(page) < page_size:
+            return
+        offset += page_size
+
+
+def sync_collection(
+    vector_store,
+    documents,
+    key_fields: list[str] | None = None,
+    batch_size: int = 1000,
+    page_size: int = 1000,
+) -> SyncReport:
+    """
+    Make the collection match `documents` (the full current source corpus).
+
+    New or changed documents are embedded (bulk_ingest), unchanged ones cost
+    nothing, and stored documents that are no longer in the source are deleted.
+    Source documents are consumed in batches, so only their ids are kept in memory.
+    """
+    ingest = bulk_ingest(vector_store, documents, batch_size=batch_size, key_fields=key_fields)
+    report = SyncReport(
+        inserted=ingest.inserted, skipped=ingest.skipped, updated=ingest.updated, ids=ingest.ids
+    )
+
+    # scan first and delete afterwards, deleting while paging would shift the offsets
+    current = set(ingest.ids)
+    stale = [doc_id for doc_id in stored_ids(vector_store, page_size) if doc_id not in current]
+    for start in range(0, len(stale), batch_size):
+        vector_store.delete(ids=stale[start : start + batch_size])
+    report.deleted = len(stale)
+    return report
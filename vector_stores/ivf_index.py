@@ -0,0 +1,382 @@
+"""
+IVF-Flat approximate nearest neighbour index (inverted file over k-means partitions).
+
+The vectors are split into `nlist` partitions by spherical k-means. A query is
+compared with the partition centroids first and only the vectors of the
+`nprobe` closest partitions are scored (exactly), so a search touches about
+nprobe / nlist of the corpus instead of all of it.
+
+- build time:  nlist (default 2 * sqrt(n)), kmeans_iters, train_at
+- query time:  nprobe, higher = better recall and slower
+
+Until the index holds `train_at` vectors everything sits in one partition and
+search is exact. New vectors are added to their closest partition; when the
+index has grown `retrain_growth` times since training, the partitions are
+trained again so they stay balanced.
+
+Searches don't take a lock: centroids, partitions, labels and sizes are published
+together as one `_Partitions` tuple. A search works on the tuple it started with, and
+a retrain builds a new one off to the side and swaps it in with one assignment.
+"""
+
+import copy
+import json
+import os
+from typing import NamedTuple
+
+import numpy as np
+
+from langchain_models.embedding_models.similarity_engine import normalize_rows, top_k
+
+# a partition is merged back into one chunk by the writer once it holds more chunks than this
+_MAX_CHUNKS = 8
+
+
+class _Partitions(NamedTuple):
+    """Everything a search reads, replaced as a whole (the chunk lists only ever grow)"""
+
+    # (nlist x dim) unit centroids, None until trained
+    centroids: np.ndarray | None
+    # every partition is a list of (rows, vectors) chunks, joined by the writer every _MAX_CHUNKS adds
+    chunks: list[list[tuple[np.ndarray, np.ndarray]]]
+    # partition of every row, never written in place
+    labels: np.ndarray
+    # rows per partition
+    sizes: np.ndarray
+
+
+def _nearest(vectors: np.ndarray, centroids: np.ndarray, chunk_size: int = 65536) -> np.ndarray:
+    """Index of the closest centroid of every vector"""
+    labels = np.empty(len(vectors), dtype=np.int32)
+    for start in range(0, len(vectors), chunk_size):
+        labels[start : start + chunk_size] = np.argmax(vectors[start : start + chunk_size] @ centroids.T, axis=1)
+    return labels
+
+
+def _join(chunks: list[tuple[np.ndarray, np.ndarray]]) -> tuple[np.ndarray, np.ndarray]:
+    """One (rows, vectors) chunk from several, sorted by row"""
+    rows = np.concatenate([r for r, _ in chunks])
+    vectors = np.concatenate([v for _, v in chunks])
+    if np.any(np.diff(rows) < 0):
+        order = np.argsort(rows, kind="stable")
+        rows, vectors = rows[order], vectors[order]
+    return rows, vectors
+
+
+def spherical_kmeans(vectors: np.ndarray, k: int, iters: int = 10, seed: int = 0) -> np.ndarray:
+    """(k x dim) unit centroids of unit vectors, cosine similarity as the distance"""
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), k, replace=False)].copy()
+    for _ in range(iters):
+        labels = _nearest(vectors, centroids)
+        order = np.argsort(labels, kind="stable")
+        counts = np.bincount(labels, minlength=k)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        used = counts > 0
+        sums = np.add.reduceat(vectors[order], starts[used], axis=0)
+        centroids[used] = sums
+        # an empty partition restarts from a random vector
+        centroids[~used] = vectors[rng.choice(len(vectors), int((~used).sum()))]
+        centroids = normalize_rows(centroids)
+    return centroids
+
+
+class IVFIndex:
+    """
+    Drop-in replacement for SimilarityEngine inside LocalVectorStore.
+
+    index = IVFIndex(vectors, nlist=1024, nprobe=16)
+    index.search_arrays(queries, k=5)             # default nprobe
+    index.search_arrays(queries, k=5, nprobe=64)  # better recall, slower
+    """
+
+    kind = "ivf"
+
+    def __init__(
+        self,
+        vectors=None,
+        nlist: int | None = None,
+        nprobe: int = 8,
+        train_at: int = 10_000,
+        retrain_growth: float | None = 4.0,
+        kmeans_iters: int = 10,
+        max_points_per_centroid: int = 64,
+        seed: int = 0,
+    ):
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.train_at = train_at
+        self.retrain_growth = retrain_growth
+        self.kmeans_iters = kmeans_iters
+        # k-means runs on a sample of at most nlist * max_points_per_centroid vectors
+        self.max_points_per_centroid = max_points_per_centroid
+        self.seed = seed
+
+        self.dim = None
+        self._trained_size = 0
+        self._parts = _Partitions(None, [[]], np.empty(0, dtype=np.int32), np.zeros(1, dtype=np.int64))
+        if vectors is not None:
+            self.add(vectors)
+            if not self.trained:
+                self.train()
+
+    def __len__(self) -> int:
+        return len(self._parts.labels)
+
+    @property
+    def trained(self) -> bool:
+        return self._parts.centroids is not None
+
+    def copy(self) -> "IVFIndex":
+        """Independent copy sharing the partition arrays (they are replaced, never written to)"""
+        clone = copy.copy(self)
+        clone._parts = self._parts._replace(chunks=[list(chunks) for chunks in self._parts.chunks])
+        return clone
+
+    def params(self) -> dict:
+        return {
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "train_at": self.train_at,
+            "retrain_growth": self.retrain_growth,
+            "kmeans_iters": self.kmeans_iters,
+            "max_points_per_centroid": self.max_points_per_centroid,
+            "seed": self.seed,
+        }
+
+    def list_sizes(self) -> np.ndarray:
+        return self._parts.sizes
+
+    def _partition(self, parts: _Partitions, label: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        (rows, vectors) of one partition, rows sorted. Read only: searches run
+        while add() appends chunks, so several chunks are joined into a local copy.
+        """
+        # snapshot of the list, an add can append to it while we read
+        chunks = list(parts.chunks[label])
+        if not chunks:
+            return np.empty(0, dtype=np.int64), np.empty((0, self.dim or 0), dtype=np.float32)
+        if len(chunks) == 1:
+            return chunks[0]
+        return _join(chunks)
+
+    @staticmethod
+    def _append(partitions: list, labels: np.ndarray, rows: np.ndarray, vectors: np.ndarray) -> None:
+        if labels.min() == labels.max():
+            # untrained index, one partition: no regrouping copy
+            _add_chunk(partitions, labels[0], rows, vectors)
+            return
+        order = np.argsort(labels, kind="stable")
+        labels, rows, vectors = labels[order], rows[order], vectors[order]
+        present, starts = np.unique(labels, return_index=True)
+        stops = np.append(starts[1:], len(labels))
+        for label, start, stop in zip(present, starts, stops):
+            _add_chunk(partitions, label, rows[start:stop], vectors[start:stop])
+
+    def add(self, vectors) -> None:
+        vectors = normalize_rows(vectors)
+        if not len(vectors):
+            return
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+
+        parts = self._parts
+        rows = np.arange(len(parts.labels), len(parts.labels) + len(vectors), dtype=np.int64)
+        labels = np.zeros(len(vectors), dtype=np.int32) if parts.centroids is None else _nearest(vectors, parts.centroids)
+        # the chunks first, then the labels: a search never sees a label without its vector
+        self._append(parts.chunks, labels, rows, vectors)
+        self._parts = parts._replace(
+            labels=np.concatenate([parts.labels, labels]),
+            sizes=parts.sizes + np.bincount(labels, minlength=len(parts.chunks)),
+        )
+
+        if not self.trained and len(self) >= self.train_at:
+            self.train()
+        elif self.trained and self.retrain_growth and len(self) >= self.retrain_growth * self._trained_size:
+            self.train()
+
+    def _sample(self, parts: _Partitions, count: int) -> np.ndarray:
+        rng = np.random.default_rng(self.seed)
+        picks = np.sort(rng.choice(len(parts.labels), count, replace=False))
+        labels = parts.labels[picks]
+        order = np.argsort(labels, kind="stable")
+        present, starts = np.unique(labels[order], return_index=True)
+        stops = np.append(starts[1:], len(order))
+        samples = []
+        for label, start, stop in zip(present, starts, stops):
+            rows, vectors = self._partition(parts, label)
+            samples.append(vectors[np.searchsorted(rows, picks[order[start:stop]])])
+        return np.concatenate(samples)
+
+    def train(self) -> None:
+        """
+        (Re)compute the partitions from the current vectors and move every vector to its partition.
+        The new partitions are built next to the current ones, which searches keep using until the swap.
+        """
+        parts = self._parts
+        if not len(parts.labels):
+            return
+        size = len(parts.labels)
+        nlist = min(size, self.nlist or max(1, int(2 * np.sqrt(size))))
+        sample = self._sample(parts, min(size, nlist * self.max_points_per_centroid))
+        centroids = spherical_kmeans(sample, nlist, self.kmeans_iters, self.seed)
+
+        chunks = [[] for _ in range(nlist)]
+        labels = np.empty(size, dtype=np.int32)
+        for old in parts.chunks:
+            for rows, vectors in list(old):
+                new_labels = _nearest(vectors, centroids)
+                labels[rows] = new_labels
+                self._append(chunks, new_labels, rows, vectors)
+        # one chunk per partition, so searches after a retrain don't have to join anything
+        chunks = [[_join(part)] if len(part) > 1 else part for part in chunks]
+        self._parts = _Partitions(centroids, chunks, labels, np.bincount(labels, minlength=nlist))
+        self._trained_size = size
+
+    def remove(self, rows) -> None:
+        """Drop rows, later rows move down so row numbers stay contiguous"""
+        parts = self._parts
+        keep = np.ones(len(parts.labels), dtype=bool)
+        keep[np.asarray(rows, dtype=np.int64)] = False
+        new_rows = np.cumsum(keep) - 1
+        chunks = []
+        for label in range(len(parts.chunks)):
+            part_rows, vectors = self._partition(parts, label)
+            kept = keep[part_rows]
+            chunks.append([(new_rows[part_rows[kept]], vectors[kept])] if kept.any() else [])
+        labels = parts.labels[keep]
+        self._parts = parts._replace(chunks=chunks, labels=labels, sizes=np.bincount(labels, minlength=len(chunks)))
+
+    def score_rows(self, queries, rows) -> np.ndarray:
+        """Exact scores of the given rows only"""
+        queries = normalize_rows(queries)
+        return queries @ self.vectors(rows).T
+
+    def vectors(self, rows) -> np.ndarray:
+        """Vectors of the given rows, gathered partition by partition"""
+        parts = self._parts
+        rows = np.asarray(rows, dtype=np.int64)
+        vectors = np.empty((len(rows), self.dim or 0), dtype=np.float32)
+        labels = parts.labels[rows]
+        order = np.argsort(labels, kind="stable")
+        present, starts = np.unique(labels[order], return_index=True)
+        stops = np.append(starts[1:], len(order))
+        for label, start, stop in zip(present, starts, stops):
+            part_rows, part_vectors = self._partition(parts, label)
+            at = order[start:stop]
+            vectors[at] = part_vectors[np.searchsorted(part_rows, rows[at])]
+        return vectors
+
+    @staticmethod
+    def _probes(parts: _Partitions, queries: np.ndarray, k: int, nprobe: int) -> list[np.ndarray]:
+        """Partitions to scan for every query: the nprobe closest, more if they hold fewer than k vectors"""
+        ranked = np.argsort(-(queries @ parts.centroids.T), axis=1)
+        probes = []
+        for order in ranked:
+            covered = np.cumsum(parts.sizes[order])
+            needed = max(nprobe, int(np.searchsorted(covered, k)) + 1)
+            probes.append(order[:needed])
+        return probes
+
+    def search_arrays(self, queries, k: int = 4, nprobe: int | None = None) -> tuple[np.ndarray, np.ndarray]:
+        parts = self._parts
+        queries = normalize_rows(queries)
+        k = min(k, len(parts.labels))
+        if not k or not len(queries):
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+        if parts.centroids is None:
+            rows, vectors = self._partition(parts, 0)
+            indices, scores = top_k(queries @ vectors.T, k)
+            return rows[indices], scores
+
+        probes = self._probes(parts, queries, k, nprobe or self.nprobe)
+        # group by partition so a partition is read once for all the queries that probe it
+        query_ids = np.concatenate([np.full(len(p), i) for i, p in enumerate(probes)])
+        labels = np.concatenate(probes)
+        order = np.argsort(labels, kind="stable")
+        present, starts = np.unique(labels[order], return_index=True)
+        stops = np.append(starts[1:], len(order))
+
+        found_rows = [[] for _ in queries]
+        found_scores = [[] for _ in queries]
+        for label, start, stop in zip(present, starts, stops):
+            part_rows, vectors = self._partition(parts, label)
+            asking = query_ids[order[start:stop]]
+            scores = queries[asking] @ vectors.T
+            for query, query_scores in zip(asking, scores):
+                found_rows[query].append(part_rows)
+                found_scores[query].append(query_scores)
+
+        indices = np.empty((len(queries), k), dtype=np.int64)
+        best = np.empty((len(queries), k), dtype=np.float32)
+        for query in range(len(queries)):
+            rows = np.concatenate(found_rows[query])
+            picked, best[query] = top_k(np.concatenate(found_scores[query])[None], k)
+            indices[query] = rows[picked[0]]
+        return indices, best
+
+    def save(self, folder: str) -> None:
+        """
+        vectors.npy and rows.npy in partition order, partition_offsets.npy,
+        centroids.npy and index.json
+        """
+        parts = self._parts
+        offsets = np.concatenate([[0], np.cumsum(parts.sizes)]).astype(np.int64)
+        vectors = np.lib.format.open_memmap(
+            os.path.join(folder, "vectors.npy"), mode="w+", dtype=np.float32, shape=(len(parts.labels), self.dim or 0)
+        )
+        rows = np.lib.format.open_memmap(
+            os.path.join(folder, "rows.npy"), mode="w+", dtype=np.int64, shape=(len(parts.labels),)
+        )
+        for label in range(len(parts.chunks)):
+            part_rows, part_vectors = self._partition(parts, label)
+            rows[offsets[label] : offsets[label + 1]] = part_rows
+            vectors[offsets[label] : offsets[label + 1]] = part_vectors
+        vectors.flush()
+        rows.flush()
+        del vectors, rows
+        np.save(os.path.join(folder, "partition_offsets.npy"), offsets)
+        if parts.centroids is not None:
+            np.save(os.path.join(folder, "centroids.npy"), parts.centroids)
+        with open(os.path.join(folder, "index.json"), "w") as f:
+            json.dump(
+                {"kind": self.kind, "params": self.params(), "dim": self.dim, "trained_size": self._trained_size},
+                f,
+            )
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True):
+        """Open a saved index, every partition is a slice of the memory mapped vectors"""
+        with open(os.path.join(folder, "index.json")) as f:
+            config = json.load(f)
+        index = cls(**config["params"])
+        index.dim = config["dim"]
+        index._trained_size = config["trained_size"]
+        mode = "r" if mmap else None
+        vectors = np.load(os.path.join(folder, "vectors.npy"), mmap_mode=mode)
+        rows = np.load(os.path.join(folder, "rows.npy"), mmap_mode=mode)
+        offsets = np.load(os.path.join(folder, "partition_offsets.npy"))
+        centroids = None
+        if os.path.exists(os.path.join(folder, "centroids.npy")):
+            centroids = np.load(os.path.join(folder, "centroids.npy"))
+
+        chunks = [[] for _ in range(len(offsets) - 1)]
+        labels = np.empty(len(rows), dtype=np.int32)
+        for label, (start, stop) in enumerate(zip(offsets[:-1], offsets[1:])):
+            if stop > start:
+                chunks[label].append((rows[start:stop], vectors[start:stop]))
+                labels[rows[start:stop]] = label
+        index._parts = _Partitions(centroids, chunks, labels, np.diff(offsets))
+        return index
+
+
+def _add_chunk(partitions: list, label: int, rows: np.ndarray, vectors: np.ndarray) -> None:
+    chunks = partitions[label]
+    if len(chunks) < _MAX_CHUNKS:
+        chunks.append((rows, vectors))
+        return
+    # join on the write path and swap in a new list, readers keep the old one meanwhile
+    partitions[label] = [_join([*chunks, (rows, vectors)])]
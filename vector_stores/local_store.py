@@ -0,0 +1,592 @@
+"""
+In-process vector store with a pluggable search index.
+
+LocalVectorStore speaks the normal LangChain VectorStore interface
+(`add_documents`, `similarity_search`, `as_retriever`, ...) like Chroma and FAISS,
+while the vectors themselves live in an index object:
+
+- SimilarityEngine (default): exact float32 search
+- QuantizedIndex:             int8 / binary codes with optional float rescoring
+- PrefixIndex:                two-stage search over embedding prefixes
+- IVFIndex:                   approximate search over k-means partitions (nlist / nprobe)
+
+An index needs `add(vectors)`, `remove(rows)`, `copy()`, `vectors(rows)`,
+`score_rows(queries, rows)`, `search_arrays(queries, k, **params)` and `len()`.
+
+Deletes (and updates, which are delete + add) only set a tombstone bit, so they
+cost the same however big the store is; searches skip tombstoned rows. Once the
+dead fraction reaches `compact_threshold` a compaction rewrites the index, the
+documents and the metadata index without them. It runs in a background thread
+on a copy, readers keep using the current data and only the final swap takes
+the lock.
+
+Metadata filters go through an inverted index (MetadataIndex) and every query
+picks a plan from the number of matching rows:
+
+- prefilter:  few rows match, score only those rows (brute force)
+- postfilter: many rows match, run the normal search and over-fetch until k survive
+
+An empty query with a filter (`similarity_search("", filter=...)`) is a plain
+metadata listing: it is answered from the metadata index in insertion order,
+with `k` / `offset` paging, and never calls the embedding model. Ranked searches
+take the same `offset`: it skips that many of the best hits.
+
+`save_local(folder)` / `load_local(folder, embedding)` persist the store as plain
+files (vectors, an offsets table + packed docs, metadata postings). Loading only
+memory maps them, so nothing is re-embedded or unpickled before the first query.
+"""
+
+import json
+import os
+import shutil
+import threading
+import uuid
+from typing import Any, Iterable, NamedTuple, Sequence
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+from langchain_models.embedding_models.similarity_engine import SimilarityEngine, top_k
+from retrievers.mmr import mmr_select_batch
+from vector_stores.ivf_index import IVFIndex
+from vector_stores.metadata_index import MetadataIndex
+from vector_stores.mmap_format import (
+    RecordFile,
+    decode_document,
+    decode_string,
+    encode_document,
+    write_records,
+)
+from vector_stores.prefix_index import PrefixIndex
+from vector_stores.quantized_index import QuantizedIndex
+
+PLANS = ("auto", "prefilter", "postfilter")
+# on-disk layout version written to store.json
+FORMAT_VERSION = 1
+INDEX_TYPES = {cls.kind: cls for cls in (SimilarityEngine, PrefixIndex, QuantizedIndex, IVFIndex)}
+
+
+class _View(NamedTuple):
+    """
+    What a reader uses, taken together so a compaction swap can't mix old and new rows.
+    The index and metadata index keep growing with later adds, so only rows below
+    len(dead) belong to the view and anything above is dropped.
+    """
+
+    index: Any
+    ids: Sequence[str]
+    docs: Sequence[Document]
+    rows: dict[str, int]
+    dead: np.ndarray
+    dead_count: int
+    metadata_index: MetadataIndex
+
+
+class LocalVectorStore(VectorStore):
+    """
+    vector_store = LocalVectorStore(embedding, index=QuantizedIndex(mode="int8"))
+    vector_store.add_documents(docs)
+    vector_store.similarity_search("Who among these are a bowler?", k=1)
+    vector_store.similarity_search("captain", k=2, filter={"team": "Chennai Super Kings"})
+    """
+
+    def __init__(
+        self,
+        embedding: Embeddings,
+        index=None,
+        prefilter_max_rows: int = 50_000,
+        prefilter_max_fraction: float = 0.15,
+        compact_threshold: float | None = 0.2,
+        background_compaction: bool = True,
+    ):
+        self.embedding = embedding
+        self.index = index if index is not None else SimilarityEngine()
+        self.metadata_index = MetadataIndex()
+
+        # filters matching at most this many rows (and this fraction) are pre-filtered
+        self.prefilter_max_rows = prefilter_max_rows
+        self.prefilter_max_fraction = prefilter_max_fraction
+        # plan used by the last filtered search, handy for checking the planner
+        self.last_plan: str | None = None
+        # number of embed_documents / embed_query calls made by the store
+        self.embedding_calls = 0
+        # compact once this fraction of the rows is deleted (None = only when compact() is called)
+        self.compact_threshold = compact_threshold
+        self.background_compaction = background_compaction
+        self.compactions = 0
+        # bumped by every add and delete (not by compaction), caches compare it to notice changes
+        self.version = 0
+
+        # row i of the index belongs to self._ids[i] / self._docs[i], deleted rows have _dead[i] set
+        self._ids: list[str] = []
+        self._docs: list[Document] = []
+        self._row_lookup: dict[str, int] | None = {}
+        self._dead = np.zeros(0, dtype=bool)
+        self._dead_count = 0
+        # add batches since the last compaction, each one is a segment appended to the rows
+        self._segments = 0
+
+        # writers (add, delete, the compaction swap) hold _lock, readers only to take a _View
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._compactor: threading.Thread | None = None
+        # vectors added while a compaction runs, replayed on the compacted index
+        self._pending: list | None = None
+
+    @property
+    def _rows(self) -> dict[str, int]:
+        # id -> live row, built on first use for a loaded store so opening stays cheap
+        if self._row_lookup is None:
+            self._row_lookup = {
+                doc_id: row for row, doc_id in enumerate(self._ids) if not self._dead[row]
+            }
+        return self._row_lookup
+
+    @_rows.setter
+    def _rows(self, rows: dict[str, int]) -> None:
+        self._row_lookup = rows
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self.embedding
+
+    def __len__(self) -> int:
+        return len(self._ids) - self._dead_count
+
+    def _view(self) -> _View:
+        with self._lock:
+            return _View(
+                self.index,
+                self._ids,
+                self._docs,
+                self._rows,
+                self._dead,
+                self._dead_count,
+                self.metadata_index,
+            )
+
+    def stats(self) -> dict:
+        """Row counts, tombstones and segments, to see when (and how often) compaction runs"""
+        with self._lock:
+            rows = len(self._ids)
+            return {
+                "rows": rows,
+                "live": rows - self._dead_count,
+                "dead": self._dead_count,
+                "dead_ratio": self._dead_count / rows if rows else 0.0,
+                "segments": self._segments,
+                "compactions": self.compactions,
+                "compacting": self._compactor is not None and self._compactor.is_alive(),
+            }
+
+    def add_texts(
+        self,
+        texts: Iterable[str],
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        **kwargs: Any,
+    ) -> list[str]:
+        texts = list(texts)
+        if not texts:
+            return []
+        self.embedding_calls += 1
+        return self.add_embeddings(
+            zip(texts, self.embedding.embed_documents(texts)), metadatas, ids=ids
+        )
+
+    def add_embeddings(
+        self,
+        text_embeddings: Iterable[tuple[str, list[float]]],
+        metadatas: list[dict] | None = None,
+        ids: list[str] | None = None,
+    ) -> list[str]:
+        """Add already embedded texts (same as FAISS.add_embeddings)"""
+        texts, vectors = [], []
+        for text, vector in text_embeddings:
+            texts.append(text)
+            vectors.append(vector)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = [i or str(uuid.uuid4()) for i in ids] if ids else [str(uuid.uuid4()) for _ in texts]
+        if len(metadatas) != len(texts) or len(ids) != len(texts):
+            raise ValueError("texts, metadatas and ids must have the same length")
+        with self._lock:
+            duplicates = [i for i in ids if i in self._rows]
+            if duplicates or len(set(ids)) != len(ids):
+                raise ValueError(f"Documents with these ids already exist: {duplicates or ids}")
+
+            self.index.add(vectors)
+            self.metadata_index.add(metadatas)
+            self._dead = np.concatenate([self._dead, np.zeros(len(texts), dtype=bool)])
+            for doc_id, text, metadata in zip(ids, texts, metadatas):
+                self._rows[doc_id] = len(self._ids)
+                self._ids.append(doc_id)
+                self._docs.append(Document(id=doc_id, page_content=text, metadata=dict(metadata)))
+            self._segments += 1
+            self.version += 1
+            if self._pending is not None:
+                self._pending.append(vectors)
+        return ids
+
+    def delete(self, ids: list[str] | None = None, **kwargs: Any) -> bool:
+        """Tombstone the rows of `ids`, O(len(ids)) whatever the size of the store"""
+        with self._lock:
+            rows = [self._rows.pop(i) for i in set(ids or []) if i in self._rows]
+            if not rows:
+                return False
+            self._dead[rows] = True
+            self._dead_count += len(rows)
+            self.version += 1
+            due = self.compact_threshold is not None and self._dead_count >= self.compact_threshold * len(self._ids)
+        if due:
+            self.compact(wait=not self.background_compaction)
+        return True
+
+    def compact(self, wait: bool = True) -> None:
+        """
+        Rewrite the index, documents and metadata index without the deleted rows.
+        wait=False starts it in a background thread (if one isn't running already).
+        """
+        if wait:
+            self._compact()
+            return
+        with self._lock:
+            if self._compactor is None or not self._compactor.is_alive():
+                self._compactor = threading.Thread(target=self._compact, name="compaction", daemon=True)
+                self._compactor.start()
+
+    def wait_for_compaction(self) -> None:
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def _compact(self) -> None:
+        with self._compaction_lock:
+            with self._lock:
+                if not self._dead_count:
+                    return
+                index, ids, docs, dead = self.index.copy(), self._ids, self._docs, self._dead.copy()
+                self._pending = []
+
+            # the slow part works on the copy, readers and writers carry on with the current data
+            keep = np.flatnonzero(~dead)
+            index.remove(np.flatnonzero(dead))
+            new_ids = [ids[row] for row in keep]
+            new_docs = [docs[row] for row in keep]
+            metadata_index = MetadataIndex()
+            metadata_index.add([doc.metadata for doc in new_docs])
+            rows = {doc_id: row for row, doc_id in enumerate(new_ids)}
+
+            with self._lock:
+                # replay what happened meanwhile: deletes of kept rows, then the added rows
+                new_dead = np.concatenate([self._dead[keep], self._dead[len(dead):]])
+                for row in np.flatnonzero(new_dead[: len(keep)]):
+                    rows.pop(new_ids[row], None)
+                for vectors in self._pending:
+                    index.add(vectors)
+                tail = range(len(dead), len(self._ids))
+                metadata_index.add([self._docs[row].metadata for row in tail])
+                for row in tail:
+                    new_ids.append(self._ids[row])
+                    new_docs.append(self._docs[row])
+                    if not self._dead[row]:
+                        rows[self._ids[row]] = len(new_ids) - 1
+
+                self.index, self._ids, self._docs = index, new_ids, new_docs
+                self.metadata_index, self._rows = metadata_index, rows
+                self._dead, self._dead_count = new_dead, int(new_dead.sum())
+                self._segments = int(len(keep) > 0) + len(self._pending)
+                self._pending = None
+                self.compactions += 1
+
+    def update_documents(self, ids: list[str], documents: list[Document]) -> None:
+        """Replace stored documents (and their vectors) keeping the same ids"""
+        self.delete(ids)
+        self.add_documents(documents, ids=ids)
+
+    def get_by_ids(self, ids: Sequence[str], /) -> list[Document]:
+        view = self._view()
+        return [view.docs[view.rows[i]] for i in ids if i in view.rows]
+
+    def _select_rows(self, view: _View, ids, where, limit, offset) -> list[int]:
+        if where:
+            rows = _in_view(view, view.metadata_index.match(where))
+            if view.dead_count:
+                rows = rows[~view.dead[rows]]
+            if ids is not None:
+                rows = np.intersect1d(rows, [view.rows[i] for i in ids if i in view.rows])
+        elif ids is not None:
+            rows = [view.rows[i] for i in ids if i in view.rows]
+        elif view.dead_count:
+            rows = np.flatnonzero(~view.dead)
+        else:
+            rows = range(len(view.dead))
+        start = offset or 0
+        return [int(row) for row in rows[start : None if limit is None else start + limit]]
+
+    def get(
+        self,
+        ids: Sequence[str] | None = None,
+        where: dict | None = None,
+        limit: int | None = None,
+        offset: int | None = None,
+        include: list[str] | None = None,
+    ) -> dict[str, list]:
+        """Chroma style lookup by ids and/or metadata filter, no embedding involved"""
+        include = ["documents", "metadatas"] if include is None else include
+        view = self._view()
+        rows = self._select_rows(view, ids, where, limit, offset)
+
+        result = {"ids": [view.ids[row] for row in rows]}
+        if "documents" in include:
+            result["documents"] = [view.docs[row].page_content for row in rows]
+        if "metadatas" in include:
+            result["metadatas"] = [view.docs[row].metadata for row in rows]
+        return result
+
+    def _search_live(self, view: _View, embedding, k: int, candidates=None, **kwargs):
+        """
+        Normal index search that skips tombstoned rows (and rows outside `candidates`).
+        Expected survivors = fetch * live fraction, so over-fetch by 1 / fraction.
+        """
+        total = len(view.dead)
+        live = len(candidates) if candidates is not None else total - view.dead_count
+        if not live:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        fetch = k if live == total else min(total, max(k, int(k * total / live * 1.5) + 1))
+        while True:
+            # the index may hold rows added after the view was taken, fetch extra and drop them
+            newer = len(view.index) - total
+            indices, scores = view.index.search_arrays([embedding], fetch + newer, **kwargs)
+            indices, scores = indices[0], scores[0]
+            keep = indices < total
+            keep[keep] = ~view.dead[indices[keep]]
+            if candidates is not None:
+                keep &= np.isin(indices, candidates, assume_unique=True)
+            if keep.sum() >= k or fetch >= total:
+                return indices[keep][:k], scores[keep][:k]
+            # not enough survivors, this query's neighbourhood is poorer than average
+            fetch = min(total, fetch * 2)
+
+    def _filtered_search(self, view: _View, embedding, k: int, where: dict, plan: str, **kwargs):
+        candidates = _in_view(view, view.metadata_index.match(where))
+        if view.dead_count:
+            candidates = candidates[~view.dead[candidates]]
+        if not len(candidates):
+            self.last_plan = "empty"
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+
+        if plan == "auto":
+            small = len(candidates) <= min(
+                self.prefilter_max_rows, self.prefilter_max_fraction * (len(view.dead) - view.dead_count)
+            )
+            plan = "prefilter" if small else "postfilter"
+        self.last_plan = plan
+
+        if plan == "prefilter":
+            scores = view.index.score_rows([embedding], candidates)
+            order, best = top_k(scores, k)
+            return candidates[order[0]], best[0]
+        return self._search_live(view, embedding, k, candidates, **kwargs)
+
+    def similarity_search_with_score_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        filter: dict | None = None,
+        plan: str = "auto",
+        offset: int = 0,
+        **kwargs: Any,
+    ) -> list[tuple[Document, float]]:
+        # anything else in kwargs is a search parameter of the index (rescore, oversample, ...)
+        if plan not in PLANS:
+            raise ValueError(f"plan must be one of {PLANS}, got {plan!r}")
+        if offset < 0:
+            raise ValueError(f"offset must be >= 0, got {offset}")
+        view = self._view()
+        # paging: rank the first k + offset hits and skip `offset` of them
+        if filter:
+            indices, scores = self._filtered_search(view, embedding, k + offset, filter, plan, **kwargs)
+        else:
+            indices, scores = self._search_live(view, embedding, k + offset, **kwargs)
+        return [(view.docs[int(i)], float(s)) for i, s in zip(indices[offset:], scores[offset:])]
+
+    def similarity_search_by_vector(
+        self, embedding: list[float], k: int = 4, **kwargs: Any
+    ) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, **kwargs)]
+
+    def batch_max_marginal_relevance_search_by_vector(
+        self,
+        embeddings: list[list[float]],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        filter: dict | None = None,
+        plan: str = "auto",
+        **kwargs: Any,
+    ) -> list[list[Document]]:
+        """MMR for several query vectors: fetch_k candidates each, one batched selection"""
+        if plan not in PLANS:
+            raise ValueError(f"plan must be one of {PLANS}, got {plan!r}")
+        view = self._view()
+        found = []
+        for embedding in embeddings:
+            if filter:
+                indices, _ = self._filtered_search(view, embedding, fetch_k, filter, plan, **kwargs)
+            else:
+                indices, _ = self._search_live(view, embedding, fetch_k, **kwargs)
+            found.append(indices)
+        picks = mmr_select_batch(embeddings, [view.index.vectors(rows) for rows in found], k, lambda_mult)
+        return [[view.docs[int(rows[p])] for p in picked] for rows, picked in zip(found, picks)]
+
+    def max_marginal_relevance_search_by_vector(
+        self,
+        embedding: list[float],
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> list[Document]:
+        return self.batch_max_marginal_relevance_search_by_vector(
+            [embedding], k, fetch_k, lambda_mult, **kwargs
+        )[0]
+
+    def max_marginal_relevance_search(
+        self,
+        query: str,
+        k: int = 4,
+        fetch_k: int = 20,
+        lambda_mult: float = 0.5,
+        **kwargs: Any,
+    ) -> list[Document]:
+        # as_retriever(search_type="mmr", search_kwargs={"k": 3, "fetch_k": 20, "lambda_mult": 0.5})
+        self.embedding_calls += 1
+        return self.max_marginal_relevance_search_by_vector(
+            self.embedding.embed_query(query), k, fetch_k, lambda_mult, **kwargs
+        )
+
+    def metadata_search(
+        self, filter: dict | None = None, k: int | None = 4, offset: int = 0
+    ) -> list[Document]:
+        """Documents matching `filter` in insertion order, paged with k / offset, no embedding"""
+        self.last_plan = "metadata"
+        view = self._view()
+        return [view.docs[row] for row in self._select_rows(view, None, filter, k, offset)]
+
+    def similarity_search_with_score(
+        self, query: str, k: int = 4, **kwargs: Any
+    ) -> list[tuple[Document, float]]:
+        if query is None or not query.strip():
+            # nothing to rank: list the matching documents, score 0.0 means "not ranked"
+            docs = self.metadata_search(kwargs.get("filter"), k, kwargs.get("offset", 0))
+            return [(doc, 0.0) for doc in docs]
+        self.embedding_calls += 1
+        return self.similarity_search_with_score_by_vector(
+            self.embedding.embed_query(query), k, **kwargs
+        )
+
+    def similarity_search(self, query: str, k: int = 4, **kwargs: Any) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, **kwargs)]
+
+    def _select_relevance_score_fn(self):
+        # scores are cosine similarities in [-1, 1], relevance is expected in [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    def save_local(self, folder: str) -> None:
+        """
+        Write the store to `folder`:
+
+            store.json                         format version and planner settings
+            index.json + vectors.npy / codes.npy, vectors.f32   the vectors (see the index class)
+            ids.bin, docs.bin + *.offsets.npy  packed ids and documents with their offsets table
+            metadata.postings.npy + metadata.keys.json          the metadata index
+            tombstones.npy                     deleted rows that were not compacted yet
+
+        Files are written to a temporary folder which then replaces `folder`, so a
+        crash never leaves half a store and processes mapping the old files keep working.
+        """
+        tmp = f"{folder}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        view = self._view()
+        view.index.save(tmp)
+        view.metadata_index.save(tmp)
+        write_records(tmp, "ids", (doc_id.encode("utf-8") for doc_id in view.ids))
+        write_records(tmp, "docs", (encode_document(doc) for doc in view.docs))
+        np.save(os.path.join(tmp, "tombstones.npy"), view.dead)
+        with open(os.path.join(tmp, "store.json"), "w") as f:
+            json.dump(
+                {
+                    "format": FORMAT_VERSION,
+                    "count": len(view.ids) - view.dead_count,
+                    "prefilter_max_rows": self.prefilter_max_rows,
+                    "prefilter_max_fraction": self.prefilter_max_fraction,
+                    "compact_threshold": self.compact_threshold,
+                },
+                f,
+            )
+
+        old = f"{folder}.old"
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(folder):
+            os.rename(folder, old)
+        os.rename(tmp, folder)
+        shutil.rmtree(old, ignore_errors=True)
+
+    @classmethod
+    def load_local(cls, folder: str, embedding: Embeddings, mmap: bool = True) -> "LocalVectorStore":
+        """
+        Open a store written by save_local. With mmap=True vectors, documents and
+        postings stay on disk and are paged in by the OS as queries touch them.
+        """
+        with open(os.path.join(folder, "store.json")) as f:
+            config = json.load(f)
+        if config["format"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported store format {config['format']}, expected {FORMAT_VERSION}")
+        with open(os.path.join(folder, "index.json")) as f:
+            kind = json.load(f)["kind"]
+
+        store = cls(
+            embedding,
+            index=INDEX_TYPES[kind].load(folder, mmap=mmap),
+            prefilter_max_rows=config["prefilter_max_rows"],
+            prefilter_max_fraction=config["prefilter_max_fraction"],
+            compact_threshold=config.get("compact_threshold", 0.2),
+        )
+        store.metadata_index = MetadataIndex.load(folder, mmap=mmap)
+        store._ids = RecordFile(folder, "ids", decode_string)
+        store._docs = RecordFile(folder, "docs", decode_document)
+        tombstones = os.path.join(folder, "tombstones.npy")
+        # always in memory, deletes write into it
+        store._dead = np.load(tombstones) if os.path.exists(tombstones) else np.zeros(len(store._ids), dtype=bool)
+        store._dead_count = int(store._dead.sum())
+        store._segments = int(len(store._ids) > 0)
+        store._rows = None
+        if not mmap:
+            store._ids, store._docs = list(store._ids), list(store._docs)
+        return store
+
+    @classmethod
+    def from_texts(
+        cls,
+        texts: list[str],
+        embedding: Embeddings,
+        metadatas: list[dict] | None = None,
+        *,
+        ids: list[str] | None = None,
+        index=None,
+        **kwargs: Any,
+    ) -> "LocalVectorStore":
+        store = cls(embedding, index=index, **kwargs)
+        store.add_texts(texts, metadatas, ids=ids)
+        return store
+
+
+def _in_view(view: _View, rows: np.ndarray) -> np.ndarray:
+    """Drop the rows added after the view was taken (match() returns sorted rows)"""
+    return rows[: np.searchsorted(rows, len(view.dead))]
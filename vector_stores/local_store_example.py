@@ -0,0 +1,56 @@
+"""
+Compact in-memory vector store: int8 codes in RAM, float vectors on disk for rescoring
+
+Run from the project root:
+    python -m vector_stores.local_store_example
+"""
+
+from dotenv import load_dotenv
+from langchain_core.documents import Document
+from langchain_google_genai.embeddings import GoogleGenerativeAIEmbeddings
+
+from vector_stores.local_store import LocalVectorStore
+from vector_stores.quantized_index import QuantizedIndex
+
+load_dotenv()
+
+docs = [
+    Document(
+        page_content="Virat Kohli is one of the most successful and consistent batsmen in IPL history.",
+        metadata={"team": "Royal Challengers Bangalore"},
+    ),
+    Document(
+        page_content="Rohit Sharma is the most successful captain in IPL history, leading Mumbai Indians to five titles.",
+        metadata={"team": "Mumbai Indians"},
+    ),
+    Document(
+        page_content="MS Dhoni, famously known as Captain Cool, has led Chennai Super Kings to multiple IPL titles.",
+        metadata={"team": "Chennai Super Kings"},
+    ),
+    Document(
+        page_content="Jasprit Bumrah is considered one of the best fast bowlers in T20 cricket.",
+        metadata={"team": "Mumbai Indians"},
+    ),
+]
+
+vector_store = LocalVectorStore(
+    embedding=GoogleGenerativeAIEmbeddings(model="models/gemini-embedding-001"),
+    # mode="binary" is 32x smaller than float32, "int8" is 4x smaller
+    index=QuantizedIndex(mode="int8", rescore=True, oversample=4),
+)
+vector_store.add_documents(docs)
+
+print(f"memory per vector: {vector_store.index.memory_per_vector():.0f} bytes")
+
+# same interface as Chroma / FAISS
+print(vector_store.similarity_search_with_score("Who among these are a bowler?", k=1))
+
+# skip the rescoring step for a quicker (approximate) answer
+print(vector_store.similarity_search("Who among these are a bowler?", k=1, rescore=False))
+
+# metadata filter: answered from the inverted metadata index, only matching rows are scored
+print(vector_store.similarity_search("captain", k=1, filter={"team": "Chennai Super Kings"}))
+print(vector_store.last_plan)
+
+retriever = vector_store.as_retriever(search_kwargs={"k": 2})
+print(retriever.invoke("Who is the best captain?"))
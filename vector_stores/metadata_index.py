@@ -0,0 +1,155 @@
+"""
+Inverted index from metadata (key, value) to the rows that have it.
+
+`similarity_search(query, filter={"team": "Chennai Super Kings"})` should not
+check the metadata of every row. The index answers "which rows match this
+filter" with a few sorted array intersections, and the store uses the size of
+the answer to decide how to search (see LocalVectorStore).
+
+Filters use the Chroma `where` syntax:
+    {"team": "Mumbai Indians"}                           equality
+    {"team": {"$in": ["Mumbai Indians", "Chennai Super Kings"]}}
+    {"team": {"$ne": "Mumbai Indians"}}
+    {"$and": [{...}, {...}]}   {"$or": [{...}, {...}]}
+Several keys in one dict are combined with AND.
+"""
+
+import json
+import os
+from collections import defaultdict
+
+import numpy as np
+from langchain_core.documents import Document
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _indexable(value) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+class MetadataIndex:
+    def __init__(self):
+        # rows are appended in increasing order, so every postings list stays sorted
+        self._postings: dict[str, dict] = defaultdict(lambda: defaultdict(list))
+        self._arrays: dict[tuple, np.ndarray] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def add(self, metadatas: list[dict]) -> None:
+        """Index the metadata of the next len(metadatas) rows"""
+        for offset, metadata in enumerate(metadatas):
+            row = self._size + offset
+            for key, value in metadata.items():
+                if _indexable(value):
+                    postings = self._postings[key]
+                    if value not in postings:
+                        # a loaded index keeps its postings as arrays, start from those
+                        postings[value] = self.rows(key, value).tolist()
+                    postings[value].append(row)
+                    self._arrays.pop((key, value), None)
+        self._size += len(metadatas)
+
+    def rebuild(self, metadatas: list[dict]) -> None:
+        """Re-index from scratch, used after rows were removed and renumbered"""
+        self._postings.clear()
+        self._arrays.clear()
+        self._size = 0
+        self.add(metadatas)
+
+    def rows(self, key: str, value) -> np.ndarray:
+        """Sorted rows where metadata[key] == value"""
+        if not _indexable(value):
+            return _EMPTY
+        cache_key = (key, value)
+        if cache_key not in self._arrays:
+            postings = self._postings[key].get(value) if key in self._postings else None
+            self._arrays[cache_key] = np.array(postings, dtype=np.int64) if postings else _EMPTY
+        return self._arrays[cache_key]
+
+    def save(self, folder: str) -> None:
+        """
+        Write every postings list into one metadata.postings.npy array and
+        metadata.keys.json with [key, value, start, stop] for each of them
+        """
+        pairs = {(key, value) for key, values in self._postings.items() for value in values}
+        pairs.update(self._arrays)
+        keys, parts, start = [], [], 0
+        for key, value in pairs:
+            rows = self.rows(key, value)
+            if len(rows):
+                keys.append([key, value, start, start + len(rows)])
+                parts.append(rows)
+                start += len(rows)
+        postings = np.concatenate(parts) if parts else _EMPTY
+        np.save(os.path.join(folder, "metadata.postings.npy"), postings)
+        with open(os.path.join(folder, "metadata.keys.json"), "w") as f:
+            json.dump({"size": self._size, "keys": keys}, f)
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True) -> "MetadataIndex":
+        """Open a saved index, postings are slices of one (memory mapped) array"""
+        with open(os.path.join(folder, "metadata.keys.json")) as f:
+            config = json.load(f)
+        postings = np.load(os.path.join(folder, "metadata.postings.npy"), mmap_mode="r" if mmap else None)
+        index = cls()
+        index._size = config["size"]
+        for key, value, start, stop in config["keys"]:
+            index._arrays[(key, value)] = postings[start:stop]
+        return index
+
+    def _condition(self, key: str, condition) -> np.ndarray:
+        if not isinstance(condition, dict):
+            return self.rows(key, condition)
+        result = None
+        for op, operand in condition.items():
+            if op == "$eq":
+                rows = self.rows(key, operand)
+            elif op == "$in":
+                parts = [self.rows(key, value) for value in operand]
+                rows = np.unique(np.concatenate(parts)) if parts else _EMPTY
+            elif op == "$ne":
+                rows = np.setdiff1d(np.arange(self._size), self.rows(key, operand), assume_unique=True)
+            elif op == "$nin":
+                excluded = self._condition(key, {"$in": operand})
+                rows = np.setdiff1d(np.arange(self._size), excluded, assume_unique=True)
+            else:
+                raise ValueError(f"Unsupported filter operator {op!r}")
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+        return _EMPTY if result is None else result
+
+    def match(self, where: dict) -> np.ndarray:
+        """Sorted array of the rows matching a Chroma style `where` filter"""
+        result = None
+        for key, condition in where.items():
+            if key == "$and":
+                rows = self.match(condition[0]) if condition else np.arange(self._size)
+                for clause in condition[1:]:
+                    rows = np.intersect1d(rows, self.match(clause), assume_unique=True)
+            elif key == "$or":
+                parts = [self.match(clause) for clause in condition]
+                rows = np.unique(np.concatenate(parts)) if parts else _EMPTY
+            else:
+                rows = self._condition(key, condition)
+            result = rows if result is None else np.intersect1d(result, rows, assume_unique=True)
+            if not len(result):
+                return _EMPTY
+        return np.arange(self._size) if result is None else result
+
+
+def metadata_query(vector_store, where: dict | None = None, limit: int | None = None, offset: int = 0):
+    """
+    List documents by metadata only, e.g. every document of one team.
+
+    Uses the store's `get(where=...)` (Chroma or LocalVectorStore), so unlike
+    `similarity_search(query="", filter=...)` no query is embedded and no vectors are scanned.
+    """
+    result = vector_store.get(
+        where=where or None, limit=limit, offset=offset, include=["documents", "metadatas"]
+    )
+    return [
+        Document(id=doc_id, page_content=text, metadata=metadata or {})
+        for doc_id, text, metadata in zip(result["ids"], result["documents"], result["metadatas"])
+    ]
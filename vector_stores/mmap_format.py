@@ -0,0 +1,79 @@
+"""
+Packed record files that can be memory mapped.
+
+A record file is two files:
+    <name>.bin          every record's bytes one after another
+    <name>.offsets.npy  int64 offsets, record i is bin[offsets[i]:offsets[i + 1]]
+
+Opening one only maps the files, a record is decoded when it is accessed, so a
+store with a million documents opens in milliseconds and several processes
+reading the same files share one copy in the OS page cache.
+"""
+
+import json
+import mmap
+import os
+
+import numpy as np
+from langchain_core.documents import Document
+
+
+def write_records(folder: str, name: str, records) -> None:
+    """Write an iterable of bytes as <name>.bin + <name>.offsets.npy"""
+    offsets = [0]
+    with open(os.path.join(folder, f"{name}.bin"), "wb") as f:
+        for record in records:
+            f.write(record)
+            offsets.append(offsets[-1] + len(record))
+    np.save(os.path.join(folder, f"{name}.offsets.npy"), np.array(offsets, dtype=np.int64))
+
+
+class RecordFile:
+    """
+    Read-only list-like view of a record file, with an in-memory tail for appends.
+
+    `decode` turns the raw bytes of a record into a Python object.
+    """
+
+    def __init__(self, folder: str, name: str, decode):
+        self.decode = decode
+        self._offsets = np.load(os.path.join(folder, f"{name}.offsets.npy"), mmap_mode="r")
+        self._file = open(os.path.join(folder, f"{name}.bin"), "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap can't map an empty file
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+        self._stored = len(self._offsets) - 1
+        self._tail: list = []
+
+    def __len__(self) -> int:
+        return self._stored + len(self._tail)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if index >= self._stored:
+            return self._tail[index - self._stored]
+        start, stop = int(self._offsets[index]), int(self._offsets[index + 1])
+        return self.decode(self._data[start:stop])
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def append(self, item) -> None:
+        self._tail.append(item)
+
+
+def encode_document(doc: Document) -> bytes:
+    return json.dumps([doc.id, doc.page_content, doc.metadata], ensure_ascii=False).encode("utf-8")
+
+
+def decode_document(raw: bytes) -> Document:
+    doc_id, text, metadata = json.loads(raw)
+    return Document(id=doc_id, page_content=text, metadata=metadata)
+
+
+def decode_string(raw: bytes) -> str:
+    return bytes(raw).decode("utf-8")
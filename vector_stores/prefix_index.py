@@ -0,0 +1,120 @@
+"""
+Two-stage (Matryoshka style) search over truncated embedding prefixes.
+
+Models like OpenAI `text-embedding-3-*` put most of the meaning in the first
+dimensions (that's why `dimensions=32` still works). Instead of fixing the size
+when we embed, the full vectors are stored once and every query:
+
+1. scans only the first `prefix_dims` dimensions of the whole corpus
+2. reranks the best `shortlist` rows with the full vectors
+
+Both knobs can be changed per query. Stage 1 reads a contiguous, normalized copy
+of the prefix columns (built on first use of a prefix length, extended on add):
+a strided view of the full matrix would pull almost every cache line of the full
+rows through memory anyway. Each cached prefix length costs prefix_dims / dim of
+the matrix memory.
+"""
+
+import numpy as np
+
+from langchain_models.embedding_models.similarity_engine import (
+    SimilarityEngine,
+    chunked_top_k,
+    normalize_rows,
+    top_k,
+)
+
+
+class PrefixIndex(SimilarityEngine):
+    """
+    index = PrefixIndex(prefix_dims=64, shortlist=200)
+    index.add(full_vectors)
+    index.search_arrays(queries, k=5, prefix_dims=32, shortlist=500)
+    """
+
+    kind = "prefix"
+
+    def __init__(
+        self,
+        vectors=None,
+        prefix_dims: int = 64,
+        shortlist: int = 200,
+        chunk_size: int = 65536,
+        query_batch_size: int = 1024,
+    ):
+        self.prefix_dims = prefix_dims
+        self.shortlist = shortlist
+        self.chunk_size = chunk_size
+        # contiguous, row normalized copy of the first p dimensions, one per prefix length used
+        self._prefixes: dict[int, np.ndarray] = {}
+        super().__init__(vectors, query_batch_size=query_batch_size)
+
+    def copy(self):
+        # the cached arrays are replaced, never written into, so the copy can share them
+        clone = super().copy()
+        clone._prefixes = dict(self._prefixes)
+        return clone
+
+    def params(self) -> dict:
+        return {
+            **super().params(),
+            "prefix_dims": self.prefix_dims,
+            "shortlist": self.shortlist,
+            "chunk_size": self.chunk_size,
+        }
+
+    def add(self, vectors) -> None:
+        before = len(self)
+        super().add(vectors)
+        new_rows = self._matrix[before:]
+        self._prefixes = {
+            dims: np.concatenate([prefix, normalize_rows(new_rows[:, :dims])])
+            for dims, prefix in self._prefixes.items()
+        }
+
+    def remove(self, rows) -> None:
+        keep = np.ones(len(self), dtype=bool)
+        keep[np.asarray(rows, dtype=np.int64)] = False
+        super().remove(rows)
+        self._prefixes = {dims: np.ascontiguousarray(prefix[keep]) for dims, prefix in self._prefixes.items()}
+
+    def _prefix(self, dims: int) -> np.ndarray:
+        prefix = self._prefixes.get(dims)
+        if prefix is None:
+            prefix = normalize_rows(self._matrix[:, :dims])
+            self._prefixes = {**self._prefixes, dims: prefix}
+        return prefix
+
+    def search_arrays(
+        self,
+        queries,
+        k: int = 4,
+        prefix_dims: int | None = None,
+        shortlist: int | None = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        queries = normalize_rows(queries)
+        if not len(self) or not len(queries):
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        dims = min(prefix_dims or self.prefix_dims, self.dim)
+        shortlist = min(max(shortlist or self.shortlist, k), len(self))
+        if dims == self.dim:
+            return super().search_arrays(queries, k)
+
+        # stage 1: cosine on the prefix only, over the contiguous prefix copy
+        prefix_queries = normalize_rows(queries[:, :dims])
+        prefix = self._prefix(dims)
+
+        def score_chunk(start, stop):
+            return prefix_queries @ prefix[start:stop].T
+
+        candidates, _ = chunked_top_k(score_chunk, len(self), shortlist, self.chunk_size)
+
+        # stage 2: exact rerank of the shortlist with the full vectors,
+        # one query at a time so only `shortlist` full rows are gathered at once
+        exact = np.empty(candidates.shape, dtype=np.float32)
+        for row, (query, rows) in enumerate(zip(queries, candidates)):
+            exact[row] = self._matrix[rows] @ query
+        order, scores = top_k(exact, k)
+        return np.take_along_axis(candidates, order, axis=1), scores
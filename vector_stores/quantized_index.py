@@ -0,0 +1,367 @@
+"""
+Quantized vector index: int8 or binary codes in memory, float vectors on disk.
+
+- int8:   one symmetric scale maps the largest absolute value seen so far to 127,
+          4x smaller than float32. A later batch with larger values grows the
+          scale and re-encodes the existing codes, nothing is ever clipped
+- binary: only the sign of every dimension is kept (1 bit), 32x smaller,
+          candidates are scored with Hamming distance (XOR + popcount)
+
+Quantized scores are approximate, so the top `k * oversample` candidates can be
+rescored exactly against the float32 vectors kept in a memory mapped file.
+
+Searches don't take a lock: codes, scale and float file are published together as
+one `_Codes` tuple, after the new float rows are on disk. A float file is never
+truncated or rewritten in place, remove() writes a new one.
+"""
+
+import copy
+import json
+import os
+import tempfile
+import weakref
+from typing import NamedTuple
+
+import numpy as np
+
+from langchain_models.embedding_models.similarity_engine import (
+    chunked_top_k,
+    normalize_rows,
+    top_k,
+)
+
+MODES = ("int8", "binary")
+# block of (queries x rows) pairs scored at once by _binary_scores, sized to stay in the CPU cache
+_QUERY_BLOCK = 16
+_ROW_BLOCK = 4096
+# int8 rows decoded to float32 at once, about 1.5 MB at 384 dims so the block is still cached for the matmul
+_DECODE_BLOCK = 1024
+
+
+class _FloatFile:
+    """Float32 rows on disk, the file is deleted once no index (or search) uses it anymore"""
+
+    def __init__(self, path: str, dim: int, owned: bool = True):
+        self.path = path
+        self.dim = dim
+        self._view = None
+        if owned:
+            weakref.finalize(self, _remove_file, path)
+
+    @classmethod
+    def create(cls, dim: int) -> "_FloatFile":
+        fd, path = tempfile.mkstemp(suffix=".f32")
+        os.close(fd)
+        return cls(path, dim)
+
+    def rows(self, count: int) -> np.ndarray:
+        """Memory mapped first `count` rows, pages are only read when rows are touched"""
+        view = self._view
+        if view is None or len(view) < count:
+            # rows are written before their count is published, so the file is long enough
+            view = np.memmap(self.path, dtype=np.float32, mode="r", shape=(count, self.dim)) if count else None
+            self._view = view
+        return view[:count] if view is not None else np.empty((0, self.dim), dtype=np.float32)
+
+    def append(self, vectors: np.ndarray) -> None:
+        with open(self.path, "ab") as f:
+            f.write(vectors.tobytes())
+
+
+class _Codes(NamedTuple):
+    """Everything a search reads, replaced as a whole"""
+
+    codes: np.ndarray | None
+    # scale of the int8 codes (one value repeated per dimension), grows with the data
+    scale: np.ndarray | None
+    # float32 copy of the rows for rescoring, None with rescore=False
+    floats: _FloatFile | None
+
+
+class QuantizedIndex:
+    """
+    Drop-in replacement for SimilarityEngine inside LocalVectorStore.
+
+    index = QuantizedIndex(mode="binary", rescore=True, oversample=8)
+    index.add(vectors)
+    index.search_arrays(queries, k=5)
+    """
+
+    kind = "quantized"
+
+    def __init__(
+        self,
+        mode: str = "int8",
+        rescore: bool = True,
+        oversample: int = 4,
+        float_path: str | None = None,
+        chunk_size: int = 65536,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+        self.mode = mode
+        self.rescore = rescore
+        self.oversample = oversample
+        self.chunk_size = chunk_size
+
+        self.dim = None
+        # where the first float file goes (a temp file by default)
+        self.float_path = float_path
+        self._state = _Codes(None, None, None)
+        # float file shared with a copy or a saved folder, the next write goes to a new file first
+        self._shared_floats = False
+
+    def __len__(self) -> int:
+        codes = self._state.codes
+        return 0 if codes is None else codes.shape[0]
+
+    def params(self) -> dict:
+        return {
+            "mode": self.mode,
+            "rescore": self.rescore,
+            "oversample": self.oversample,
+            "chunk_size": self.chunk_size,
+        }
+
+    def save(self, folder: str) -> None:
+        """Write codes.npy (+ scale.npy, vectors.f32) and index.json"""
+        state = self._state
+        np.save(os.path.join(folder, "codes.npy"), state.codes if state.codes is not None else np.empty(0))
+        if state.scale is not None:
+            np.save(os.path.join(folder, "scale.npy"), state.scale)
+        if self.rescore:
+            with open(os.path.join(folder, "vectors.f32"), "wb") as f:
+                if state.floats is not None:
+                    f.write(np.ascontiguousarray(self.float_vectors(state)).tobytes())
+        with open(os.path.join(folder, "index.json"), "w") as f:
+            json.dump({"kind": self.kind, "params": self.params(), "dim": self.dim}, f)
+
+    @classmethod
+    def load(cls, folder: str, mmap: bool = True):
+        """Open a saved index, the codes are memory mapped and the float file is used in place"""
+        with open(os.path.join(folder, "index.json")) as f:
+            config = json.load(f)
+        index = cls(**config["params"])
+        index.dim = config["dim"]
+        codes = scale = floats = None
+        if index.dim is not None:
+            codes = np.load(os.path.join(folder, "codes.npy"), mmap_mode="r" if mmap else None)
+        if os.path.exists(os.path.join(folder, "scale.npy")):
+            scale = np.load(os.path.join(folder, "scale.npy"))
+        if index.rescore and index.dim is not None:
+            # the saved file belongs to the folder: never deleted, never written to
+            floats = _FloatFile(os.path.join(folder, "vectors.f32"), index.dim, owned=False)
+            index._shared_floats = True
+        index._state = _Codes(codes, scale, floats)
+        return index
+
+    def copy(self) -> "QuantizedIndex":
+        """Independent copy, the float file is shared until one of them writes to it"""
+        clone = copy.copy(self)
+        # both sides: whichever writes first moves to its own file
+        self._shared_floats = clone._shared_floats = self._state.floats is not None
+        return clone
+
+    def memory_per_vector(self) -> float:
+        """Bytes of RAM used by one vector (the float copy lives on disk)"""
+        state = self._state
+        if state.codes is None or not len(state.codes):
+            return 0.0
+        extra = 0 if state.scale is None else state.scale.nbytes
+        return (state.codes.nbytes + extra) / len(state.codes)
+
+    def _encode(self, vectors: np.ndarray, scale: np.ndarray | None) -> np.ndarray:
+        if self.mode == "binary":
+            return _pack_bits(vectors)
+        return np.clip(np.rint(vectors / scale), -127, 127).astype(np.int8)
+
+    def _floats_for_write(self, state: _Codes, keep=None) -> _FloatFile:
+        """The float file to append to, a new one when the current one is shared (or rows are dropped)"""
+        if state.floats is None:
+            if self.float_path is not None:
+                open(self.float_path, "wb").close()
+                # a caller chosen path is the caller's file
+                return _FloatFile(self.float_path, self.dim, owned=False)
+            return _FloatFile.create(self.dim)
+        if not self._shared_floats and keep is None:
+            return state.floats
+        floats = _FloatFile.create(self.dim)
+        existing = self.float_vectors(state)
+        floats.append(np.ascontiguousarray(existing if keep is None else existing[keep]))
+        self._shared_floats = False
+        return floats
+
+    def add(self, vectors) -> None:
+        vectors = normalize_rows(vectors)
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors of dimension {self.dim}, got {vectors.shape[1]}")
+        # writers are serialized by the store, searches run concurrently
+        state = self._state
+        if self.rescore:
+            # float rows go to disk first, a search may already see the codes published below
+            floats = self._floats_for_write(state)
+            floats.append(vectors)
+            state = state._replace(floats=floats)
+
+        scale = state.scale
+        if self.mode == "int8" and len(vectors):
+            needed = np.abs(vectors).max(axis=0) / 127.0
+            if scale is None:
+                scale = np.full(self.dim, max(needed.max(), 1e-8), dtype=np.float32)
+            elif (needed > scale).any():
+                state = self._rescale(state, max(needed.max(), scale.max()))
+                scale = state.scale
+
+        codes = self._encode(vectors, scale)
+        codes = codes if state.codes is None else np.concatenate([state.codes, codes])
+        self._state = state._replace(codes=codes, scale=scale)
+
+    def _rescale(self, state: _Codes, scale: float) -> _Codes:
+        """Grow the int8 scale and re-encode the stored codes, exactly from the float file when kept"""
+        if state.floats is not None:
+            existing = np.asarray(self.float_vectors(state))
+        else:
+            existing = state.codes.astype(np.float32) * state.scale
+        scale = np.full(self.dim, scale, dtype=np.float32)
+        # the largest value seen so far usually comes early, so this happens a handful of times
+        return state._replace(codes=self._encode(existing, scale), scale=scale)
+
+    def remove(self, rows) -> None:
+        """Drop rows from the codes and write the kept float rows to a new file"""
+        state = self._state
+        keep = np.ones(len(state.codes), dtype=bool)
+        keep[np.asarray(rows, dtype=np.int64)] = False
+        floats = self._floats_for_write(state, keep) if state.floats is not None else None
+        self._state = state._replace(codes=state.codes[keep], floats=floats)
+
+    def vectors(self, rows) -> np.ndarray:
+        """Float vectors of the rows, decoded from the codes when no float file is kept"""
+        state = self._state
+        rows = np.asarray(rows, dtype=np.int64)
+        if state.floats is not None:
+            return np.asarray(self.float_vectors(state)[rows])
+        codes = state.codes[rows]
+        if self.mode == "int8":
+            return normalize_rows(codes.astype(np.float32) * state.scale)
+        signs = np.unpackbits(codes.view(np.uint8), axis=1)[:, : self.dim].astype(np.float32) * 2 - 1
+        return normalize_rows(signs)
+
+    def score_rows(self, queries, rows) -> np.ndarray:
+        """Scores of the given rows only: exact when float vectors are kept, else from the codes"""
+        state = self._state
+        queries = normalize_rows(queries)
+        if state.floats is not None:
+            return queries @ np.asarray(self.float_vectors(state)[rows]).T
+        codes = state.codes[rows]
+        if self.mode == "int8":
+            return (queries * state.scale) @ codes.astype(np.float32).T
+        return _binary_scores(_pack_bits(queries), codes, self.dim) / self.dim
+
+    def float_vectors(self, state: _Codes | None = None) -> np.ndarray:
+        """Memory mapped float32 vectors (of `state`, default the current rows)"""
+        state = state or self._state
+        return state.floats.rows(len(state.codes))
+
+    def _coarse_search(self, state: _Codes, queries: np.ndarray, k: int):
+        codes = state.codes
+        if self.mode == "int8":
+            # q . x  ~=  (q * scale) . codes
+            scaled = (queries * state.scale).astype(np.float32, copy=False)
+            block = np.empty((_DECODE_BLOCK, self.dim), dtype=np.float32)
+
+            def score_chunk(start, stop):
+                # decoding the whole chunk at once would write and re-read 4x its size in float32
+                scores = np.empty((len(scaled), stop - start), dtype=np.float32)
+                for row in range(start, stop, _DECODE_BLOCK):
+                    rows = codes[row : min(row + _DECODE_BLOCK, stop)]
+                    decoded = block[: len(rows)]
+                    decoded[...] = rows
+                    np.matmul(scaled, decoded.T, out=scores[:, row - start : row - start + len(rows)])
+                return scores
+
+            return chunked_top_k(score_chunk, len(codes), k, self.chunk_size)
+
+        # binary: similarity = dim - 2 * hamming distance
+        packed = _pack_bits(queries)
+
+        def score_chunk(start, stop):
+            return _binary_scores(packed, codes[start:stop], self.dim)
+
+        return chunked_top_k(score_chunk, len(codes), k, self.chunk_size)
+
+    def search_arrays(
+        self, queries, k: int = 4, rescore: bool | None = None, oversample: int | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        state = self._state
+        size = 0 if state.codes is None else len(state.codes)
+        queries = normalize_rows(queries)
+        if not size or not len(queries):
+            empty = np.empty((len(queries), 0))
+            return empty.astype(np.int64), empty.astype(np.float32)
+
+        rescore = self.rescore if rescore is None else rescore
+        if rescore and not self.rescore:
+            raise ValueError("Index was built with rescore=False, no float vectors on disk")
+        oversample = oversample or self.oversample
+
+        candidates = min(size, k * oversample) if rescore else k
+        indices, scores = self._coarse_search(state, queries, candidates)
+        if not rescore:
+            if self.mode == "binary":
+                # map hamming similarity back to the cosine range [-1, 1]
+                scores = scores / self.dim
+            return indices, scores
+
+        # exact rescoring of the shortlist against the float vectors on disk
+        floats = self.float_vectors(state)
+        exact = np.einsum("qcd,qd->qc", floats[indices.ravel()].reshape(*indices.shape, -1), queries)
+        order, scores = top_k(exact, k)
+        return np.take_along_axis(indices, order, axis=1), scores
+
+
+def _pack_bits(vectors: np.ndarray) -> np.ndarray:
+    """Sign bits packed into uint64 words so popcount works on 64 dimensions at a time"""
+    packed = np.packbits(vectors > 0, axis=1)
+    pad = -packed.shape[1] % 8
+    if pad:
+        packed = np.pad(packed, ((0, 0), (0, pad)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def _binary_scores(packed: np.ndarray, codes: np.ndarray, dim: int) -> np.ndarray:
+    """
+    (queries x rows) similarity dim - 2 * hamming distance of packed query bits and codes.
+
+    XOR, popcount and sum run one 64 bit word at a time over blocks of
+    _QUERY_BLOCK x _ROW_BLOCK pairs, so the temporaries stay in the CPU cache and
+    no (queries x rows x words) array is ever built.
+    """
+    words = np.ascontiguousarray(codes.T)
+    scores = np.empty((len(packed), len(codes)), dtype=np.float32)
+    xor = np.empty((_QUERY_BLOCK, _ROW_BLOCK), dtype=np.uint64)
+    bits = np.empty((_QUERY_BLOCK, _ROW_BLOCK), dtype=np.uint8)
+    hamming = np.empty((_QUERY_BLOCK, _ROW_BLOCK), dtype=np.uint16)
+    for q0 in range(0, len(packed), _QUERY_BLOCK):
+        query_words = packed[q0 : q0 + _QUERY_BLOCK].T[:, :, None]
+        queries = query_words.shape[1]
+        for r0 in range(0, len(codes), _ROW_BLOCK):
+            r1 = min(r0 + _ROW_BLOCK, len(codes))
+            x, b, h = xor[:queries, : r1 - r0], bits[:queries, : r1 - r0], hamming[:queries, : r1 - r0]
+            h[:] = 0
+            for word, query_word in zip(words[:, r0:r1], query_words):
+                np.bitwise_xor(word, query_word, out=x)
+                np.bitwise_count(x, out=b)
+                h += b
+            out = scores[q0 : q0 + queries, r0:r1]
+            np.multiply(h, np.float32(-2), out=out)
+            out += dim
+    return scores
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,52 @@
+"""
+Synthetic embedding corpora for the vector store benchmarks.
+
+Real embeddings are clustered by topic, pure random vectors are not, so the
+vectors here are noisy points around random topic centers.
+"""
+
+import numpy as np
+
+
+def make_clustered_vectors(
+    count: int,
+    dim: int = 384,
+    clusters: int = 100,
+    noise: float = 1.0,
+    seed: int = 0,
+    spectrum_decay: float | None = None,
+) -> np.ndarray:
+    """
+    (count x dim) float32 unit vectors grouped around `clusters` centers.
+
+    `spectrum_decay` makes early dimensions carry more of the signal, like
+    Matryoshka trained models (dimension d is scaled by exp(-d / (decay * dim))).
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim), dtype=np.float32)
+    centers /= np.linalg.norm(centers, axis=1, keepdims=True)
+    spectrum = None
+    if spectrum_decay:
+        spectrum = np.exp(-np.arange(dim) / (spectrum_decay * dim)).astype(np.float32)
+
+    vectors = np.empty((count, dim), dtype=np.float32)
+    # generated in chunks so a 1M corpus doesn't need a second full size buffer
+    chunk = 100_000
+    for start in range(0, count, chunk):
+        size = min(chunk, count - start)
+        labels = rng.integers(0, clusters, size)
+        block = centers[labels] + noise * rng.standard_normal((size, dim), dtype=np.float32) / np.sqrt(dim)
+        if spectrum is not None:
+            block *= spectrum
+        block /= np.linalg.norm(block, axis=1, keepdims=True)
+        vectors[start : start + size] = block
+    return vectors
+
+
+def make_queries(vectors: np.ndarray, count: int, noise: float = 0.2, seed: int = 1) -> np.ndarray:
+    """Queries close to (but not equal to) random corpus vectors"""
+    rng = np.random.default_rng(seed)
+    picks = vectors[rng.integers(0, len(vectors), count)]
+    dim = vectors.shape[1]
+    queries = picks + noise * rng.standard_normal(picks.shape, dtype=np.float32) / np.sqrt(dim)
+    return (queries / np.linalg.norm(queries, axis=1, keepdims=True)).astype(np.float32)